@@ -0,0 +1,175 @@
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from alfworld.alfworld_simulator import ALFWorldSimulator, type_name
+
+# A goal condition: what it requires, and a test on a simulator state
+Condition = Tuple[str, Callable[[Dict[str, Any]], bool]]
+
+# Task types whose object must be processed before it is placed
+PROCESSED = {
+    "pick_heat_then_place_in_recep": "heated",
+    "pick_cool_then_place_in_recep": "cooled",
+    "pick_clean_then_place_in_recep": "cleaned",
+}
+
+
+def _entity_type(name: str) -> str:
+    """Type of an entity name such as "countertop 1" or "mug 2"."""
+    return name.rsplit(" ", 1)[0]
+
+
+def _objects_in(
+    state: Dict[str, Any], object_type: str, container_type: str
+) -> List[str]:
+    """Objects of a type lying in any receptacle (or object) of a type."""
+    return [
+        name
+        for container, names in state["contents"].items()
+        if _entity_type(container) == container_type
+        for name in names
+        if state["object_types"].get(name) == object_type
+    ]
+
+
+def goal_conditions(
+    task_type: str,
+    params: Dict[str, Any],
+    initial: Optional[Dict[str, Any]] = None,
+) -> List[Condition]:
+    """
+    Translate a trial's PDDL goal into conditions on the simulator state.
+
+    The goal is given by the task type and the pddl_params of traj_data.json:
+    the object to handle, the receptacle it must end up in, the movable
+    receptacle that has to carry it and the light it has to be examined under.
+
+    Args:
+        task_type: Task type, e.g. "pick_heat_then_place_in_recep"
+        params: The trial's pddl_params
+        initial: State of the world before the agent acted; objects that
+            already lay in the goal receptacle then do not count as placed
+
+    Returns:
+        List of (description, test) conditions that must all hold, empty if
+        the parameters do not name a goal
+    """
+    target = type_name(params.get("object_target") or "")
+    parent = type_name(params.get("parent_target") or "")
+    mrecep = type_name(params.get("mrecep_target") or "")
+    toggle = type_name(params.get("toggle_target") or "")
+    if not target:
+        return []
+
+    if task_type == "look_at_obj_in_light":
+        return [
+            (
+                f"holding a {target}",
+                lambda state: state["object_types"].get(state["holding"]) == target,
+            ),
+            (
+                f"a {toggle} turned on",
+                lambda state: any(
+                    _entity_type(light) == toggle for light in state["lights_on"]
+                ),
+            ),
+        ]
+
+    if task_type == "pick_and_place_with_movable_recep":
+        return [
+            (
+                f"a {mrecep} holding a {target} in the {parent}",
+                lambda state: any(
+                    state["object_types"].get(name) == target
+                    for carrier in _objects_in(state, mrecep, parent)
+                    for name in state["contents"].get(carrier, [])
+                ),
+            ),
+        ]
+
+    if task_type in PROCESSED:
+        attribute = PROCESSED[task_type]
+        return [
+            (
+                f"a {attribute} {target} in the {parent}",
+                lambda state: any(
+                    name in state[attribute]
+                    for name in _objects_in(state, target, parent)
+                ),
+            ),
+        ]
+
+    count = 2 if task_type == "pick_two_obj_and_place" else 1
+    already_placed = set(_objects_in(initial, target, parent)) if initial else set()
+    return [
+        (
+            f"{count} {target} in the {parent}",
+            lambda state: (
+                len(set(_objects_in(state, target, parent)) - already_placed) >= count
+            ),
+        ),
+    ]
+
+
+def check_actions(world: ALFWorldSimulator, actions: List[str]) -> Dict[str, Any]:
+    """
+    Replay an action list in a trial's world and check the PDDL goal.
+
+    As in ALFWorld, the task succeeds as soon as every goal condition holds;
+    later actions are not replayed. When the goal is never reached, the first
+    action the world rejected is reported as the failing step, since the plan
+    went wrong there at the latest. Only objects the agent placed count
+    towards the goal.
+
+    Args:
+        world: Freshly built simulator of the trial
+        actions: Actions to replay, in order
+
+    Returns:
+        Dict with success, explanation, the 0-based failed_step (or None) and
+        the failed_action (or None)
+
+    Raises:
+        ValueError: If the goal already holds before any action is replayed
+    """
+    conditions = goal_conditions(world.task_type, world.params, world.state())
+    failed_step: Optional[int] = None
+
+    def unmet() -> List[str]:
+        state = world.state()
+        return [description for description, test in conditions if not test(state)]
+
+    if conditions and not unmet():
+        raise ValueError(
+            f"Goal of the {world.task_type} trial holds before any action: "
+            + "; ".join(description for description, _ in conditions)
+        )
+
+    for step, action in enumerate(actions):
+        world.step(action)
+        if world.last_action_failed and failed_step is None:
+            failed_step = step
+        if not unmet():
+            return {
+                "success": True,
+                "explanation": f"Goal reached after step {step + 1}: "
+                + "; ".join(description for description, _ in conditions),
+                "failed_step": None,
+                "failed_action": None,
+            }
+
+    missing = "; ".join(unmet())
+    if failed_step is None:
+        explanation = f"Every action succeeded but the goal was not met: {missing}"
+        failed_action = None
+    else:
+        failed_action = actions[failed_step]
+        explanation = (
+            f"Step {failed_step + 1} ({failed_action}) could not be executed "
+            f"and the goal was not met: {missing}"
+        )
+    return {
+        "success": False,
+        "explanation": explanation,
+        "failed_step": failed_step,
+        "failed_action": failed_action,
+    }
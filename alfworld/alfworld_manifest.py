@@ -0,0 +1,124 @@
+import os
+import json
+from typing import Dict, Any, List, Optional
+
+SPLITS = ("train", "valid_seen", "valid_unseen")
+
+MANIFEST_NAME = ".alfworld_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def parse_task_name(task_name: str) -> Dict[str, str]:
+    """
+    Split a task directory name into its parts.
+
+    Names look like `pick_and_place_simple-Mug-None-Shelf-301`: task type,
+    object, movable receptacle (or None), target receptacle and scene.
+    """
+    parts = task_name.split("-")
+    parts += [""] * (5 - len(parts))
+    return {
+        "task_type": parts[0],
+        "object": parts[1],
+        "receptacle": parts[2],
+        "target": parts[3],
+        "scene": parts[4],
+    }
+
+
+def scan_split(split_dir: str) -> List[Dict[str, Any]]:
+    """
+    List the tasks of a split with one directory scan per level.
+
+    Directory entries carry their type, so no extra stat call is made per
+    task or trial.
+
+    Args:
+        split_dir: Directory of the split (e.g. json_2.1.1/train)
+
+    Returns:
+        Task dictionaries sorted by name
+    """
+    tasks = []
+    with os.scandir(split_dir) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            with os.scandir(entry.path) as trial_entries:
+                trials = sorted(
+                    trial.path
+                    for trial in trial_entries
+                    if trial.is_dir() and trial.name.startswith("trial_")
+                )
+            tasks.append(
+                {
+                    **parse_task_name(entry.name),
+                    "task_name": entry.name,
+                    "path": entry.path,
+                    "trials": trials,
+                }
+            )
+    tasks.sort(key=lambda task: task["task_name"])
+    return tasks
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def load_manifest(
+    json_dir: str, manifest_path: Optional[str] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Return the task catalog of every split, rescanning only what changed.
+
+    The catalog is cached in a manifest file next to the splits. A split is
+    rescanned when its directory's modification time differs from the one
+    recorded, i.e. when task directories were added, removed or renamed.
+
+    Args:
+        json_dir: The json_2.1.1 directory holding the split directories
+        manifest_path: Where to cache the manifest (defaults to inside json_dir)
+
+    Returns:
+        Mapping of split name to its tasks; missing splits are left out
+    """
+    manifest_path = manifest_path or os.path.join(json_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            manifest = {}
+    except (OSError, ValueError):
+        manifest = {}
+    cached_splits = manifest.get("splits", {})
+
+    splits = {}
+    changed = False
+    for split in SPLITS:
+        split_dir = os.path.join(json_dir, split)
+        mtime_ns = _mtime_ns(split_dir)
+        if mtime_ns is None:
+            changed |= split in cached_splits
+            continue
+
+        cached = cached_splits.get(split)
+        if cached is not None and cached["mtime_ns"] == mtime_ns:
+            splits[split] = cached
+        else:
+            print(f"SCANNING ALFWORLD SPLIT {split}")
+            splits[split] = {"mtime_ns": mtime_ns, "tasks": scan_split(split_dir)}
+            changed = True
+
+    if changed:
+        try:
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "splits": splits}, f)
+        except OSError as e:
+            # A read-only dataset directory only costs a rescan next time
+            print(f"Could not write manifest {manifest_path}: {e}")
+
+    return {split: entry["tasks"] for split, entry in splits.items()}
@@ -0,0 +1,583 @@
+import os
+import re
+import json
+import zlib
+from typing import Dict, Any, List, Optional
+
+# Receptacles that have to be opened before their contents can be seen
+OPENABLE = {"fridge", "microwave", "cabinet", "drawer", "safe", "box"}
+
+# Objects that can hold other objects and be carried around
+MOVABLE_RECEPTACLES = {"bowl", "box", "cup", "mug", "pan", "plate", "pot"}
+
+# Appliances and what using them does to the held object
+APPLIANCES = {"microwave": "heat", "fridge": "cool", "sinkbasin": "clean"}
+PROCESSES = {
+    "heat": ("microwave", "stoveburner"),
+    "cool": ("fridge",),
+    "clean": ("sinkbasin", "bathtubbasin"),
+}
+LIGHTS = {"desklamp", "floorlamp"}
+
+# Receptacles every room of a floor plan range has, on top of those the
+# trajectory mentions
+ROOM_RECEPTACLES = {
+    "kitchen": ["cabinet", "countertop", "drawer", "fridge", "microwave", "sinkbasin"],
+    "living room": ["coffeetable", "diningtable", "drawer", "shelf", "sofa"],
+    "bedroom": ["bed", "desk", "drawer", "dresser", "shelf"],
+    "bathroom": ["cabinet", "countertop", "garbagecan", "sinkbasin", "toilet"],
+}
+
+# Everyday names the agent may use for a receptacle type
+ALIASES = {
+    "sink": "sinkbasin",
+    "counter": "countertop",
+    "stove": "stoveburner",
+    "burner": "stoveburner",
+    "trash": "garbagecan",
+    "bin": "garbagecan",
+    "tub": "bathtubbasin",
+    "lamp": "desklamp",
+    "table": "diningtable",
+    "couch": "sofa",
+}
+
+ARTICLES = re.compile(r"\b(the|a|an|some)\b")
+
+
+def room_of(scene_num: int) -> str:
+    """Room type of an AI2-THOR floor plan number."""
+    if scene_num < 100:
+        return "kitchen"
+    if scene_num < 300:
+        return "living room"
+    if scene_num < 400:
+        return "bedroom"
+    return "bathroom"
+
+
+def type_name(name: str) -> str:
+    """AI2-THOR object type ("CounterTop", "Mug_3a2b") to a text-world type."""
+    return name.split("_")[0].split("|")[0].lower().replace(" ", "")
+
+
+def _stable_index(name: str, size: int) -> int:
+    # crc32 rather than hash() so placements survive interpreter restarts
+    return zlib.crc32(name.encode("utf-8")) % size
+
+
+def _listing(names: List[str]) -> str:
+    if not names:
+        return "nothing"
+    names = [f"a {name}" for name in names]
+    if len(names) == 1:
+        return names[0]
+    return ", ".join(names[:-1]) + f", and {names[-1]}"
+
+
+class ALFWorldSimulator:
+    """
+    Rule-based text world of one ALFWorld trial.
+
+    The room is rebuilt from the trial's traj_data.json: receptacles from the
+    expert plan and the room type, objects from the scene's object poses, and
+    the initial location of every object the plan picks up. Actions are
+    answered deterministically in the style of the ALFWorld text engine, so
+    the same action sequence always produces the same observations.
+
+    Besides the engine's own commands ("go to fridge 1", "put apple 1 in/on
+    countertop 1"), the coarser vocabulary of the agent prompts is
+    understood: acting on a receptacle or on an object in view ("take
+    apple", "open fridge", "heat apple") walks to it first.
+    """
+
+    def __init__(self, traj_data: Dict[str, Any]):
+        """
+        Build the world of a trial.
+
+        Args:
+            traj_data: Parsed traj_data.json of the trial
+        """
+        scene = traj_data.get("scene", {})
+        self.params = traj_data.get("pddl_params", {})
+        self.task_type = traj_data.get("task_type", "")
+        self.room = room_of(int(scene.get("scene_num", 0) or 0))
+
+        self.location: Optional[str] = None
+        self.holding: Optional[str] = None
+        self.opened: set = set()
+        self.heated: set = set()
+        self.cooled: set = set()
+        self.cleaned: set = set()
+        self.lights_on: set = set()
+        # Whether the world rejected the last action
+        self.last_action_failed = False
+        # Receptacle (or movable receptacle object) -> objects it holds
+        self.contents: Dict[str, List[str]] = {}
+        self.object_types: Dict[str, str] = {}
+
+        high_pddl = traj_data.get("plan", {}).get("high_pddl", [])
+        self._build_receptacles(high_pddl)
+        self._build_objects(scene.get("object_poses", []), high_pddl)
+
+    @classmethod
+    def from_trial(cls, trial_path: str) -> "ALFWorldSimulator":
+        """Build the world of a trial directory holding traj_data.json."""
+        with open(
+            os.path.join(trial_path, "traj_data.json"), "r", encoding="utf-8"
+        ) as f:
+            return cls(json.load(f))
+
+    # World construction
+
+    def _build_receptacles(self, high_pddl: List[Dict[str, Any]]):
+        types = set(ROOM_RECEPTACLES[self.room])
+        for step in high_pddl:
+            discrete = step.get("discrete_action", {})
+            planner = step.get("planner_action", {})
+            if discrete.get("action") == "GotoLocation" and discrete.get("args"):
+                types.add(type_name(discrete["args"][0]))
+            receptacle = planner.get("coordinateReceptacleObjectId")
+            if receptacle:
+                types.add(type_name(receptacle[0]))
+        for key in ("parent_target", "toggle_target"):
+            if self.params.get(key):
+                types.add(type_name(self.params[key]))
+        for process, appliances in PROCESSES.items():
+            if process in self.task_type and not types & set(appliances):
+                types.add(appliances[0])
+
+        # Movable receptacles are objects, not fixed furniture
+        types -= {type_name(self.params.get("mrecep_target") or "")}
+        self.receptacles = sorted(f"{name} 1" for name in types if name)
+        for receptacle in self.receptacles:
+            self.contents[receptacle] = []
+
+    def _build_objects(
+        self, object_poses: List[Dict[str, Any]], high_pddl: List[Dict[str, Any]]
+    ):
+        counts: Dict[str, int] = {}
+        unplaced: Dict[str, List[str]] = {}
+        source_names = sorted(pose["objectName"] for pose in object_poses)
+
+        def new_object(object_type: str) -> str:
+            counts[object_type] = counts.get(object_type, 0) + 1
+            name = f"{object_type} {counts[object_type]}"
+            self.object_types[name] = object_type
+            unplaced.setdefault(object_type, []).append(name)
+            return name
+
+        for source_name in source_names:
+            new_object(type_name(source_name))
+
+        # Objects the expert plan picks up start where the plan finds them
+        for step in high_pddl:
+            planner = step.get("planner_action", {})
+            if planner.get("action") != "PickupObject":
+                continue
+            object_type = type_name(planner.get("objectId", ""))
+            receptacle = planner.get("coordinateReceptacleObjectId")
+            if not object_type or not receptacle:
+                continue
+            if not unplaced.get(object_type):
+                new_object(object_type)
+            name = unplaced[object_type].pop(0)
+            self.contents[self._receptacle_of_type(type_name(receptacle[0]))].append(
+                name
+            )
+
+        # Make sure the task's own objects exist even if the poses omit them
+        for key in ("object_target", "mrecep_target"):
+            object_type = type_name(self.params.get(key) or "")
+            if object_type and object_type not in counts:
+                new_object(object_type)
+
+        surfaces = [
+            receptacle
+            for receptacle in self.receptacles
+            if type_name(receptacle.split()[0]) not in LIGHTS
+        ]
+        # Objects the task moves never start in the goal receptacle, or the
+        # goal could hold before the agent acts
+        goal_types = {
+            type_name(self.params.get(key) or "")
+            for key in ("object_target", "mrecep_target")
+        }
+        parent = type_name(self.params.get("parent_target") or "")
+        off_goal = [
+            receptacle
+            for receptacle in surfaces
+            if receptacle.rsplit(" ", 1)[0] != parent
+        ]
+        for object_type, names in unplaced.items():
+            candidates = surfaces
+            if object_type in goal_types and off_goal:
+                candidates = off_goal
+            for name in names:
+                surface = candidates[_stable_index(name, len(candidates))]
+                self.contents[surface].append(name)
+
+        for name, object_type in self.object_types.items():
+            if object_type in MOVABLE_RECEPTACLES:
+                self.contents.setdefault(name, [])
+        for receptacle in self.contents:
+            self.contents[receptacle].sort()
+
+    def _receptacle_of_type(self, receptacle_type: str) -> str:
+        name = f"{receptacle_type} 1"
+        if name not in self.contents:
+            self.receptacles.append(name)
+            self.receptacles.sort()
+            self.contents[name] = []
+        return name
+
+    # Name resolution
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        text = ARTICLES.sub(" ", text.lower())
+        return " ".join(re.sub(r"[^a-z0-9 ]", " ", text).split())
+
+    def _resolve(self, text: str, candidates: List[str]) -> Optional[str]:
+        """Match a phrase such as "the apple" or "counter top" to an entity."""
+        phrase = self._normalize(text)
+        if not phrase:
+            return None
+        if phrase in candidates:
+            return phrase
+
+        number = None
+        match = re.match(r"^(.*?) (\d+)$", phrase)
+        if match:
+            phrase, number = match.group(1), match.group(2)
+        compact = phrase.replace(" ", "")
+        wanted = ALIASES.get(compact, compact)
+
+        def entity_type(name: str) -> str:
+            return name.rsplit(" ", 1)[0]
+
+        matches = [name for name in candidates if entity_type(name) == wanted]
+        if not matches:
+            matches = [
+                name
+                for name in candidates
+                if wanted in entity_type(name) or entity_type(name) in wanted
+            ]
+        if number is not None:
+            matches = [name for name in matches if name.endswith(f" {number}")]
+        if not matches:
+            return None
+
+        # Prefer what the agent is holding or can see, then what it can reach
+        visible = self._visible_objects()
+        for name in matches:
+            if name == self.holding or name in visible:
+                return name
+        for name in matches:
+            if self._reachable(name) is not None:
+                return name
+        return matches[0]
+
+    def _visible_objects(self) -> List[str]:
+        if self.location is None or not self._is_open(self.location):
+            return []
+        visible = []
+        for name in self.contents.get(self.location, []):
+            visible.append(name)
+            visible.extend(self.contents.get(name, []))
+        return visible
+
+    def _is_open(self, receptacle: str) -> bool:
+        return receptacle.split()[0] not in OPENABLE or receptacle in self.opened
+
+    def _where(self, name: str) -> Optional[str]:
+        for container, names in self.contents.items():
+            if name in names:
+                return container
+        return None
+
+    def _reachable(self, name: str) -> Optional[str]:
+        """Open receptacle an object lies in or on (possibly inside a bowl or mug)."""
+        container = self._where(name)
+        if container is not None and container not in self.receptacles:
+            container = self._where(container)
+        if container is None or not self._is_open(container):
+            return None
+        return container
+
+    def _approach(self, receptacle: str) -> str:
+        """
+        Walk to a receptacle an action names.
+
+        The agents act on receptacles directly ("open fridge", "use
+        microwave"), so going there first is implied.
+
+        Returns:
+            The arrival message, empty if the agent is already there
+        """
+        if receptacle == self.location:
+            return ""
+        self.location = receptacle
+        return f"You arrive at {receptacle}. "
+
+    # Observations
+
+    def _describe_location(self) -> str:
+        return self._describe_receptacle(self.location)
+
+    def _describe_receptacle(self, receptacle: str) -> str:
+        if not self._is_open(receptacle):
+            return f"The {receptacle} is closed."
+        preposition = "In" if receptacle.split()[0] in OPENABLE else "On"
+        names = self.contents[receptacle]
+        if not names:
+            return f"{preposition} the {receptacle}, you see nothing."
+        return f"{preposition} the {receptacle}, you see {_listing(names)}."
+
+    def describe(self) -> str:
+        """
+        Describe the room as the agent finds it before acting.
+
+        This is the environment description given to the agents, so they plan
+        against the same world their actions are executed and graded in.
+        Closed receptacles do not reveal their contents.
+        """
+        lines = [
+            f"You are in the middle of a {self.room}. Looking quickly around "
+            f"you, you see {_listing(self.receptacles)}."
+        ]
+        lines.extend(
+            self._describe_receptacle(receptacle) for receptacle in self.receptacles
+        )
+        return "\n".join(lines)
+
+    def _look(self) -> str:
+        if self.location is None:
+            return (
+                f"You are in the middle of a {self.room}. Looking quickly around "
+                f"you, you see {_listing(self.receptacles)}."
+            )
+        return f"You are facing the {self.location}. {self._describe_location()}"
+
+    def step(self, action: str) -> str:
+        """
+        Execute an action and return the observation.
+
+        Args:
+            action: Free-text action such as "go to fridge 1", "move to kitchen"
+                or "take apple"
+
+        Returns:
+            The observation, prefixed with "Observation: " like the LLM observer
+        """
+        self.last_action_failed = False
+        return f"Observation: {self._step(action)}"
+
+    def _step(self, action: str) -> str:
+        text = action.strip().lower().rstrip(".")
+        verb, _, rest = text.partition(" ")
+
+        if text in ("look", "look around") or verb == "examine" and not rest:
+            return self._look()
+        if verb == "look" and rest.startswith("at "):
+            return self._examine(rest[len("at ") :])
+        if text == "inventory":
+            if self.holding is None:
+                return "You are not carrying anything."
+            return f"You are carrying: a {self.holding}."
+
+        if verb in ("go", "move", "walk", "navigate"):
+            return self._go(re.sub(r"^(to|towards)\s+", "", rest))
+        if verb in ("take", "pick", "grab", "get"):
+            return self._take(re.sub(r"^up\s+", "", rest))
+        if verb in ("put", "place"):
+            return self._put(rest)
+        if verb in ("open", "close"):
+            return self._open(rest, verb == "open")
+        if verb in PROCESSES:
+            return self._process(verb, rest)
+        if verb in ("use", "toggle", "turn", "switch"):
+            return self._use(re.sub(r"^(on|off)\s+", "", rest))
+        if verb == "examine":
+            return self._examine(rest)
+        return self._fail("Nothing happens.")
+
+    def _fail(self, message: str) -> str:
+        # The action was not possible, the world is unchanged
+        self.last_action_failed = True
+        return message
+
+    def _go(self, target: str) -> str:
+        if self._normalize(target) in ROOM_RECEPTACLES:
+            self.location = None
+            return self._look()
+        receptacle = self._resolve(target, self.receptacles)
+        if receptacle is None:
+            return self._fail("Nothing happens.")
+        self.location = receptacle
+        return f"You arrive at {receptacle}. {self._describe_location()}"
+
+    def _take(self, rest: str) -> str:
+        phrase = re.split(r"\s+from\s+", rest)[0]
+        if self.holding is not None:
+            return self._fail(f"You are already carrying the {self.holding}.")
+        name = self._resolve(phrase, list(self.object_types))
+        if name is None:
+            return self._fail("Nothing happens.")
+        receptacle = self._reachable(name)
+        if receptacle is None:
+            return self._fail(f"You do not see the {name} here.")
+        arrival = self._approach(receptacle)
+        self.contents[self._where(name)].remove(name)
+        self.holding = name
+        return f"{arrival}You pick up the {name} from the {receptacle}."
+
+    def _put(self, rest: str) -> str:
+        parts = re.split(r"\s+(?:in|on|into|onto|inside|in/on)\s+", rest, maxsplit=1)
+        if len(parts) != 2:
+            return self._fail("Nothing happens.")
+        if self.holding is None:
+            return self._fail("You are not carrying anything.")
+        name = self._resolve(parts[0], [self.holding])
+        if name is None:
+            return self._fail(
+                f"You are not carrying that. You are carrying the {self.holding}."
+            )
+
+        containers = [
+            container
+            for container in self.contents
+            if container not in self.receptacles
+            and self._reachable(container) is not None
+        ]
+        target = self._resolve(parts[1], self.receptacles + containers)
+        if target is None:
+            return self._fail("Nothing happens.")
+        receptacle = target if target in self.receptacles else self._where(target)
+        arrival = self._approach(receptacle)
+        if not self._is_open(target):
+            return self._fail(f"{arrival}The {target} is closed.")
+        self.contents[target].append(name)
+        self.holding = None
+        preposition = "in" if target.split()[0] in OPENABLE else "in/on"
+        return f"{arrival}You put the {name} {preposition} the {target}."
+
+    def _open(self, rest: str, opening: bool) -> str:
+        receptacle = self._resolve(rest, self.receptacles)
+        if receptacle is None or receptacle.split()[0] not in OPENABLE:
+            return self._fail("Nothing happens.")
+        arrival = self._approach(receptacle)
+        if opening:
+            self.opened.add(receptacle)
+            names = self.contents[receptacle]
+            inside = f" In it, you see {_listing(names)}." if names else ""
+            return (
+                f"{arrival}You open the {receptacle}. "
+                f"The {receptacle} is open.{inside}"
+            )
+        self.opened.discard(receptacle)
+        return f"{arrival}You close the {receptacle}."
+
+    def _process(self, process: str, rest: str) -> str:
+        phrase = re.split(r"\s+(?:with|in|using|at)\s+", rest)[0]
+        if self.holding is None:
+            return self._fail("You are not carrying anything.")
+        name = self._resolve(phrase, [self.holding])
+        if name is None:
+            return self._fail(
+                f"You are not carrying that. You are carrying the {self.holding}."
+            )
+        appliances = PROCESSES[process]
+        # "heat apple" uses the appliance at hand, or else the first in the room
+        candidates = [
+            receptacle
+            for receptacle in [self.location] + self.receptacles
+            if receptacle is not None and receptacle.split()[0] in appliances
+        ]
+        if not candidates:
+            places = " or ".join(appliances)
+            return self._fail(f"There is no {places} to {process} the {name}.")
+        arrival = self._approach(candidates[0])
+
+        state = {"heat": self.heated, "cool": self.cooled, "clean": self.cleaned}
+        state[process].add(name)
+        return f"{arrival}You {process} the {name} using the {self.location}."
+
+    def _use(self, rest: str) -> str:
+        receptacle = self._resolve(rest, self.receptacles)
+        if receptacle is None:
+            return self._fail("Nothing happens.")
+        arrival = self._approach(receptacle)
+        receptacle_type = receptacle.split()[0]
+        if receptacle_type in LIGHTS:
+            self.lights_on.add(receptacle)
+            return f"{arrival}You turn on the {receptacle}."
+        if receptacle_type in APPLIANCES and self.holding is not None:
+            return arrival + self._process(APPLIANCES[receptacle_type], self.holding)
+        return self._fail(f"{arrival}Nothing happens.")
+
+    def _examine(self, rest: str) -> str:
+        name = self._resolve(rest, list(self.object_types) + self.receptacles)
+        if name is None:
+            return self._fail("Nothing happens.")
+        if name in self.receptacles:
+            return self._approach(name) + self._describe_location()
+        arrival = ""
+        if name != self.holding:
+            receptacle = self._reachable(name)
+            if receptacle is None:
+                return self._fail(f"You do not see the {name} here.")
+            arrival = self._approach(receptacle)
+        states = [
+            label
+            for label, names in (
+                ("hot", self.heated),
+                ("cool", self.cooled),
+                ("clean", self.cleaned),
+            )
+            if name in names
+        ]
+        lit = any(light == self.location for light in self.lights_on)
+        description = f"This is a normal {name}."
+        if states:
+            description = f"This is a {' and '.join(states)} {name}."
+        if lit:
+            description += f" The {self.location} lights it up."
+        return arrival + description
+
+    def state(self) -> Dict[str, Any]:
+        """Snapshot of the world, e.g. for checking whether a goal was reached."""
+        return {
+            "location": self.location,
+            "holding": self.holding,
+            "contents": {name: list(names) for name, names in self.contents.items()},
+            "object_types": dict(self.object_types),
+            "opened": sorted(self.opened),
+            "heated": sorted(self.heated),
+            "cooled": sorted(self.cooled),
+            "cleaned": sorted(self.cleaned),
+            "lights_on": sorted(self.lights_on),
+        }
+
+
+def load_simulator(task: Dict[str, Any]) -> Optional[ALFWorldSimulator]:
+    """
+    Build the simulator of a task's first trial, if its trajectory is available.
+
+    Args:
+        task: Task dictionary from the catalog (with "trials" or "path")
+
+    Returns:
+        The simulator, or None if no trial has a readable traj_data.json
+    """
+    trials = task.get("trials")
+    if trials is None and task.get("path") and os.path.isdir(task["path"]):
+        trials = sorted(
+            entry.path for entry in os.scandir(task["path"]) if entry.is_dir()
+        )
+    for trial in trials or []:
+        try:
+            return ALFWorldSimulator.from_trial(trial)
+        except (OSError, ValueError):
+            continue
+    return None
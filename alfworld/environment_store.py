@@ -0,0 +1,128 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+
+DEFAULT_STORE_PATH = os.path.join("llm_cache", "alfworld_environments.sqlite")
+
+
+class EnvironmentStore:
+    """
+    Persistent store of generated ALFWorld environment descriptions.
+
+    A description only depends on the task and on the prompt that generated
+    it, so it is stored under the task name and the prompt version and reused
+    by every later run. Changing the prompt changes its version and therefore
+    regenerates the descriptions.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: Location of the SQLite file
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS descriptions (
+                task_name TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                description TEXT NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (task_name, prompt_version)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, task_name: str, prompt_version: str) -> Optional[str]:
+        """
+        Look up the description of a task.
+
+        Args:
+            task_name: Name of the task directory
+            prompt_version: Version of the prompt that generates descriptions
+
+        Returns:
+            The stored description or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT description FROM descriptions "
+                "WHERE task_name = ? AND prompt_version = ?",
+                (task_name, prompt_version),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def set(self, task_name: str, prompt_version: str, description: str):
+        """
+        Store the description of a task.
+
+        Args:
+            task_name: Name of the task directory
+            prompt_version: Version of the prompt that generated it
+            description: The generated description
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO descriptions "
+                "(task_name, prompt_version, description, created) VALUES (?, ?, ?, ?)",
+                (task_name, prompt_version, description, time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every stored description."""
+        with self._lock:
+            self._conn.execute("DELETE FROM descriptions")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of stored descriptions and hit/miss counters."""
+        with self._lock:
+            entries = self._conn.execute(
+                "SELECT COUNT(*) FROM descriptions"
+            ).fetchone()[0]
+
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+_default_stores: Dict[str, EnvironmentStore] = {}
+_default_stores_lock = threading.Lock()
+
+
+def get_default_environment_store() -> Optional[EnvironmentStore]:
+    """
+    Return the process-wide description store configured through the environment.
+
+    The store lives at llm_cache/alfworld_environments.sqlite unless
+    ALFWORLD_ENVIRONMENT_STORE names another file; setting it to an empty
+    string disables the store so every run generates fresh descriptions.
+
+    Returns:
+        The shared EnvironmentStore, or None if it is disabled
+    """
+    path = os.getenv("ALFWORLD_ENVIRONMENT_STORE", DEFAULT_STORE_PATH)
+    if not path:
+        return None
+
+    with _default_stores_lock:
+        if path not in _default_stores:
+            _default_stores[path] = EnvironmentStore(path)
+        return _default_stores[path]
@@ -0,0 +1,170 @@
+import os
+import json
+import hashlib
+from typing import Dict, Any, List, Optional
+
+# Journals live next to the saved evaluations unless EVAL_JOURNAL_DIR is set
+DEFAULT_JOURNAL_DIR = os.path.join("evaluation_history", "journals")
+
+
+def journal_path(eval_type: str, run_id: str) -> str:
+    """Location of the journal of a run."""
+    directory = os.getenv("EVAL_JOURNAL_DIR", DEFAULT_JOURNAL_DIR)
+    return os.path.join(directory, f"{eval_type}_{run_id}.jsonl")
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """Hash of the settings that affect an item's results."""
+    encoded = json.dumps(config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def item_key(item: Any) -> str:
+    """Identify an item (question, claim/label pair or task) by its content."""
+    encoded = json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def _read_records(path: str) -> List[Dict[str, Any]]:
+    records = []
+    # Binary, so a line torn inside a multi-byte character is skipped too
+    with open(path, "rb") as f:
+        for line in f.read().split(b"\n"):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line.decode("utf-8")))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                # A crash mid-write leaves a torn last line; the item is redone
+                continue
+    return records
+
+
+def journal_items(eval_type: str, run_id: str) -> Optional[List[Any]]:
+    """
+    Return the items a journaled run was started with.
+
+    Resuming with the same items (rather than a fresh random sample) is what
+    lets the finished ones be skipped.
+
+    Args:
+        eval_type: Type of evaluation (hotpotqa, fever, alfworld)
+        run_id: ID of the run
+
+    Returns:
+        The run's items, or None if there is no journal for it
+    """
+    path = journal_path(eval_type, run_id)
+    if not os.path.exists(path):
+        return None
+    for record in _read_records(path):
+        if record.get("type") == "header":
+            return record["items"]
+    return None
+
+
+class RunJournal:
+    """
+    Append-only JSONL journal of the items a run has completed.
+
+    The first line records the run, its items and any metadata needed to
+    evaluate them again (e.g. gold answers); every completed item is
+    appended (and fsynced) as soon as it finishes, so a crash loses at most
+    the items in flight. When a run is resumed, items already journaled under
+    the same configuration are reused instead of evaluated again. Later
+    entries for an item supersede earlier ones.
+    """
+
+    def __init__(
+        self,
+        eval_type: str,
+        run_id: str,
+        config: Dict[str, Any],
+        items: List[Any],
+        resume: bool = False,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Open the journal of a run.
+
+        Args:
+            eval_type: Type of evaluation (hotpotqa, fever, alfworld)
+            run_id: ID of the run
+            config: Settings that affect the results (agents, prompt versions, ...)
+            items: Items the run evaluates
+            resume: Whether to reuse items already in the journal; otherwise
+                an existing journal of the run is started over
+            metadata: Data the items are evaluated with; when resuming, the
+                metadata recorded by the run that started the journal is
+                kept in `metadata` instead
+        """
+        self.run_id = run_id
+        self.path = journal_path(eval_type, run_id)
+        self.config_hash = config_hash(config)
+        self.completed_items: Dict[str, Dict[str, Any]] = {}
+        self.metadata: Dict[str, Any] = dict(metadata or {})
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        if resume and os.path.exists(self.path):
+            for record in _read_records(self.path):
+                if record.get("type") == "header":
+                    self.metadata = record.get("metadata", self.metadata)
+                elif (
+                    record.get("type") == "item"
+                    and record.get("config_hash") == self.config_hash
+                ):
+                    self.completed_items[record["key"]] = record["results"]
+            # Terminate a torn last line so the next record starts cleanly
+            with open(self.path, "rb+") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._append(
+                {
+                    "type": "header",
+                    "run_id": run_id,
+                    "eval_type": eval_type,
+                    "config": config,
+                    "items": items,
+                    "metadata": self.metadata,
+                }
+            )
+
+    def completed(self, item: Any) -> Optional[Dict[str, Any]]:
+        """Results of an item finished under this configuration, if any."""
+        return self.completed_items.get(item_key(item))
+
+    def record(self, item: Any, results: Dict[str, Any]):
+        """
+        Durably append the results of a completed item.
+
+        Args:
+            item: The evaluated item
+            results: Its results, keyed by results key (e.g. "react_results")
+        """
+        key = item_key(item)
+        self.completed_items[key] = results
+        self._append(
+            {
+                "type": "item",
+                "key": key,
+                "config_hash": self.config_hash,
+                "results": results,
+            }
+        )
+
+    def _append(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
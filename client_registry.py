@@ -0,0 +1,317 @@
+import os
+import asyncio
+import hashlib
+import threading
+import importlib.util
+from typing import Dict, Any, Coroutine, List, Optional, Tuple
+import httpx
+from openai import AzureOpenAI, AsyncAzureOpenAI
+from telemetry import mark_headers
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def default_limits() -> httpx.Limits:
+    """Connection pool limits, overridable through the environment."""
+    max_connections = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_SECONDS", "120")),
+    )
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of pooled Azure OpenAI clients.
+
+    Clients are keyed by endpoint, API version and credentials so that every
+    Agent talking to the same resource shares one httpx connection pool.
+    Async clients are additionally keyed by event loop, since an httpx
+    AsyncClient cannot be used from a loop other than the one it was created on.
+    Evaluations therefore run their coroutines through run(), on one
+    long-lived event loop, so that warm keep-alive connections survive across
+    evaluation runs and Streamlit reruns. Clients created on any other loop are
+    closed when asyncio.run shuts that loop down.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[httpx.Limits] = None,
+        http2: Optional[bool] = None,
+        timeout: Optional[httpx.Timeout] = None,
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            limits: Connection pool limits shared by every client
+            http2: Whether to negotiate HTTP/2 (defaults to h2 availability)
+            timeout: Request timeout of the underlying HTTP clients
+        """
+        self.limits = limits or default_limits()
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self.timeout = timeout or httpx.Timeout(600.0, connect=10.0)
+        self._clients: Dict[Tuple, Any] = {}
+        self._request_counts: Dict[Tuple, int] = {}
+        self._lookups = 0
+        self._reuses = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(endpoint: str, api_key: str, api_version: str) -> Tuple[str, str, str]:
+        # Never keep the raw API key in the key, it shows up in pool statistics
+        key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+        return (endpoint, api_version, key_hash)
+
+    def _lookup(self, key: Tuple, factory) -> Any:
+        with self._lock:
+            self._lookups += 1
+            client = self._clients.get(key)
+            if client is not None:
+                self._reuses += 1
+                return client
+
+            client = factory(key)
+            self._clients[key] = client
+            self._request_counts[key] = 0
+            return client
+
+    def _count_request(self, key: Tuple):
+        with self._lock:
+            self._request_counts[key] = self._request_counts.get(key, 0) + 1
+
+    def get_client(
+        self, endpoint: str, api_key: str, api_version: str
+    ) -> AzureOpenAI:
+        """
+        Return the shared synchronous client for an Azure OpenAI resource.
+
+        Args:
+            endpoint: Azure OpenAI endpoint URL
+            api_key: API key of the resource
+            api_version: API version to request
+
+        Returns:
+            AzureOpenAI client backed by a pooled httpx.Client
+        """
+        key = ("sync",) + self._key(endpoint, api_key, api_version)
+
+        def factory(key):
+            http_client = httpx.Client(
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.timeout,
+                event_hooks={
+                    "request": [lambda request: self._count_request(key)],
+                    # Response hooks run once the headers arrive, before the body
+                    "response": [lambda response: mark_headers()],
+                },
+            )
+            return AzureOpenAI(
+                azure_endpoint=endpoint,
+                api_key=api_key,
+                api_version=api_version,
+                http_client=http_client,
+            )
+
+        return self._lookup(key, factory)
+
+    def get_async_client(
+        self, endpoint: str, api_key: str, api_version: str
+    ) -> AsyncAzureOpenAI:
+        """
+        Return the shared asynchronous client for the current event loop.
+
+        Args:
+            endpoint: Azure OpenAI endpoint URL
+            api_key: API key of the resource
+            api_version: API version to request
+
+        Returns:
+            AsyncAzureOpenAI client backed by a pooled httpx.AsyncClient
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        self._discard_closed_loops()
+        key = ("async", id(loop)) + self._key(endpoint, api_key, api_version)
+
+        def factory(key):
+            async def count_request(request):
+                self._count_request(key)
+
+            async def headers_received(response):
+                mark_headers()
+
+            http_client = httpx.AsyncClient(
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.timeout,
+                event_hooks={
+                    "request": [count_request],
+                    "response": [headers_received],
+                },
+            )
+            client = AsyncAzureOpenAI(
+                azure_endpoint=endpoint,
+                api_key=api_key,
+                api_version=api_version,
+                http_client=http_client,
+            )
+            client._registry_loop = loop
+            if loop is not None and loop is not self._loop:
+                loop.create_task(self._close_with_loop(key, client))
+            return client
+
+        return self._lookup(key, factory)
+
+    async def _close_with_loop(self, key: Tuple, client: AsyncAzureOpenAI):
+        """Close a client once asyncio.run cancels the tasks of its loop."""
+        try:
+            await asyncio.Event().wait()
+        finally:
+            with self._lock:
+                if self._clients.get(key) is client:
+                    del self._clients[key]
+                    self._request_counts.pop(key, None)
+            await client.close()
+
+    def _discard_closed_loops(self):
+        """Forget async clients whose loop was closed without cancelling tasks."""
+        with self._lock:
+            for key, client in list(self._clients.items()):
+                loop = getattr(client, "_registry_loop", None)
+                if loop is not None and loop.is_closed():
+                    del self._clients[key]
+                    self._request_counts.pop(key, None)
+
+    @staticmethod
+    def _connection_stats(client: Any) -> Dict[str, Any]:
+        """Inspect the httpcore pool behind a client, where it is exposed."""
+        http_client = getattr(client, "_client", None)
+        pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+        connections: List[Any] = list(getattr(pool, "connections", []) or [])
+        return {
+            "open_connections": len(connections),
+            "idle_connections": sum(
+                1 for connection in connections if connection.is_idle()
+            ),
+        }
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Report registry usage and the state of every connection pool.
+
+        Returns:
+            Dictionary with lookup/reuse counters and per-client pool statistics
+        """
+        with self._lock:
+            clients = list(self._clients.items())
+            stats = {
+                "lookups": self._lookups,
+                "reuses": self._reuses,
+                "http2": self.http2,
+                "max_connections": self.limits.max_connections,
+                "clients": [],
+            }
+            request_counts = dict(self._request_counts)
+
+        for key, client in clients:
+            # Key layout: (kind, [loop id,] endpoint, api version, key hash)
+            client_stats = {
+                "kind": key[0],
+                "endpoint": key[-3],
+                "api_version": key[-2],
+                "requests": request_counts.get(key, 0),
+            }
+            client_stats.update(self._connection_stats(client))
+            stats["clients"].append(client_stats)
+
+        return stats
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the long-lived event loop, starting its thread on first use."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="llm-event-loop", daemon=True
+                ).start()
+            return self._loop
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """
+        Run a coroutine on the registry's event loop and wait for its result.
+
+        Unlike asyncio.run, the loop outlives the call, so the async clients
+        created by one evaluation run are reused by the next. Context variables
+        (e.g. active usage trackers) are carried over to the coroutine.
+
+        Args:
+            coroutine: Coroutine to run
+
+        Returns:
+            The result of the coroutine
+
+        Raises:
+            RuntimeError: If called while an event loop is running in this thread
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coroutine.close()
+            raise RuntimeError("run() cannot be called from a running event loop")
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._event_loop())
+        try:
+            return future.result()
+        except BaseException:
+            # e.g. KeyboardInterrupt while waiting: stop the evaluation too
+            future.cancel()
+            raise
+
+    def close(self):
+        """Close the sync and shared-loop clients and forget every client."""
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+            self._request_counts.clear()
+            loop = self._loop
+
+        for key, client in clients:
+            if key[0] == "sync":
+                client.close()
+            elif loop is not None and client._registry_loop is loop:
+                asyncio.run_coroutine_threadsafe(client.close(), loop).result()
+
+
+_registry = ClientRegistry()
+
+
+def get_client(endpoint: str, api_key: str, api_version: str) -> AzureOpenAI:
+    """Return the process-wide synchronous client for an Azure OpenAI resource."""
+    return _registry.get_client(endpoint, api_key, api_version)
+
+
+def get_async_client(
+    endpoint: str, api_key: str, api_version: str
+) -> AsyncAzureOpenAI:
+    """Return the process-wide asynchronous client for the current event loop."""
+    return _registry.get_async_client(endpoint, api_key, api_version)
+
+
+def run_async(coroutine: Coroutine) -> Any:
+    """Run a coroutine on the process-wide event loop that keeps clients warm."""
+    return _registry.run(coroutine)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Return the statistics of the process-wide client registry."""
+    return _registry.pool_stats()
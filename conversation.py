@@ -0,0 +1,257 @@
+import os
+import re
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD = re.compile(r"\w+")
+
+# Words too common to say anything about an observation's relevance
+STOPWORDS = set(
+    "a an and are as at be by for from in is it of on or that the this to was "
+    "were what which who with".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, four characters per token."""
+    return len(text) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly `max_tokens` tokens, marking the cut."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + " [...]"
+
+
+def extractive_summary(text: str, query: str, max_tokens: int) -> str:
+    """
+    Condense an observation to the sentences most relevant to a query.
+
+    Sentences are scored by how many query words they share, the best ones are
+    kept within the token budget and returned in their original order. No
+    model call is made, so condensing is effectively free.
+
+    Args:
+        text: The observation to condense
+        query: Text describing what the agent is looking for
+        max_tokens: Token budget of the summary
+
+    Returns:
+        The condensed observation
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    query_words = {
+        word for word in WORD.findall(query.lower()) if word not in STOPWORDS
+    }
+    sentences = [
+        sentence.strip() for sentence in SENTENCE_SPLIT.split(text) if sentence.strip()
+    ]
+
+    # Prefer overlap with the query; on ties prefer earlier sentences, which
+    # usually carry the headline facts of an article or observation
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: (
+            -len(query_words & set(WORD.findall(sentences[i].lower()))),
+            i,
+        ),
+    )
+
+    chosen = []
+    used = 0
+    for i in ranked:
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost > max_tokens:
+            continue
+        chosen.append(i)
+        used += cost
+
+    if not chosen:
+        return truncate_to_tokens(text, max_tokens)
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+class ContextPolicy:
+    """
+    Bounds the prompt size of a ReAct conversation.
+
+    The last `keep_last` observations are sent verbatim (capped at
+    `max_observation_tokens`), older ones are replaced by extractive summaries
+    of at most `summary_tokens`. If the conversation still exceeds
+    `max_prompt_tokens`, the oldest observations are dropped entirely.
+    """
+
+    def __init__(
+        self,
+        keep_last: int = 2,
+        summary_tokens: int = 120,
+        max_observation_tokens: Optional[int] = 1500,
+        max_prompt_tokens: Optional[int] = None,
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            keep_last: Number of most recent observations kept verbatim
+            summary_tokens: Token budget of each condensed older observation
+            max_observation_tokens: Cap on any single verbatim observation
+            max_prompt_tokens: Budget of the whole conversation, if any
+        """
+        self.keep_last = keep_last
+        self.summary_tokens = summary_tokens
+        self.max_observation_tokens = max_observation_tokens
+        self.max_prompt_tokens = max_prompt_tokens
+
+
+def get_default_context_policy() -> Optional[ContextPolicy]:
+    """
+    Return the context policy configured through the environment.
+
+    Compression is enabled by setting REACT_KEEP_OBSERVATIONS;
+    REACT_SUMMARY_TOKENS, REACT_MAX_OBSERVATION_TOKENS and
+    REACT_MAX_PROMPT_TOKENS tune the budgets.
+
+    Returns:
+        The configured ContextPolicy, or None to send full transcripts
+    """
+    keep_last = os.getenv("REACT_KEEP_OBSERVATIONS")
+    if not keep_last:
+        return None
+
+    max_observation_tokens = os.getenv("REACT_MAX_OBSERVATION_TOKENS", "1500")
+    max_prompt_tokens = os.getenv("REACT_MAX_PROMPT_TOKENS")
+    return ContextPolicy(
+        keep_last=int(keep_last),
+        summary_tokens=int(os.getenv("REACT_SUMMARY_TOKENS", "120")),
+        max_observation_tokens=int(max_observation_tokens)
+        if max_observation_tokens
+        else None,
+        max_prompt_tokens=int(max_prompt_tokens) if max_prompt_tokens else None,
+    )
+
+
+class Conversation:
+    """
+    Chat transcript of a ReAct episode.
+
+    The static instructions go into a system message that stays identical
+    across rounds (so the service can prompt-cache it), followed by the task
+    and one assistant/observation turn pair per round. Each round only appends
+    its own step instead of rebuilding one ever-growing user message.
+
+    With a ContextPolicy, older observations are condensed so late rounds
+    send roughly as many tokens as early ones.
+    """
+
+    def __init__(
+        self, system_prompt: str, task: str, policy: Optional[ContextPolicy] = None
+    ):
+        """
+        Start a conversation.
+
+        Args:
+            system_prompt: Static instructions of the agent
+            task: The question, claim or task the agent has to solve
+            policy: Optional policy bounding the size of the transcript
+        """
+        self.system_prompt = system_prompt
+        self.task = task
+        self.policy = policy
+        self.steps: List[Tuple[str, str]] = []
+        # Condensed observations never change once made, which keeps the
+        # prefix of successive requests stable
+        self._summaries: Dict[int, str] = {}
+
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        """The full, uncompressed transcript."""
+        messages = self._head()
+        for assistant, observation in self.steps:
+            messages.append({"role": "assistant", "content": assistant})
+            messages.append({"role": "user", "content": observation})
+        return messages
+
+    def _head(self) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": self.task},
+        ]
+
+    def add_step(self, response: Dict[str, Any], observation: str):
+        """
+        Append one ReAct round.
+
+        Args:
+            response: The agent's parsed thought/action reply
+            observation: Result of executing the action
+        """
+        self.steps.append((json.dumps(response, ensure_ascii=False), observation))
+
+    @property
+    def rounds(self) -> int:
+        """Number of completed thought/action rounds."""
+        return len(self.steps)
+
+    def _summary(self, index: int) -> str:
+        if index not in self._summaries:
+            assistant, observation = self.steps[index]
+            condensed = extractive_summary(
+                observation,
+                f"{self.task} {assistant}",
+                self.policy.summary_tokens,
+            )
+            if condensed != observation:
+                condensed = f"[Earlier observation, condensed] {condensed}"
+            self._summaries[index] = condensed
+        return self._summaries[index]
+
+    def to_messages(self) -> List[Dict[str, str]]:
+        """
+        Messages to send for the next round, compressed according to the policy.
+
+        Returns:
+            A new list, unaffected by later rounds
+        """
+        if self.policy is None:
+            return self.messages
+
+        policy = self.policy
+        recent_from = len(self.steps) - policy.keep_last
+        observations = []
+        for index, (_, observation) in enumerate(self.steps):
+            if index < recent_from:
+                observations.append(self._summary(index))
+            elif policy.max_observation_tokens is not None:
+                observations.append(
+                    truncate_to_tokens(observation, policy.max_observation_tokens)
+                )
+            else:
+                observations.append(observation)
+
+        if policy.max_prompt_tokens is not None:
+            head_tokens = sum(
+                estimate_tokens(message["content"]) for message in self._head()
+            )
+            step_tokens = [
+                estimate_tokens(assistant) + estimate_tokens(observation)
+                for (assistant, _), observation in zip(self.steps, observations)
+            ]
+            total = head_tokens + sum(step_tokens)
+            # Oldest first; the most recent observation is always kept
+            for index in range(len(observations) - 1):
+                if total <= policy.max_prompt_tokens:
+                    break
+                total -= estimate_tokens(observations[index])
+                observations[index] = "[Earlier observation omitted]"
+                total += estimate_tokens(observations[index])
+
+        messages = self._head()
+        for (assistant, _), observation in zip(self.steps, observations):
+            messages.append({"role": "assistant", "content": assistant})
+            messages.append({"role": "user", "content": observation})
+        return messages
@@ -1,51 +1,20 @@
-import pandas as pd
-import random
-import json
+import asyncio
 import os
-from typing import List, Dict, Any, Tuple
-from Agent import Agent
-import re
+from typing import List, Dict, Any, Optional, Tuple
+from telemetry import track_usage, tracked_result
+from checkpoint import RunJournal
+from structured_output import response_json
+from Agent import AsyncAgent, PROMPT_VERSIONS
+from client_registry import run_async
 from wikipedia_tool import get_wikipedia_content
-
-
-def parse_json_from_response(response_text: str) -> Dict[str, Any]:
-    """
-    Extract JSON content from a string that might contain markdown code blocks or other text.
-
-    Args:
-        response_text (str): The response text that contains JSON data
-
-    Returns:
-        Dict[str, Any]: Parsed JSON data
-    """
-    # Check if the response is wrapped in ```json ``` tags
-    json_pattern = r"```json\s*(.*?)\s*```"
-    match = re.search(json_pattern, response_text, re.DOTALL)
-
-    if match:
-        # Extract the content inside the json code block
-        json_content = match.group(1)
-        print(json_content)
-        return json.loads(json_content)
-
-    # If not wrapped in code blocks, try parsing directly
-    try:
-        return json.loads(response_text)
-    except json.JSONDecodeError:
-        # If direct parsing fails, check if there's any JSON-like structure in the text
-        potential_json = re.search(r"(\{.*\})", response_text, re.DOTALL)
-        if potential_json:
-            return json.loads(potential_json.group(1))
-
-        raise ValueError(
-            f"Could not extract valid JSON from the response: {response_text[:100]}..."
-        )
+from fever.fever_index import FeverIndex
 
 
 class FeverEval:
     def __init__(self, dataset_path: str):
         self.dataset_path = dataset_path
         self.length = None
+        self.index = None
         self.claims = []
         self.react_claim_verification_pairs = []
         self.direct_claim_verification_pairs = []
@@ -63,7 +32,9 @@ class FeverEval:
 
     def load_fever_dataset(self):
         """
-        Load the FEVER dataset from a JSONL file.
+        Open the FEVER dataset through its line-offset index.
+
+        Only the index is read here; claims are read when sampled.
 
         Returns:
             String message indicating success
@@ -71,19 +42,15 @@ class FeverEval:
         if not os.path.exists(self.dataset_path):
             raise FileNotFoundError(f"Dataset file not found at {self.dataset_path}")
 
-        self.dataset = pd.read_json(self.dataset_path, lines=True)
-        print(
-            f"Successfully loaded {len(self.dataset)} claims from {self.dataset_path}"
-        )
-
-        # Extract both claims and labels
-        self.extracted_claims = self.dataset["claim"].tolist()
-        self.extracted_labels = self.dataset["label"].tolist()
-        self.length = len(self.extracted_claims)
+        self.index = FeverIndex(self.dataset_path)
+        print(f"Successfully loaded {len(self.index)} claims from {self.dataset_path}")
+        self.length = len(self.index)
 
         return f"Successfully loaded fever dataset of size {self.length} from {self.dataset_path}"
 
-    def get_claims(self, num_claims: int = 5) -> List[Tuple[str, str]]:
+    def get_claims(
+        self, num_claims: int = 5, stratified: bool = False
+    ) -> List[Tuple[str, str]]:
         """
         Get a specified number of claims from the dataset.
         If num_claims is 0, returns all claims.
@@ -91,40 +58,94 @@ class FeverEval:
 
         Args:
             num_claims (int): Number of claims to retrieve. 0 for all claims.
+            stratified (bool): Whether to spread the claims evenly over the labels
 
         Returns:
             List of tuples containing (claim, label)
         """
         if num_claims == 0:
-            return list(zip(self.extracted_claims, self.extracted_labels))
+            return list(self.index)
 
         elif num_claims > self.length:
             raise ValueError(
                 f"Requested number of claims exceeds dataset size ({self.length})"
             )
 
-        # Generate random indices to select both claims and labels at the same positions
-        indices = random.sample(range(self.length), num_claims)
-        selected_claims = [self.extracted_claims[i] for i in indices]
-        selected_labels = [self.extracted_labels[i] for i in indices]
+        if stratified:
+            return self.index.sample_stratified(num_claims)
+        return self.index.sample(num_claims)
+
+    def eval_claims(
+        self,
+        claims_with_labels: List[Tuple[str, str]],
+        use_react=True,
+        use_gpt4o=True,
+        use_o3mini=True,
+        concurrency: int = 1,
+        run_id: Optional[str] = None,
+        resume: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Evaluate the claims by running them through the agent and comparing to expected outcomes.
 
-        return list(zip(selected_claims, selected_labels))
+        Args:
+            claims_with_labels: List of tuples containing claim text and ground truth label
+            use_react: Whether to evaluate using the React agent
+            use_gpt4o: Whether to evaluate using the GPT-4o direct agent
+            use_o3mini: Whether to evaluate using the o3-mini direct agent
+            concurrency: Maximum number of claims evaluated in parallel
+            run_id: ID under which completed claims are journaled to disk
+            resume: Whether to skip claims the run has already completed
 
-    def eval_claims(self, claims_with_labels: List[Tuple[str, str]], use_react=True, use_gpt4o=True, use_o3mini=True) -> Dict[str, Any]:
+        Returns:
+            Dictionary with evaluation results
         """
-        Evaluate the claims by running them through the agent and comparing to expected outcomes.
+        return run_async(
+            self.eval_claims_async(
+                claims_with_labels,
+                use_react,
+                use_gpt4o,
+                use_o3mini,
+                concurrency,
+                run_id,
+                resume,
+            )
+        )
+
+    async def eval_claims_async(
+        self,
+        claims_with_labels: List[Tuple[str, str]],
+        use_react=True,
+        use_gpt4o=True,
+        use_o3mini=True,
+        concurrency: int = 1,
+        run_id: Optional[str] = None,
+        resume: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Evaluate the claims on the running event loop.
+
+        Up to `concurrency` claims are in flight at once. Results are merged in
+        input order once every claim has finished.
+
+        With a `run_id`, every finished claim is appended to the run's journal,
+        and `resume` reuses the claims the run already completed with the same
+        agents and prompts.
 
         Args:
             claims_with_labels: List of tuples containing claim text and ground truth label
             use_react: Whether to evaluate using the React agent
             use_gpt4o: Whether to evaluate using the GPT-4o direct agent
             use_o3mini: Whether to evaluate using the o3-mini direct agent
+            concurrency: Maximum number of claims evaluated in parallel
+            run_id: ID under which completed claims are journaled to disk
+            resume: Whether to skip claims the run has already completed
 
         Returns:
             Dictionary with evaluation results
         """
-        agent_gpt4o = Agent("gpt-4o")
-        agent_o3mini = Agent("o3-mini")
+        agent_gpt4o = AsyncAgent("gpt-4o")
+        agent_o3mini = AsyncAgent("o3-mini")
         self.evaluation_progress = {
             "current_claim": 0,
             "total_claims": len(claims_with_labels),
@@ -148,217 +169,263 @@ class FeverEval:
             },
             "evaluation_progress": self.evaluation_progress,
         }
-
-        for index, (claim, label) in enumerate(claims_with_labels):
-            print(f"\nEVALUATING CLAIM {index + 1}")
-            print(f"CLAIM: {claim}")
-            print(f"GROUND TRUTH: {label}\n")
-
-            # Update progress information
-            self.evaluation_progress["current_claim"] = index + 1
-            self.evaluation_progress["status"] = "evaluating"
-            evaluation_results["evaluation_progress"] = self.evaluation_progress
-
-            # Direct GPT-4o agent evaluation if selected
-            if use_gpt4o:
-                self.evaluation_progress["current_agent"] = "Direct Agent (GPT-4o)"
-                try:
-                    print("DIRECT GPT-4O AGENT EVALUATION:")
-                    raw_response = agent_gpt4o.fever_chat_direct(claim)
-                    direct_response = parse_json_from_response(
-                        raw_response["choices"][0]["message"]["content"]
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        journal = None
+        if run_id:
+            config = {
+                "use_react": use_react,
+                "use_gpt4o": use_gpt4o,
+                "use_o3mini": use_o3mini,
+                "prompt_versions": PROMPT_VERSIONS,
+            }
+            journal = RunJournal(
+                "fever", run_id, config, list(claims_with_labels), resume
+            )
+            print(f"JOURNALING RUN {run_id} TO {journal.path}")
+        resumed = 0
+
+        async def evaluate(index: int, claim: str, label: str) -> Dict[str, Any]:
+            nonlocal resumed
+            if journal is not None:
+                completed = journal.completed((claim, label))
+                if completed is not None:
+                    print(f"\nCLAIM {index + 1} ALREADY COMPLETED IN RUN {run_id}")
+                    resumed += 1
+                    return completed
+
+            async with semaphore:
+                item_result = await self._eval_claim(
+                    index,
+                    claim,
+                    label,
+                    agent_gpt4o,
+                    agent_o3mini,
+                    use_react,
+                    use_gpt4o,
+                    use_o3mini,
+                )
+            if journal is not None:
+                journal.record((claim, label), item_result)
+            return item_result
+
+        try:
+            with track_usage() as run_usage:
+                item_results = await asyncio.gather(
+                    *(
+                        evaluate(index, claim, label)
+                        for index, (claim, label) in enumerate(claims_with_labels)
                     )
+                )
+        finally:
+            if journal is not None:
+                journal.close()
+
+        for item_result in item_results:
+            for results_key, pair in item_result.items():
+                evaluation_results[results_key]["claim_verification_pairs"].append(
+                    pair
+                )
+                if pair["correct"]:
+                    evaluation_results[results_key]["correct_verifications"] += 1
+
+        evaluation_results["token_usage"] = {
+            agent_gpt4o.deployment: agent_gpt4o.usage_summary(),
+            agent_o3mini.deployment: agent_o3mini.usage_summary(),
+        }
+        evaluation_results["prompt_versions"] = dict(PROMPT_VERSIONS)
+        evaluation_results["telemetry"] = run_usage.summary()
+        if journal is not None:
+            evaluation_results["run_id"] = run_id
+            evaluation_results["resumed_items"] = resumed
 
-                    direct_verification = direct_response["verification"]
-                    direct_evidence = direct_response.get("evidence", "")
-                    print(f"DIRECT GPT-4O VERIFICATION: {direct_verification}")
-                    print(f"DIRECT GPT-4O EVIDENCE: {direct_evidence}\n")
+        return evaluation_results
 
-                    # Check if the verification matches the ground truth
-                    is_correct = (
-                        direct_verification.strip().upper() == label.strip().upper()
-                    )
-                    if is_correct:
-                        print("✅ DIRECT GPT-4O VERIFICATION: CORRECT")
-                        evaluation_results["direct_results"]["correct_verifications"] += 1
-                    else:
-                        print("❌ DIRECT GPT-4O VERIFICATION: INCORRECT")
-
-                    evaluation_results["direct_results"]["claim_verification_pairs"].append(
-                        {
-                            "claim": claim,
-                            "ground_truth": label,
-                            "verification": direct_verification,
-                            "evidence": direct_evidence,
-                            "correct": is_correct,
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error in direct GPT-4o agent: {e}")
-                    evaluation_results["direct_results"]["claim_verification_pairs"].append(
-                        {
-                            "claim": claim,
-                            "ground_truth": label,
-                            "verification": "ERROR",
-                            "evidence": str(e),
-                            "correct": False,
-                        }
-                    )
+    async def _eval_claim(
+        self,
+        index: int,
+        claim: str,
+        label: str,
+        agent_gpt4o: AsyncAgent,
+        agent_o3mini: AsyncAgent,
+        use_react: bool,
+        use_gpt4o: bool,
+        use_o3mini: bool,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Evaluate a single claim with every selected agent, concurrently.
 
-            # Direct o3-mini agent evaluation if selected
-            if use_o3mini:
-                self.evaluation_progress["current_agent"] = "Direct Agent (o3-mini)"
-                try:
-                    print("DIRECT O3-MINI AGENT EVALUATION:")
-                    raw_response = agent_o3mini.fever_chat_direct(claim)
-                    o3mini_response = parse_json_from_response(
-                        raw_response["choices"][0]["message"]["content"]
-                    )
+        Returns:
+            Mapping of results key (e.g. "react_results") to the claim-verification pair
+        """
+        print(f"\nEVALUATING CLAIM {index + 1}")
+        print(f"CLAIM: {claim}")
+        print(f"GROUND TRUTH: {label}\n")
+
+        # Update progress information
+        self.evaluation_progress["current_claim"] = index + 1
+        self.evaluation_progress["status"] = "evaluating"
+
+        # The strategies share nothing but the claim, so they run
+        # concurrently and the item takes as long as the slowest of them
+        strategies = {}
+        agent_names = []
+
+        # Direct GPT-4o agent evaluation if selected
+        if use_gpt4o:
+            agent_names.append("Direct Agent (GPT-4o)")
+            strategies["direct_results"] = self._eval_direct(
+                claim, label, agent_gpt4o, "DIRECT GPT-4O"
+            )
 
-                    o3mini_verification = o3mini_response["verification"]
-                    o3mini_evidence = o3mini_response.get("evidence", "")
-                    print(f"DIRECT O3-MINI VERIFICATION: {o3mini_verification}")
-                    print(f"DIRECT O3-MINI EVIDENCE: {o3mini_evidence}\n")
+        # Direct o3-mini agent evaluation if selected
+        if use_o3mini:
+            agent_names.append("Direct Agent (o3-mini)")
+            strategies["o3mini_results"] = self._eval_direct(
+                claim, label, agent_o3mini, "DIRECT O3-MINI"
+            )
 
-                    # Check if the verification matches the ground truth
-                    is_correct = (
-                        o3mini_verification.strip().upper() == label.strip().upper()
-                    )
-                    if is_correct:
-                        print("✅ DIRECT O3-MINI VERIFICATION: CORRECT")
-                        evaluation_results["o3mini_results"]["correct_verifications"] += 1
-                    else:
-                        print("❌ DIRECT O3-MINI VERIFICATION: INCORRECT")
-
-                    evaluation_results["o3mini_results"]["claim_verification_pairs"].append(
-                        {
-                            "claim": claim,
-                            "ground_truth": label,
-                            "verification": o3mini_verification,
-                            "evidence": o3mini_evidence,
-                            "correct": is_correct,
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error in direct o3-mini agent: {e}")
-                    evaluation_results["o3mini_results"]["claim_verification_pairs"].append(
-                        {
-                            "claim": claim,
-                            "ground_truth": label,
-                            "verification": "ERROR",
-                            "evidence": str(e),
-                            "correct": False,
-                        }
-                    )
+        # React agent evaluation (using GPT-4o) if selected
+        if use_react:
+            agent_names.append("React Agent")
+            strategies["react_results"] = self._eval_react(
+                index, claim, label, agent_gpt4o
+            )
 
-            # React agent evaluation (using GPT-4o) if selected
-            if use_react:
-                self.evaluation_progress["current_agent"] = "React Agent"
-                print("\nREACT AGENT EVALUATION:")
-                message = claim
-                react_verification_result = None
-
-                for num in range(1, 8):
-                    # Update thinking round for UI feedback
-                    self.evaluation_progress["thinking_round"] = num
-
-                    try:
-                        raw_response = agent_gpt4o.fever_chat_react(message)
-                        raw_response = raw_response["choices"][0]["message"]["content"]
-                        print("PARSING RESPONSE")
-                        response = parse_json_from_response(raw_response)
-
-                        if "thinking" in response.keys():
-                            print(f"THINKING ROUND {num}: {response['thinking']}")
-                            action = response["action"]
-                            print(f"ACTION ROUND {num} : {action}\n")
-
-                            # Check if action starts with "retrieve:" or "search:"
-                            if action.startswith("retrieve:"):
-                                entity = action.split("retrieve:")[1].strip()
-                                print(f"RETRIEVING FROM WIKIPEDIA: {entity}")
-                                wiki_content = get_wikipedia_content(entity)
-                                message = f"{message}\n{response}\nWikipedia content about {entity}:\n{wiki_content}"
-                            elif action.startswith("search:"):
-                                query = action.split("search:")[1].strip()
-                                print(f"SEARCHING: {query}")
-                                search_result = agent_gpt4o.answering_agent(query)
-                                message = f"{message}\n{response}\nSearch result for {query}:\n{search_result}"
-                            else:
-                                # Handle invalid action format
-                                print(f"INVALID ACTION FORMAT: {action}")
-                                message = f"{message}\n{response}\nError: Invalid action format. Please use 'retrieve:' or 'search:'."
-                            continue
-
-                        elif "verification" in response.keys():
-                            verification = response["verification"]
-                            evidence = response.get("evidence", "")
-                            print(f"\nVERIFICATION: {verification}")
-                            print(f"EVIDENCE: {evidence}\n")
-
-                            # Check if the verification matches the ground truth
-                            is_correct = (
-                                verification.strip().upper() == label.strip().upper()
-                            )
-                            if is_correct:
-                                print("✅ REACT VERIFICATION: CORRECT")
-                                evaluation_results["react_results"][
-                                    "correct_verifications"
-                                ] += 1
-                            else:
-                                print("❌ REACT VERIFICATION: INCORRECT")
-
-                            evaluation_results["react_results"][
-                                "claim_verification_pairs"
-                            ].append(
-                                {
-                                    "claim": claim,
-                                    "ground_truth": label,
-                                    "verification": verification,
-                                    "evidence": evidence,
-                                    "correct": is_correct,
-                                }
-                            )
-
-                            # Update progress information - completed
-                            self.evaluation_progress["status"] = "completed"
-                            evaluation_results["evaluation_progress"] = (
-                                self.evaluation_progress
-                            )
-                            react_verification_result = True
-                            break
-
-                    except Exception as e:
-                        print(f"Error processing claim {index + 1} with React agent: {e}")
-                        evaluation_results["react_results"][
-                            "claim_verification_pairs"
-                        ].append(
-                            {
-                                "claim": claim,
-                                "ground_truth": label,
-                                "verification": "ERROR",
-                                "evidence": str(e),
-                                "correct": False,
-                            }
+        self.evaluation_progress["current_agent"] = ", ".join(agent_names)
+        results = await asyncio.gather(
+            *(tracked_result(strategy) for strategy in strategies.values())
+        )
+        item_results = dict(zip(strategies, results))
+
+        return item_results
+
+    async def _eval_direct(
+        self, claim: str, label: str, agent: AsyncAgent, name: str
+    ) -> Dict[str, Any]:
+        """Verify a claim with a direct agent and compare it to the ground truth."""
+        try:
+            raw_response = await agent.fever_chat_direct(claim)
+            direct_response = response_json(raw_response)
+
+            direct_verification = direct_response["verification"]
+            direct_evidence = direct_response.get("evidence", "")
+            print(f"{name} VERIFICATION: {direct_verification}")
+            print(f"{name} EVIDENCE: {direct_evidence}\n")
+
+            # Check if the verification matches the ground truth
+            is_correct = direct_verification.strip().upper() == label.strip().upper()
+            if is_correct:
+                print(f"✅ {name} VERIFICATION: CORRECT")
+            else:
+                print(f"❌ {name} VERIFICATION: INCORRECT")
+
+            return {
+                "claim": claim,
+                "ground_truth": label,
+                "verification": direct_verification,
+                "evidence": direct_evidence,
+                "correct": is_correct,
+            }
+        except Exception as e:
+            print(f"Error in {name.lower()} agent: {e}")
+            return {
+                "claim": claim,
+                "ground_truth": label,
+                "verification": "ERROR",
+                "evidence": str(e),
+                "correct": False,
+            }
+
+    async def _eval_react(
+        self, index: int, claim: str, label: str, agent_gpt4o: AsyncAgent
+    ) -> Dict[str, Any]:
+        """Run the ReAct loop for a claim and compare the verification to the ground truth."""
+        conversation = agent_gpt4o.fever_conversation(claim)
+
+        for num in range(1, 8):
+            # Update thinking round for UI feedback
+            self.evaluation_progress["thinking_round"] = num
+
+            try:
+                raw_response = await agent_gpt4o.fever_chat_react(conversation)
+                print("PARSING RESPONSE")
+                response = response_json(raw_response)
+
+                if "thinking" in response.keys():
+                    print(f"THINKING ROUND {num}: {response['thinking']}")
+                    action = response["action"]
+                    print(f"ACTION ROUND {num} : {action}\n")
+
+                    # Check if action starts with "retrieve:" or "search:"
+                    if action.startswith("retrieve:"):
+                        entity = action.split("retrieve:")[1].strip()
+                        print(f"RETRIEVING FROM WIKIPEDIA: {entity}")
+                        # The Wikipedia lookup is blocking, keep it off the event loop
+                        wiki_content = await asyncio.to_thread(
+                            get_wikipedia_content, entity
                         )
-                        self.evaluation_progress["status"] = "error"
-                        evaluation_results["evaluation_progress"] = self.evaluation_progress
-                        react_verification_result = False
-                        break
-
-                # If we went through all rounds without getting a verification
-                if react_verification_result is None:
-                    print("❌ No verification produced after maximum rounds")
-                    self.evaluation_progress["status"] = "failed"
-                    evaluation_results["evaluation_progress"] = self.evaluation_progress
-                    evaluation_results["react_results"]["claim_verification_pairs"].append(
-                        {
-                            "claim": claim,
-                            "ground_truth": label,
-                            "verification": "No verification produced after maximum rounds",
-                            "evidence": "",
-                            "correct": False,
-                        }
-                    )
+                        conversation.add_step(
+                            response,
+                            f"Wikipedia content about {entity}:\n{wiki_content}",
+                        )
+                    elif action.startswith("search:"):
+                        query = action.split("search:")[1].strip()
+                        print(f"SEARCHING: {query}")
+                        search_result = await agent_gpt4o.answering_agent(query)
+                        conversation.add_step(
+                            response, f"Search result for {query}:\n{search_result}"
+                        )
+                    else:
+                        # Handle invalid action format
+                        print(f"INVALID ACTION FORMAT: {action}")
+                        conversation.add_step(
+                            response,
+                            "Error: Invalid action format. Please use 'retrieve:' or 'search:'.",
+                        )
+                    continue
 
-        return evaluation_results
+                elif "verification" in response.keys():
+                    verification = response["verification"]
+                    evidence = response.get("evidence", "")
+                    print(f"\nVERIFICATION: {verification}")
+                    print(f"EVIDENCE: {evidence}\n")
+
+                    # Check if the verification matches the ground truth
+                    is_correct = verification.strip().upper() == label.strip().upper()
+                    if is_correct:
+                        print("✅ REACT VERIFICATION: CORRECT")
+                    else:
+                        print("❌ REACT VERIFICATION: INCORRECT")
+
+                    # Update progress information - completed
+                    self.evaluation_progress["status"] = "completed"
+                    return {
+                        "claim": claim,
+                        "ground_truth": label,
+                        "verification": verification,
+                        "evidence": evidence,
+                        "correct": is_correct,
+                    }
+
+            except Exception as e:
+                print(f"Error processing claim {index + 1} with React agent: {e}")
+                self.evaluation_progress["status"] = "error"
+                return {
+                    "claim": claim,
+                    "ground_truth": label,
+                    "verification": "ERROR",
+                    "evidence": str(e),
+                    "correct": False,
+                }
+
+        # If we went through all rounds without getting a verification
+        print("❌ No verification produced after maximum rounds")
+        self.evaluation_progress["status"] = "failed"
+        return {
+            "claim": claim,
+            "ground_truth": label,
+            "verification": "No verification produced after maximum rounds",
+            "evidence": "",
+            "correct": False,
+        }
@@ -0,0 +1,172 @@
+import os
+import json
+import mmap
+import random
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+INDEX_VERSION = 1
+
+
+class FeverIndex:
+    """
+    Memory-mapped line-offset index of a FEVER JSONL file.
+
+    The first load reads the dataset once and writes `<dataset>.idx`: a JSON
+    header followed by the byte offset of every line, grouped by label. Later
+    loads map the index instead of reading it, and sampling seeks to the
+    chosen lines only, so drawing k claims costs O(k) whatever the size of the
+    dataset. The index is rebuilt when the dataset's size or modification
+    time changes.
+    """
+
+    def __init__(self, dataset_path: str, index_path: Optional[str] = None):
+        """
+        Open the index of a dataset, building it if needed.
+
+        Args:
+            dataset_path: Path of the FEVER JSONL file
+            index_path: Where to keep the index (defaults to `<dataset>.idx`)
+        """
+        self.dataset_path = dataset_path
+        self.index_path = index_path or dataset_path + ".idx"
+        # Label -> (first position, number of lines) in the offsets
+        self.label_ranges: Dict[str, Tuple[int, int]] = {}
+        self.offsets = array("Q")
+
+        stat = os.stat(dataset_path)
+        self._signature = {
+            "version": INDEX_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        if not self._load():
+            self._build()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def labels(self) -> List[str]:
+        return list(self.label_ranges)
+
+    def _load(self) -> bool:
+        try:
+            with open(self.index_path, "rb") as f:
+                header = json.loads(f.readline())
+                if header["signature"] != self._signature:
+                    return False
+                data_start = f.tell()
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, KeyError):
+            return False
+
+        count = header["count"]
+        if len(self._mmap) - data_start != 8 * count:
+            return False
+        self.offsets = memoryview(self._mmap)[data_start:].cast("Q")
+        self.label_ranges = {
+            label: tuple(label_range)
+            for label, label_range in header["label_ranges"].items()
+        }
+        return True
+
+    def _build(self):
+        print(f"INDEXING {self.dataset_path}")
+        by_label: Dict[str, array] = {}
+        with open(self.dataset_path, "rb") as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    label = json.loads(line)["label"]
+                    by_label.setdefault(label, array("Q")).append(offset)
+                offset += len(line)
+
+        position = 0
+        for label, offsets in by_label.items():
+            self.label_ranges[label] = (position, len(offsets))
+            self.offsets.extend(offsets)
+            position += len(offsets)
+
+        header = {
+            "signature": self._signature,
+            "count": len(self.offsets),
+            "label_ranges": self.label_ranges,
+        }
+        try:
+            with open(self.index_path, "wb") as f:
+                encoded = json.dumps(header).encode("utf-8")
+                # Pad the header so the offsets start 8-byte aligned
+                padding = -(len(encoded) + 1) % 8
+                f.write(encoded + b" " * padding + b"\n")
+                f.write(self.offsets.tobytes())
+        except OSError as e:
+            # A read-only dataset directory only costs a rebuild next time
+            print(f"Could not write index {self.index_path}: {e}")
+
+    def read(self, positions: List[int]) -> List[Tuple[str, str]]:
+        """
+        Read the claims at the given index positions.
+
+        Args:
+            positions: Positions in the (label-grouped) index
+
+        Returns:
+            List of (claim, label) tuples, in the order requested
+        """
+        claims = []
+        with open(self.dataset_path, "rb") as f:
+            for position in positions:
+                f.seek(self.offsets[position])
+                record = json.loads(f.readline())
+                claims.append((record["claim"], record["label"]))
+        return claims
+
+    def sample(self, k: int) -> List[Tuple[str, str]]:
+        """Draw k claims uniformly at random."""
+        return self.read(random.sample(range(len(self)), k))
+
+    def sample_stratified(self, k: int) -> List[Tuple[str, str]]:
+        """
+        Draw k claims spread as evenly as possible over the labels.
+
+        Labels with too few claims contribute all of them and the remainder is
+        shared among the others.
+
+        Args:
+            k: Number of claims to draw
+
+        Returns:
+            List of (claim, label) tuples, shuffled
+        """
+        quotas = {label: 0 for label in self.label_ranges}
+        remaining = k
+        open_labels = [
+            label for label, (_, count) in self.label_ranges.items() if count > 0
+        ]
+        while remaining and open_labels:
+            share, extra = divmod(remaining, len(open_labels))
+            lucky = set(random.sample(open_labels, extra))
+            for label in list(open_labels):
+                _, count = self.label_ranges[label]
+                want = share + (label in lucky)
+                take = min(want, count - quotas[label])
+                quotas[label] += take
+                remaining -= take
+                if quotas[label] == count:
+                    open_labels.remove(label)
+
+        positions = []
+        for label, quota in quotas.items():
+            first, count = self.label_ranges[label]
+            positions.extend(first + i for i in random.sample(range(count), quota))
+        random.shuffle(positions)
+        return self.read(positions)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """Every (claim, label) in file order, read line by line."""
+        with open(self.dataset_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record["claim"], record["label"]
@@ -0,0 +1,171 @@
+import os
+import json
+import codecs
+from array import array
+from typing import Dict, Any, BinaryIO, Iterator, List, Optional, Tuple
+
+# Bytes read from the dataset at a time while indexing
+CHUNK_SIZE = 1024 * 1024
+SEPARATORS = " \t\r\n,["
+
+INDEX_VERSION = 1
+
+
+def iter_records(f: BinaryIO) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """
+    Stream the objects of a top-level JSON array with their byte ranges.
+
+    The file is read in chunks and each record is decoded on its own, so
+    memory use is bounded by the largest record rather than the file.
+
+    Args:
+        f: The dataset, opened in binary mode
+
+    Yields:
+        (start, end, record) for each object, with byte offsets into the file
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    position = 0
+    offset = 0
+    eof = False
+
+    while True:
+        while position < len(text) and text[position] in SEPARATORS:
+            position += 1
+            offset += 1
+        if position < len(text) and text[position] == "]":
+            return
+
+        record = None
+        if position < len(text):
+            try:
+                record, end = decoder.raw_decode(text, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+
+        if record is None:
+            # The next record is incomplete, read another chunk
+            if eof:
+                return
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            text = text[position:] + utf8.decode(chunk, final=eof)
+            position = 0
+            continue
+
+        size = len(text[position:end].encode("utf-8"))
+        yield offset, offset + size, record
+        offset += size
+        position = end
+
+
+class HotpotQAIndex:
+    """
+    Byte-offset index of a HotpotQA JSON file.
+
+    The first load streams the file once and writes a compact index (record
+    id and byte range of every entry) next to it. Later loads only read the
+    index, and fetching a record decodes just that record, so sampling a few
+    questions costs the same whatever the size of the dataset. The index is
+    rebuilt when the dataset's size or modification time changes.
+    """
+
+    def __init__(self, dataset_path: str, index_path: Optional[str] = None):
+        """
+        Open the index of a dataset, building it if needed.
+
+        Args:
+            dataset_path: Path of the HotpotQA JSON file
+            index_path: Where to keep the index (defaults to `<dataset>.idx`)
+        """
+        self.dataset_path = dataset_path
+        self.index_path = index_path or dataset_path + ".idx"
+        self.ids: List[str] = []
+        self.offsets = array("Q")
+        self._positions: Optional[Dict[str, int]] = None
+
+        stat = os.stat(dataset_path)
+        self._signature = {
+            "version": INDEX_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        if not self._load():
+            self._build()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _load(self) -> bool:
+        try:
+            with open(self.index_path, "rb") as f:
+                header = json.loads(f.readline())
+                if header["signature"] != self._signature:
+                    return False
+                offsets = array("Q")
+                offsets.frombytes(f.read())
+        except (OSError, ValueError, KeyError):
+            return False
+
+        if len(offsets) != 2 * len(header["ids"]):
+            return False
+        self.ids = header["ids"]
+        self.offsets = offsets
+        return True
+
+    def _build(self):
+        print(f"INDEXING {self.dataset_path}")
+        with open(self.dataset_path, "rb") as f:
+            for index, (start, end, record) in enumerate(iter_records(f)):
+                self.ids.append(str(record.get("_id", index)))
+                self.offsets.extend((start, end))
+
+        header = {"signature": self._signature, "ids": self.ids}
+        try:
+            with open(self.index_path, "wb") as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                f.write(self.offsets.tobytes())
+        except OSError as e:
+            # A read-only dataset directory only costs a rebuild next time
+            print(f"Could not write index {self.index_path}: {e}")
+
+    def byte_range(self, position: int) -> Tuple[int, int]:
+        """Byte range of the record at a position in the dataset."""
+        return self.offsets[2 * position], self.offsets[2 * position + 1]
+
+    def get(self, record_id: str) -> Dict[str, Any]:
+        """Decode the record with the given `_id`."""
+        if self._positions is None:
+            self._positions = {
+                item_id: position for position, item_id in enumerate(self.ids)
+            }
+        return self.read([self._positions[record_id]])[0]
+
+    def read(self, positions: List[int]) -> List[Dict[str, Any]]:
+        """
+        Decode the records at the given positions.
+
+        Args:
+            positions: Positions of the records in the dataset
+
+        Returns:
+            The records, in the order requested
+        """
+        records = []
+        with open(self.dataset_path, "rb") as f:
+            for position in positions:
+                start, end = self.byte_range(position)
+                f.seek(start)
+                records.append(json.loads(f.read(end - start)))
+        return records
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Decode every record, one at a time."""
+        with open(self.dataset_path, "rb") as f:
+            for position in range(len(self)):
+                start, end = self.byte_range(position)
+                f.seek(start)
+                yield json.loads(f.read(end - start))
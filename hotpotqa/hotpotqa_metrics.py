@@ -0,0 +1,135 @@
+import re
+import string
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+YES_NO = {"yes", "no"}
+
+# Grading outcomes of grade_answer
+VALID = "valid"
+INVALID = "invalid"
+AMBIGUOUS = "ambiguous"
+
+
+def normalize_answer(s: str) -> str:
+    """Lower text and remove punctuation, articles and extra whitespace."""
+
+    def remove_articles(text):
+        return re.sub(r"\b(a|an|the)\b", " ", text)
+
+    def white_space_fix(text):
+        return " ".join(text.split())
+
+    def remove_punc(text):
+        exclude = set(string.punctuation)
+        return "".join(ch for ch in text if ch not in exclude)
+
+    def lower(text):
+        return text.lower()
+
+    return white_space_fix(remove_articles(remove_punc(lower(s))))
+
+
+def f1_score(prediction: str, ground_truth: str) -> Tuple[float, float, float]:
+    """
+    Token-level F1 of a prediction against the gold answer (official HotpotQA metric).
+
+    Returns:
+        Tuple of (f1, precision, recall)
+    """
+    normalized_prediction = normalize_answer(prediction)
+    normalized_ground_truth = normalize_answer(ground_truth)
+    zero_metric = (0.0, 0.0, 0.0)
+
+    if (
+        normalized_prediction in ["yes", "no", "noanswer"]
+        and normalized_prediction != normalized_ground_truth
+    ):
+        return zero_metric
+    if (
+        normalized_ground_truth in ["yes", "no", "noanswer"]
+        and normalized_prediction != normalized_ground_truth
+    ):
+        return zero_metric
+
+    prediction_tokens = normalized_prediction.split()
+    ground_truth_tokens = normalized_ground_truth.split()
+    common = Counter(prediction_tokens) & Counter(ground_truth_tokens)
+    num_same = sum(common.values())
+    if num_same == 0:
+        return zero_metric
+
+    precision = 1.0 * num_same / len(prediction_tokens)
+    recall = 1.0 * num_same / len(ground_truth_tokens)
+    f1 = (2 * precision * recall) / (precision + recall)
+    return f1, precision, recall
+
+
+def exact_match_score(prediction: str, ground_truth: str) -> bool:
+    return normalize_answer(prediction) == normalize_answer(ground_truth)
+
+
+def _contains_tokens(haystack: List[str], needle: List[str]) -> bool:
+    """Whether `needle` occurs as a contiguous token sequence in `haystack`."""
+    if not needle:
+        return False
+    width = len(needle)
+    return any(
+        haystack[start : start + width] == needle
+        for start in range(len(haystack) - width + 1)
+    )
+
+
+def grade_answer(prediction: str, ground_truth: str) -> Dict[str, Any]:
+    """
+    Decide clear-cut answers locally and flag the rest for the LLM judge.
+
+    The agents answer in full sentences, so an answer is valid when it matches
+    the gold answer exactly or contains it verbatim (after normalization). It
+    is invalid only where a mismatch cannot be a paraphrase: the opposite
+    verdict on a yes/no question, or a different number where the gold answer
+    is a single number. Everything else, including answers sharing no token
+    with the gold answer (aliases such as "USA" for "United States"), is
+    ambiguous.
+
+    Args:
+        prediction: The agent's answer
+        ground_truth: The gold answer from the dataset
+
+    Returns:
+        Dictionary with the verdict ("valid", "invalid" or "ambiguous"), the
+        rule that decided it, and the exact-match and F1 scores
+    """
+    exact_match = exact_match_score(prediction, ground_truth)
+    f1, _, recall = f1_score(prediction, ground_truth)
+    scores = {"exact_match": exact_match, "f1": round(f1, 4)}
+
+    if exact_match:
+        return {"verdict": VALID, "rule": "exact_match", **scores}
+
+    prediction_tokens = normalize_answer(prediction).split()
+    ground_truth_tokens = normalize_answer(ground_truth).split()
+
+    if " ".join(ground_truth_tokens) in YES_NO:
+        # Long answers to yes/no questions lead with the verdict
+        leading = YES_NO & set(prediction_tokens[:3])
+        if leading == {ground_truth_tokens[0]}:
+            return {"verdict": VALID, "rule": "yes_no", **scores}
+        if len(leading) == 1:
+            return {"verdict": INVALID, "rule": "yes_no", **scores}
+        return {"verdict": AMBIGUOUS, "rule": "yes_no", **scores}
+
+    if _contains_tokens(prediction_tokens, ground_truth_tokens):
+        return {"verdict": VALID, "rule": "containment", **scores}
+
+    if recall == 0:
+        if len(ground_truth_tokens) == 1 and ground_truth_tokens[0].isdigit():
+            # Another number is wrong, but it may also be spelled out
+            # ("3" vs "three"), which is left to the judge
+            if any(token.isdigit() for token in prediction_tokens):
+                return {"verdict": INVALID, "rule": "numeric", **scores}
+            return {"verdict": AMBIGUOUS, "rule": "numeric", **scores}
+        # Aliases and abbreviations share no token with the gold answer
+        return {"verdict": AMBIGUOUS, "rule": "no_overlap", **scores}
+
+    return {"verdict": AMBIGUOUS, "rule": "partial_overlap", **scores}
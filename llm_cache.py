@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+
+# Parameters that change how a response is delivered but not what it contains
+NON_KEY_PARAMS = {"stream", "stream_options"}
+
+# Default temperature of the chat completions API when none is sent
+DEFAULT_TEMPERATURE = 1.0
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache of chat completion responses.
+
+    Responses are stored in a SQLite file keyed by a hash of the deployment,
+    the messages and the sampling parameters. The cache is bounded by the total
+    size of the stored responses and evicts the least recently used entries
+    first.
+
+    Requests sampled with temperature > 0 are not deterministic, so they are
+    only cached when `cache_sampled` is set.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join("llm_cache", "responses.sqlite"),
+        max_bytes: int = 256 * 1024 * 1024,
+        cache_sampled: bool = False,
+    ):
+        """
+        Initialize the response cache.
+
+        Args:
+            path: Location of the SQLite cache file
+            max_bytes: Maximum total size of the cached responses
+            cache_sampled: Whether to cache requests with temperature > 0
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.cache_sampled = cache_sampled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(completion_params: Dict[str, Any]) -> str:
+        """
+        Compute the cache key of a completion request.
+
+        Args:
+            completion_params: Keyword arguments for chat.completions.create
+
+        Returns:
+            Hex digest identifying the request
+        """
+        keyed_params = {
+            name: value
+            for name, value in completion_params.items()
+            if name not in NON_KEY_PARAMS
+        }
+        payload = json.dumps(keyed_params, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, completion_params: Dict[str, Any]) -> bool:
+        """Check whether a request may be served from the cache."""
+        temperature = completion_params.get("temperature", DEFAULT_TEMPERATURE)
+        return self.cache_sampled or temperature == 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response and mark it as recently used.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The cached response or None if it is not cached
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key: str, response: Dict[str, Any]):
+        """
+        Store a response, evicting least recently used entries if over budget.
+
+        Args:
+            key: Cache key from make_key
+            response: The completion response as a dictionary
+        """
+        payload = json.dumps(response, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, payload, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits its budget."""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        )
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count, stored size and hit/miss counters."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_default_caches: Dict[str, ResponseCache] = {}
+_default_caches_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """
+    Return the process-wide cache configured through the environment.
+
+    The cache is enabled by setting LLM_CACHE_DIR. LLM_CACHE_MAX_MB bounds its
+    size and LLM_CACHE_SAMPLED=1 opts in to caching requests with
+    temperature > 0. The agents sample at temperature 0.7 (o3-mini at the API
+    default of 1), so without LLM_CACHE_SAMPLED=1 their requests are never
+    cached.
+
+    Returns:
+        The shared ResponseCache, or None if caching is not configured
+    """
+    cache_dir = os.getenv("LLM_CACHE_DIR")
+    if not cache_dir:
+        return None
+
+    path = os.path.join(cache_dir, "responses.sqlite")
+    with _default_caches_lock:
+        if path not in _default_caches:
+            max_mb = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+            _default_caches[path] = ResponseCache(
+                path,
+                max_bytes=int(max_mb * 1024 * 1024),
+                cache_sampled=os.getenv("LLM_CACHE_SAMPLED", "0") == "1",
+            )
+        return _default_caches[path]
@@ -0,0 +1,277 @@
+import os
+import gzip
+import json
+import zlib
+import random
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Any, List, Optional, Tuple
+from llm_cache import ResponseCache
+
+PASSTHROUGH = "passthrough"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (PASSTHROUGH, RECORD, REPLAY)
+
+
+def parse_latency(spec: str):
+    """
+    Parse a replay latency specification.
+
+    Supported forms are "none", "recorded", "fixed:<seconds>" and
+    "uniform:<low>:<high>".
+
+    Returns:
+        Function mapping the recorded latency to the latency to simulate
+    """
+    parts = spec.split(":")
+    kind = parts[0]
+
+    if kind == "none":
+        return lambda recorded: 0.0
+    if kind == "recorded":
+        return lambda recorded: recorded
+    if kind == "fixed" and len(parts) == 2:
+        seconds = float(parts[1])
+        return lambda recorded: seconds
+    if kind == "uniform" and len(parts) == 3:
+        low, high = float(parts[1]), float(parts[2])
+        return lambda recorded: random.uniform(low, high)
+
+    raise ValueError(f"Unknown replay latency specification: {spec}")
+
+
+def read_cassette(path: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Read the interactions of a cassette, tolerating a truncated tail.
+
+    A cassette is a sequence of gzip members, one per interaction. If a run
+    was killed while appending, the last member is incomplete: the whole
+    lines it still holds are kept and the rest is dropped.
+
+    Args:
+        path: Path of the .jsonl.gz cassette
+
+    Returns:
+        The interactions in recording order, and whether the file ended
+        with complete members only
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    chunks = []
+    position = 0
+    complete = True
+    while position < len(data):
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            chunk = decompressor.decompress(data[position:])
+        except zlib.error:
+            complete = False
+            break
+        if not decompressor.eof:
+            complete = False
+            chunks.append(chunk[: chunk.rfind(b"\n") + 1])
+            break
+        chunks.append(chunk)
+        position = len(data) - len(decompressor.unused_data)
+
+    interactions = []
+    for line in b"".join(chunks).decode("utf-8", errors="replace").splitlines():
+        if not line.strip():
+            continue
+        try:
+            interactions.append(json.loads(line))
+        except ValueError:
+            complete = False
+    return interactions, complete
+
+
+def _write_members(path: str, lines: List[str], mode: str = "ab"):
+    """Write lines as one complete gzip member, then close the file."""
+    payload = "".join(line + "\n" for line in lines).encode("utf-8")
+    with open(path, mode) as f:
+        f.write(gzip.compress(payload))
+
+
+class CassetteTransport:
+    """
+    Record-and-replay layer underneath Agent.create_completion.
+
+    In record mode every request is sent as usual and the response is appended
+    to a gzip-compressed JSONL cassette together with its latency. In replay
+    mode responses are served from the cassette without any network access or
+    credentials, optionally sleeping for the recorded or a synthetic latency.
+    Passthrough mode does neither.
+
+    Identical requests are replayed in the order they were recorded; once a
+    request's recordings are used up the last one is repeated.
+    """
+
+    def __init__(
+        self,
+        mode: str = PASSTHROUGH,
+        cassette_path: Optional[str] = None,
+        latency: str = "none",
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            mode: One of "passthrough", "record" or "replay"
+            cassette_path: Path of the .jsonl.gz cassette (required unless passthrough)
+            latency: Replay latency specification, see parse_latency
+        """
+        if mode not in MODES:
+            raise ValueError(
+                f"Unknown transport mode '{mode}', expected one of {MODES}"
+            )
+        if mode != PASSTHROUGH and not cassette_path:
+            raise ValueError(f"A cassette path is required in {mode} mode")
+
+        self.mode = mode
+        self.cassette_path = cassette_path
+        self.latency = parse_latency(latency)
+        self.recorded = 0
+        self.replayed = 0
+        self._lock = threading.Lock()
+        self._checked = False
+        self._interactions: Dict[str, deque] = defaultdict(deque)
+        self._last: Dict[str, Dict[str, Any]] = {}
+
+        if mode == REPLAY:
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def _load(self):
+        if not os.path.exists(self.cassette_path):
+            raise FileNotFoundError(f"Cassette not found at {self.cassette_path}")
+
+        interactions, complete = read_cassette(self.cassette_path)
+        if not complete:
+            print(f"SKIPPED TRUNCATED TAIL OF {self.cassette_path}")
+        for interaction in interactions:
+            self._interactions[interaction["key"]].append(interaction)
+
+        print(
+            f"LOADED {sum(len(q) for q in self._interactions.values())} "
+            f"INTERACTIONS FROM {self.cassette_path}"
+        )
+
+    def replay(
+        self, completion_params: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], float]:
+        """
+        Serve a request from the cassette.
+
+        Args:
+            completion_params: Keyword arguments for chat.completions.create
+
+        Returns:
+            The recorded response and the latency to simulate in seconds
+        """
+        key = ResponseCache.make_key(completion_params)
+        with self._lock:
+            queue = self._interactions.get(key)
+            if queue:
+                interaction = queue.popleft()
+                self._last[key] = interaction
+            elif key in self._last:
+                interaction = self._last[key]
+            else:
+                raise LookupError(
+                    f"No recorded response for a {completion_params.get('model')} "
+                    f"request (key {key[:12]}) in {self.cassette_path}"
+                )
+            self.replayed += 1
+
+        return interaction["response"], self.latency(interaction["elapsed"])
+
+    def record(
+        self,
+        completion_params: Dict[str, Any],
+        response: Dict[str, Any],
+        elapsed: float,
+    ):
+        """
+        Append a request/response pair to the cassette.
+
+        Args:
+            completion_params: Keyword arguments for chat.completions.create
+            response: The completion response as a dictionary
+            elapsed: Wall time of the request in seconds
+        """
+        interaction = {
+            "key": ResponseCache.make_key(completion_params),
+            "model": completion_params.get("model"),
+            "elapsed": round(elapsed, 4),
+            "response": response,
+        }
+        line = json.dumps(interaction, ensure_ascii=False, separators=(",", ":"))
+
+        with self._lock:
+            if not self._checked:
+                self._prepare_cassette()
+                self._checked = True
+            # Every interaction is its own complete gzip member, so a run
+            # interrupted at any point leaves all earlier ones readable
+            _write_members(self.cassette_path, [line])
+            self.recorded += 1
+
+    def _prepare_cassette(self):
+        """Create the cassette directory and cut off a truncated tail."""
+        directory = os.path.dirname(self.cassette_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        if not os.path.exists(self.cassette_path):
+            return
+
+        interactions, complete = read_cassette(self.cassette_path)
+        if complete:
+            return
+        # Appending after a broken member would hide every later interaction,
+        # so rewrite the readable ones before recording more
+        print(f"REPAIRING TRUNCATED CASSETTE {self.cassette_path}")
+        temporary_path = self.cassette_path + ".tmp"
+        _write_members(
+            temporary_path,
+            [
+                json.dumps(interaction, ensure_ascii=False, separators=(",", ":"))
+                for interaction in interactions
+            ],
+            mode="wb",
+        )
+        os.replace(temporary_path, self.cassette_path)
+
+    def close(self):
+        """Nothing to finish: every interaction is written as it is recorded."""
+
+
+_default_transport: Optional[CassetteTransport] = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> CassetteTransport:
+    """
+    Return the process-wide transport configured through the environment.
+
+    LLM_TRANSPORT_MODE selects passthrough (default), record or replay,
+    LLM_CASSETTE names the cassette file and LLM_REPLAY_LATENCY chooses the
+    simulated latency in replay mode.
+    """
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = CassetteTransport(
+                mode=os.getenv("LLM_TRANSPORT_MODE", PASSTHROUGH),
+                cassette_path=os.getenv("LLM_CASSETTE"),
+                latency=os.getenv("LLM_REPLAY_LATENCY", "none"),
+            )
+        return _default_transport
@@ -0,0 +1,421 @@
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+
+CHAT_PATH = re.compile(r"^/openai/deployments/([^/]+)/chat/completions")
+
+# Prefix caching on the real service starts at 1024 tokens, in 128-token steps
+CACHE_MIN_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+
+
+def parse_latency(spec: str):
+    """
+    Parse a latency distribution specification.
+
+    Supported forms are "none", "fixed:<seconds>",
+    "lognormal:<median seconds>:<sigma>" and "pareto:<minimum seconds>:<alpha>"
+    (heavy-tailed).
+
+    Returns:
+        Function drawing a latency in seconds
+    """
+    parts = spec.split(":")
+    kind = parts[0]
+
+    if kind == "none":
+        return lambda: 0.0
+    if kind == "fixed" and len(parts) == 2:
+        seconds = float(parts[1])
+        return lambda: seconds
+    if kind == "lognormal" and len(parts) == 3:
+        median, sigma = float(parts[1]), float(parts[2])
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    if kind == "pareto" and len(parts) == 3:
+        minimum, alpha = float(parts[1]), float(parts[2])
+        return lambda: minimum * random.paretovariate(alpha)
+
+    raise ValueError(f"Unknown latency specification: {spec}")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def react_round(messages: List[Dict[str, str]]) -> int:
+    """Number of ReAct steps already taken in a transcript."""
+    assistant_turns = sum(1 for message in messages if message["role"] == "assistant")
+    # Legacy transcripts inline previous steps as Python dict reprs
+    inline_steps = sum(message["content"].count("'thinking':") for message in messages)
+    return assistant_turns + inline_steps
+
+
+def last_line(text: str) -> str:
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    return lines[-1] if lines else ""
+
+
+def templated_response(
+    messages: List[Dict[str, str]], react_rounds: int, accuracy: float
+) -> str:
+    """
+    Produce a plausible reply for each prompt family used by Agent.
+
+    ReAct prompts take `react_rounds` intermediate steps before answering, and
+    the evaluation judge answers "1" with probability `accuracy`, as does every
+    verdict of the batch judge.
+    """
+    text = "\n".join(message["content"] for message in messages)
+    step = react_round(messages)
+
+    # The batch judge prompt also mentions "evaluating answers to questions"
+    if "numbered list of question and answer pairs" in text:
+        ids = re.findall(r"^\[(\d+)\] Question:", text, flags=re.MULTILINE)
+        verdicts = [
+            {"id": int(index), "valid": int(random.random() < accuracy)}
+            for index in ids
+        ]
+        return json.dumps({"verdicts": verdicts})
+
+    if "evaluating answers to questions" in text:
+        return "1" if random.random() < accuracy else "0"
+
+    if "evaluating whether a sequence of actions" in text:
+        success = random.random() < accuracy
+        return json.dumps(
+            {"success": success, "explanation": "Mock evaluation of the action list."}
+        )
+
+    if "simulating an interactive household environment" in text:
+        action = text.rsplit("Action:", 1)[-1].strip()
+        return f"You {action}. Nothing unexpected happens."
+
+    if "Analyze the given query" in text:
+        query = text.rsplit("Query:", 1)[-1].strip()
+        return f"Mock knowledge about: {query}"
+
+    if "Generate a detailed description of the environment" in text:
+        return (
+            "You are in a kitchen. There is a countertop 1, a cabinet 1, a fridge 1, "
+            "a microwave 1, a sinkbasin 1 and a shelf 1. A mug 1 is on the countertop 1."
+        )
+
+    if "multi-hop questions by interacting" in text:
+        if step < react_rounds:
+            return json.dumps(
+                {"thinking": f"Mock reasoning step {step + 1}.", "action": last_line(text)}
+            )
+        return json.dumps({"answer": "Mock answer to the question."})
+
+    if "verifying factual claims by interacting" in text:
+        if step < react_rounds:
+            return json.dumps(
+                {
+                    "thinking": f"Mock reasoning step {step + 1}.",
+                    "action": f"search: {last_line(text)}",
+                }
+            )
+        return json.dumps(
+            {"verification": random.choice(["SUPPORTS", "REFUTES"]), "evidence": "Mock."}
+        )
+
+    if "interactive home environment" in text:
+        actions = ["look", "move to countertop", "take mug", "move to shelf"]
+        if step < react_rounds:
+            return json.dumps(
+                {
+                    "thinking": f"Mock reasoning step {step + 1}.",
+                    "action": actions[step % len(actions)],
+                }
+            )
+        return json.dumps(
+            {"success": True, "actions": actions, "reasoning": "Mock reasoning."}
+        )
+
+    if "answering complex multi-hop questions" in text:
+        return json.dumps({"answer": "Mock direct answer."})
+
+    if "fact-checking agent" in text:
+        return json.dumps(
+            {"verification": random.choice(["SUPPORTS", "REFUTES"]), "evidence": "Mock."}
+        )
+
+    if "household agent" in text:
+        return json.dumps(
+            {
+                "actions": ["move to countertop", "take mug", "move to shelf", "place mug in shelf"],
+                "reasoning": "Mock reasoning.",
+            }
+        )
+
+    return "Mock response."
+
+
+class MockState:
+    """Configuration and shared counters of a running mock server."""
+
+    def __init__(
+        self,
+        latency: str = "none",
+        rate_limit_error_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        retry_after: float = 1.0,
+        rpm: Optional[int] = None,
+        react_rounds: int = 2,
+        accuracy: float = 0.7,
+        script: Optional[List[Tuple[str, str]]] = None,
+    ):
+        """
+        Initialize the server state.
+
+        Args:
+            latency: Latency distribution, see parse_latency
+            rate_limit_error_rate: Probability of answering 429
+            server_error_rate: Probability of answering 500
+            retry_after: Seconds advertised in retry-after on 429 responses
+            rpm: Requests-per-minute quota enforced with 429s, if any
+            react_rounds: Intermediate ReAct steps before the final answer
+            accuracy: Probability that the mock judges grade an answer as correct
+            script: (regex, reply) pairs checked before the templates
+        """
+        self.latency = parse_latency(latency)
+        self.rate_limit_error_rate = rate_limit_error_rate
+        self.server_error_rate = server_error_rate
+        self.retry_after = retry_after
+        self.rpm = rpm
+        self.react_rounds = react_rounds
+        self.accuracy = accuracy
+        self.script = [(re.compile(pattern, re.S), reply) for pattern, reply in script or []]
+        self.counters = {"requests": 0, "ok": 0, "rate_limited": 0, "server_errors": 0}
+        self._recent = deque()
+        self._seen_prefixes = set()
+        self._lock = threading.Lock()
+
+    def admit(self) -> Optional[int]:
+        """
+        Decide whether a request fails.
+
+        Returns:
+            The HTTP error status to answer with, or None to serve the request
+        """
+        with self._lock:
+            self.counters["requests"] += 1
+            now = time.monotonic()
+
+            if self.rpm is not None:
+                while self._recent and now - self._recent[0] > 60:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rpm:
+                    self.counters["rate_limited"] += 1
+                    return 429
+                self._recent.append(now)
+
+            draw = random.random()
+            if draw < self.rate_limit_error_rate:
+                self.counters["rate_limited"] += 1
+                return 429
+            if draw < self.rate_limit_error_rate + self.server_error_rate:
+                self.counters["server_errors"] += 1
+                return 500
+
+            self.counters["ok"] += 1
+            return None
+
+    def cached_tokens(self, messages: List[Dict[str, str]]) -> int:
+        """Simulate service-side prefix caching of the leading message."""
+        if not messages:
+            return 0
+
+        prefix = messages[0]["content"]
+        prefix_tokens = estimate_tokens(prefix)
+        if prefix_tokens < CACHE_MIN_TOKENS:
+            return 0
+
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with self._lock:
+            if digest not in self._seen_prefixes:
+                self._seen_prefixes.add(digest)
+                return 0
+        return prefix_tokens // CACHE_BLOCK_TOKENS * CACHE_BLOCK_TOKENS
+
+    def reply(self, messages: List[Dict[str, str]]) -> str:
+        text = "\n".join(message["content"] for message in messages)
+        for pattern, reply in self.script:
+            if pattern.search(text):
+                return reply
+        return templated_response(messages, self.react_rounds, self.accuracy)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Implements the chat-completions subset of the Azure OpenAI API used by Agent."""
+
+    server_version = "MockAzureOpenAI/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        # Keep load tests quiet; the counters are available at /stats
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, dict(self.state.counters))
+        else:
+            self._send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+
+    def do_POST(self):
+        match = CHAT_PATH.match(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if not match:
+            self._send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+            return
+
+        time.sleep(self.state.latency())
+
+        status = self.state.admit()
+        if status == 429:
+            self._send_json(
+                429,
+                {"error": {"code": "429", "message": "Mock rate limit exceeded."}},
+                {
+                    "retry-after": str(math.ceil(self.state.retry_after)),
+                    "retry-after-ms": str(int(self.state.retry_after * 1000)),
+                },
+            )
+            return
+        if status == 500:
+            self._send_json(
+                500, {"error": {"code": "InternalServerError", "message": "Mock failure."}}
+            )
+            return
+
+        deployment = match.group(1)
+        messages = request.get("messages", [])
+        content = self.state.reply(messages)
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        completion_tokens = estimate_tokens(content)
+
+        self._send_json(
+            200,
+            {
+                "id": f"chatcmpl-mock-{self.state.counters['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": deployment,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_tokens_details": {
+                        "cached_tokens": self.state.cached_tokens(messages)
+                    },
+                },
+            },
+            {
+                "x-ratelimit-remaining-requests": str(
+                    self.state.rpm - len(self.state._recent)
+                    if self.state.rpm is not None
+                    else 100000
+                ),
+                "x-ratelimit-remaining-tokens": "10000000",
+            },
+        )
+
+
+def serve(host: str, port: int, state: MockState) -> ThreadingHTTPServer:
+    """
+    Start the mock server on a background thread.
+
+    Returns:
+        The running server; call shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.state = state
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Local mock of the Azure OpenAI chat-completions API. "
+        "Point AZURE_OPENAI_ENDPOINT at http://<host>:<port> to use it."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--latency",
+        default="lognormal:0.8:0.5",
+        help="none, fixed:<s>, lognormal:<median s>:<sigma> or pareto:<min s>:<alpha>",
+    )
+    parser.add_argument("--rate-limit-error-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--rpm", type=int, default=None)
+    parser.add_argument("--react-rounds", type=int, default=2)
+    parser.add_argument("--accuracy", type=float, default=0.7)
+    parser.add_argument(
+        "--script",
+        default=None,
+        help="JSON file with a list of [regex, reply] pairs checked before the templates",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+
+    mock_state = MockState(
+        latency=args.latency,
+        rate_limit_error_rate=args.rate_limit_error_rate,
+        server_error_rate=args.server_error_rate,
+        retry_after=args.retry_after,
+        rpm=args.rpm,
+        react_rounds=args.react_rounds,
+        accuracy=args.accuracy,
+        script=script,
+    )
+    mock_server = serve(args.host, args.port, mock_state)
+    print(f"MOCK AZURE OPENAI SERVER LISTENING ON http://{args.host}:{args.port}")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock_server.shutdown()
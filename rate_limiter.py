@@ -0,0 +1,344 @@
+import os
+import time
+import random
+import asyncio
+import threading
+import email.utils
+from typing import Dict, Any, Mapping, Optional
+
+# Quotas assumed until the service reports its own through rate-limit headers.
+# Override per deployment with e.g. AZURE_OPENAI_RPM_GPT_4O / AZURE_OPENAI_TPM_GPT_4O.
+DEFAULT_LIMITS = {
+    "gpt-4o": {"rpm": 300, "tpm": 50000},
+    "o3-mini": {"rpm": 100, "tpm": 100000},
+}
+FALLBACK_LIMITS = {"rpm": 60, "tpm": 30000}
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+
+    Callers reserve capacity up front and are told how long to wait; the bucket
+    is allowed to go into debt so that concurrent callers queue up in order
+    instead of all waking at the same moment.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.tokens = min(
+            self.capacity, self.tokens + elapsed * self.rate_per_minute / 60.0
+        )
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Take `amount` tokens from the bucket.
+
+        Returns:
+            Seconds the caller has to wait before the reservation is covered
+        """
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens * 60.0 / self.rate_per_minute
+
+    def settle(self, reserved: float, used: float):
+        """
+        Correct a reservation once the real cost is known.
+
+        Unused tokens are given back; a request that cost more than reserved
+        takes the difference, which may put the bucket into debt.
+        """
+        self.tokens = min(self.capacity, self.tokens + reserved - used)
+
+    def clamp(self, available: float):
+        """Never believe there is more capacity than the service reports."""
+        self.tokens = min(self.tokens, available)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Read the server-requested wait from retry-after-ms or retry-after.
+
+    Returns:
+        Seconds to wait, or None if the headers do not say
+    """
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+
+    try:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        # Neither seconds nor an HTTP date, fall back to the caller's backoff
+        return None
+    return max(0.0, retry_date.timestamp() - time.time())
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class DeploymentRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter for one deployment.
+
+    The sending rate starts at `target_utilization` of the configured quota,
+    backs off multiplicatively on every 429 and creeps back up additively on
+    every successful call, so concurrent evaluations settle just below the
+    quota instead of failing items.
+    """
+
+    def __init__(
+        self,
+        deployment: str,
+        rpm: float,
+        tpm: float,
+        target_utilization: float = 0.9,
+        backoff_factor: float = 0.7,
+        recovery_step: float = 0.02,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            deployment: Name of the deployment being limited
+            rpm: Requests-per-minute quota
+            tpm: Tokens-per-minute quota
+            target_utilization: Fraction of the quota to aim for
+            backoff_factor: Rate multiplier applied on each 429
+            recovery_step: Fraction of the quota regained per successful call
+        """
+        self.deployment = deployment
+        self.rpm = rpm
+        self.tpm = tpm
+        self.target_utilization = target_utilization
+        self.backoff_factor = backoff_factor
+        self.recovery_step = recovery_step
+        self.scale = target_utilization
+        self.requests = TokenBucket(rpm * self.scale)
+        self.tokens = TokenBucket(tpm * self.scale)
+        self.blocked_until = 0.0
+        # 429s in a row drive the backoff, the lifetime count is only reported
+        self.consecutive_rate_limited = 0
+        self.rate_limited_count = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _apply_scale(self):
+        for bucket, quota in ((self.requests, self.rpm), (self.tokens, self.tpm)):
+            bucket.rate_per_minute = quota * self.scale
+            bucket.capacity = bucket.rate_per_minute
+
+    def _reserve(self, estimated_tokens: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            delay = max(
+                self.requests.reserve(1, now),
+                self.tokens.reserve(estimated_tokens, now),
+                self.blocked_until - now,
+            )
+            self.wait_seconds += delay
+            return delay
+
+    def acquire(self, estimated_tokens: float) -> float:
+        """
+        Block until a request of `estimated_tokens` may be sent.
+
+        Returns:
+            Seconds spent waiting
+        """
+        delay = self._reserve(estimated_tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return max(0.0, delay)
+
+    async def acquire_async(self, estimated_tokens: float) -> float:
+        """
+        Wait on the event loop until a request of `estimated_tokens` may be sent.
+
+        Returns:
+            Seconds spent waiting
+        """
+        delay = self._reserve(estimated_tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return max(0.0, delay)
+
+    def record_response(
+        self,
+        headers: Mapping[str, str],
+        estimated_tokens: float,
+        used_tokens: Optional[float] = None,
+    ):
+        """
+        Update the limiter from a successful response.
+
+        Args:
+            headers: Response headers
+            estimated_tokens: Tokens reserved for the request
+            used_tokens: Tokens actually billed, from the response usage; the
+                reservation is settled against them in either direction
+        """
+        with self._lock:
+            limit_requests = _header_number(headers, "x-ratelimit-limit-requests")
+            limit_tokens = _header_number(headers, "x-ratelimit-limit-tokens")
+            if limit_requests:
+                self.rpm = limit_requests
+            if limit_tokens:
+                self.tpm = limit_tokens
+
+            self.consecutive_rate_limited = 0
+            self.scale = min(self.target_utilization, self.scale + self.recovery_step)
+            self._apply_scale()
+
+            if used_tokens is not None:
+                self.tokens.settle(estimated_tokens, used_tokens)
+
+            remaining_requests = _header_number(
+                headers, "x-ratelimit-remaining-requests"
+            )
+            remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+            if remaining_requests is not None:
+                self.requests.clamp(remaining_requests * self.target_utilization)
+            if remaining_tokens is not None:
+                self.tokens.clamp(remaining_tokens * self.target_utilization)
+
+    def release(self, estimated_tokens: float):
+        """
+        Give back the tokens reserved for a request that failed.
+
+        A rejected or failed attempt is not billed, and its retry reserves
+        again, so keeping the reservation would charge the attempt twice.
+
+        Args:
+            estimated_tokens: Tokens reserved for the request
+        """
+        with self._lock:
+            self.tokens.settle(estimated_tokens, 0)
+
+    def record_rate_limited(self, headers: Mapping[str, str]) -> float:
+        """
+        Back off after a 429 response.
+
+        Args:
+            headers: Headers of the 429 response
+
+        Returns:
+            Seconds until the next request may be sent
+        """
+        with self._lock:
+            self.consecutive_rate_limited += 1
+            self.rate_limited_count += 1
+            self.scale = max(0.05, self.scale * self.backoff_factor)
+            self._apply_scale()
+
+            retry_after = parse_retry_after(headers)
+            if retry_after is None:
+                # No hint from the service: exponential backoff with jitter
+                retry_after = min(60.0, 2 ** min(self.consecutive_rate_limited, 6))
+                retry_after *= random.uniform(0.5, 1.0)
+
+            self.blocked_until = max(
+                self.blocked_until, time.monotonic() + retry_after
+            )
+            return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current effective rates and backoff counters."""
+        with self._lock:
+            return {
+                "deployment": self.deployment,
+                "rpm_quota": self.rpm,
+                "tpm_quota": self.tpm,
+                "effective_rpm": self.requests.rate_per_minute,
+                "effective_tpm": self.tokens.rate_per_minute,
+                "rate_limited": self.rate_limited_count,
+                "wait_seconds": round(self.wait_seconds, 3),
+            }
+
+
+def expected_output_tokens() -> int:
+    """Completion tokens reserved per request, overridable through the environment."""
+    return int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "1000"))
+
+
+def estimate_tokens(completion_params: Dict[str, Any]) -> int:
+    """
+    Estimate the tokens a request will count against the TPM quota.
+
+    The prompt is estimated at roughly four characters per token. The
+    completion is estimated at LLM_EXPECTED_OUTPUT_TOKENS (default 1000),
+    capped by the request's max_tokens. Reserving the full completion budget
+    instead (100k for o3-mini) would drain the whole bucket on every call.
+    The reservation is settled against the billed usage once the response
+    arrives.
+    """
+    prompt_chars = sum(
+        len(message.get("content") or "")
+        for message in completion_params.get("messages", [])
+    )
+    completion_budget = completion_params.get("max_tokens") or completion_params.get(
+        "max_completion_tokens"
+    )
+    expected_output = expected_output_tokens()
+    if completion_budget:
+        expected_output = min(expected_output, completion_budget)
+    return prompt_chars // 4 + expected_output
+
+
+def _configured_limit(deployment: str, kind: str) -> float:
+    env_name = f"AZURE_OPENAI_{kind.upper()}_{deployment.upper().replace('-', '_')}"
+    configured = os.getenv(env_name)
+    if configured:
+        return float(configured)
+    return DEFAULT_LIMITS.get(deployment, FALLBACK_LIMITS)[kind]
+
+
+_limiters: Dict[str, DeploymentRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(deployment: str) -> DeploymentRateLimiter:
+    """Return the process-wide limiter shared by every agent of a deployment."""
+    with _limiters_lock:
+        if deployment not in _limiters:
+            _limiters[deployment] = DeploymentRateLimiter(
+                deployment,
+                rpm=_configured_limit(deployment, "rpm"),
+                tpm=_configured_limit(deployment, "tpm"),
+            )
+        return _limiters[deployment]
+
+
+def rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Return the statistics of every deployment limiter."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.deployment: limiter.stats() for limiter in limiters}
@@ -1,10 +1,12 @@
 import streamlit as st
 import sys
 import datetime
+import uuid
 from hotpotqa.hotpotqa_eval import HotpotQAEval, StreamlitPrintCapture
 from fever.fever_eval import FeverEval
 from alfworld.alfworld_eval import ALFWorldEval
 from history_manager import HistoryManager
+from checkpoint import journal_items
 
 # Initialize the history manager
 history_manager = HistoryManager()
@@ -164,6 +166,8 @@ def show_history_page():
                 else:
                     st.json(full_record["results"])
 
+                display_token_usage(full_record["results"])
+
         with col2:
             # Show a button to delete this history item
             if st.button("Delete", key=f"delete_{record['id']}"):
@@ -266,6 +270,8 @@ def display_hotpotqa_history(record):
                 status = "✅ VALID" if qa_pair["valid"] else "❌ INVALID"
                 qa_text += f"Question {idx+1}: {qa_pair['question']}\n\n"
                 qa_text += f"Answer: {qa_pair['answer']}\n\n"
+                if qa_pair.get("gold_answer"):
+                    qa_text += f"Gold Answer: {qa_pair['gold_answer']}\n\n"
                 qa_text += f"Status: {status}\n\n"
                 qa_text += "---\n\n"
 
@@ -284,6 +290,8 @@ def display_hotpotqa_history(record):
                 status = "✅ VALID" if qa_pair["valid"] else "❌ INVALID"
                 qa_text += f"Question {idx+1}: {qa_pair['question']}\n\n"
                 qa_text += f"Answer: {qa_pair['answer']}\n\n"
+                if qa_pair.get("gold_answer"):
+                    qa_text += f"Gold Answer: {qa_pair['gold_answer']}\n\n"
                 qa_text += f"Status: {status}\n\n"
                 qa_text += "---\n\n"
 
@@ -302,6 +310,8 @@ def display_hotpotqa_history(record):
                 status = "✅ VALID" if qa_pair["valid"] else "❌ INVALID"
                 qa_text += f"Question {idx+1}: {qa_pair['question']}\n\n"
                 qa_text += f"Answer: {qa_pair['answer']}\n\n"
+                if qa_pair.get("gold_answer"):
+                    qa_text += f"Gold Answer: {qa_pair['gold_answer']}\n\n"
                 qa_text += f"Status: {status}\n\n"
                 qa_text += "---\n\n"
 
@@ -645,6 +655,38 @@ def display_alfworld_history(record):
             )
 
 
+def display_token_usage(results):
+    """Display per-agent token usage, including prompt cache hits."""
+    token_usage = results.get("token_usage")
+    if not token_usage:
+        return
+
+    st.subheader("Token Usage")
+    cols = st.columns(len(token_usage))
+    for col, (agent_name, usage) in zip(cols, token_usage.items()):
+        with col:
+            st.metric(
+                f"{agent_name} Prompt Tokens",
+                usage.get("prompt_tokens", 0),
+                f"{usage.get('cached_ratio', 0) * 100:.1f}% cached",
+            )
+            st.caption(
+                f"{usage.get('requests', 0)} requests, "
+                f"{usage.get('cached_tokens', 0)} cached prompt tokens, "
+                f"{usage.get('completion_tokens', 0)} completion tokens"
+            )
+
+    telemetry = results.get("telemetry")
+    if telemetry:
+        total = telemetry["total"]
+        st.caption(
+            f"{total['calls']} calls ({total['cache_hits']} from cache, "
+            f"{total['retries']} retries), {total['wall_seconds']:.1f}s in calls, "
+            f"{total['queue_seconds']:.1f}s rate-limited, "
+            f"estimated cost ${total['cost_usd']:.4f}"
+        )
+
+
 def run_hotpotqa_evaluation():
     # Update CSS for new card design
     st.markdown(
@@ -758,6 +800,27 @@ def run_hotpotqa_evaluation():
                 help="Choose how many questions to sample from the dataset (0 for all)",
                 key="hotpotqa_num_questions",
             )
+            # Input for the number of items evaluated in parallel
+            concurrency = st.number_input(
+                "Concurrent Questions",
+                min_value=1,
+                value=1,
+                help="How many questions to evaluate in parallel",
+                key="hotpotqa_concurrency",
+            )
+            # Completed questions are journaled under the run ID as they finish
+            run_id = st.text_input(
+                "Run ID",
+                value="",
+                help="Name the run to resume it after a crash (empty for a new run)",
+                key="hotpotqa_run_id",
+            )
+            resume = st.checkbox(
+                "Resume run",
+                value=False,
+                help="Skip the questions this run ID has already completed",
+                key="hotpotqa_resume",
+            )
 
         with col3:
             # Run evaluation button (vertically centered)
@@ -822,7 +885,15 @@ def run_hotpotqa_evaluation():
             with st.spinner("Evaluation in progress..."):
                 hotpot_eval = HotpotQAEval(dataset_path)
                 hotpot_eval.load_hotpotqa_dataset()
-                questions_to_evaluate = hotpot_eval.get_questions(num_questions)
+                run_id = run_id.strip() or str(uuid.uuid4())
+                # A resumed run evaluates the questions it was started with
+                previous_questions = (
+                    journal_items("hotpotqa", run_id) if resume else None
+                )
+                if previous_questions is not None:
+                    questions_to_evaluate = previous_questions
+                else:
+                    questions_to_evaluate = hotpot_eval.get_questions(num_questions)
 
                 # Display initial progress
                 status_template = """
@@ -864,7 +935,13 @@ def run_hotpotqa_evaluation():
                 original_eval_questions = hotpot_eval.eval_questions
 
                 def eval_questions_with_progress(
-                    questions, use_react=True, use_gpt4o=True, use_o3mini=True
+                    questions,
+                    use_react=True,
+                    use_gpt4o=True,
+                    use_o3mini=True,
+                    concurrency=1,
+                    run_id=None,
+                    resume=False,
                 ):
                     # Keep the original function's logic but update progress
                     for i, question in enumerate(questions):
@@ -888,7 +965,13 @@ def run_hotpotqa_evaluation():
 
                     # Call original function with the parameters
                     return original_eval_questions(
-                        questions, use_react, use_gpt4o, use_o3mini
+                        questions,
+                        use_react,
+                        use_gpt4o,
+                        use_o3mini,
+                        concurrency,
+                        run_id,
+                        resume,
                     )
 
                 hotpot_eval.eval_questions = eval_questions_with_progress
@@ -899,6 +982,9 @@ def run_hotpotqa_evaluation():
                     use_react=use_react,
                     use_gpt4o=use_gpt4o,
                     use_o3mini=use_o3mini,
+                    concurrency=concurrency,
+                    run_id=run_id,
+                    resume=resume,
                 )
 
                 # Save the results to history
@@ -910,6 +996,10 @@ def run_hotpotqa_evaluation():
                         "gpt4o": use_gpt4o,
                         "o3mini": use_o3mini,
                     },
+                    "concurrency": concurrency,
+                    "run_id": run_id,
+                    "resumed_items": result.get("resumed_items", 0),
+                    "telemetry": result.get("telemetry", {}).get("total"),
                 }
                 history_manager.save_evaluation("hotpotqa", result, metadata)
 
@@ -1115,6 +1205,34 @@ def run_fever_evaluation():
                 help="Choose how many claims to sample from the dataset (0 for all)",
                 key="fever_num_claims",
             )
+            # Draw the same number of claims for every label
+            stratified = st.checkbox(
+                "Balance labels",
+                value=False,
+                help="Spread the sampled claims evenly over SUPPORTS, REFUTES and NOT ENOUGH INFO",
+                key="fever_stratified",
+            )
+            # Input for the number of items evaluated in parallel
+            concurrency = st.number_input(
+                "Concurrent Claims",
+                min_value=1,
+                value=1,
+                help="How many claims to evaluate in parallel",
+                key="fever_concurrency",
+            )
+            # Completed claims are journaled under the run ID as they finish
+            run_id = st.text_input(
+                "Run ID",
+                value="",
+                help="Name the run to resume it after a crash (empty for a new run)",
+                key="fever_run_id",
+            )
+            resume = st.checkbox(
+                "Resume run",
+                value=False,
+                help="Skip the claims this run ID has already completed",
+                key="fever_resume",
+            )
 
         with col3:
             # Run evaluation button
@@ -1177,7 +1295,15 @@ def run_fever_evaluation():
             with st.spinner("Evaluation in progress..."):
                 fever_eval = FeverEval(dataset_path)
                 fever_eval.load_fever_dataset()
-                claims_to_evaluate = fever_eval.get_claims(num_claims)
+                run_id = run_id.strip() or str(uuid.uuid4())
+                # A resumed run evaluates the claims it was started with
+                previous_claims = journal_items("fever", run_id) if resume else None
+                if previous_claims is not None:
+                    claims_to_evaluate = [tuple(pair) for pair in previous_claims]
+                else:
+                    claims_to_evaluate = fever_eval.get_claims(
+                        num_claims, stratified=stratified
+                    )
 
                 # Display initial progress
                 status_template = """
@@ -1219,7 +1345,13 @@ def run_fever_evaluation():
                 original_eval_claims = fever_eval.eval_claims
 
                 def eval_claims_with_progress(
-                    claim_label_pairs, use_react=True, use_gpt4o=True, use_o3mini=True
+                    claim_label_pairs,
+                    use_react=True,
+                    use_gpt4o=True,
+                    use_o3mini=True,
+                    concurrency=1,
+                    run_id=None,
+                    resume=False,
                 ):
                     # Let the original function handle everything
                     for i, (claim, _) in enumerate(claim_label_pairs):
@@ -1243,7 +1375,13 @@ def run_fever_evaluation():
 
                     # Call the original function with the parameters
                     result = original_eval_claims(
-                        claim_label_pairs, use_react, use_gpt4o, use_o3mini
+                        claim_label_pairs,
+                        use_react,
+                        use_gpt4o,
+                        use_o3mini,
+                        concurrency,
+                        run_id,
+                        resume,
                     )
                     return result
 
@@ -1251,7 +1389,13 @@ def run_fever_evaluation():
 
                 # Run the evaluation with selected agents
                 result = fever_eval.eval_claims(
-                    claims_to_evaluate, use_react, use_gpt4o, use_o3mini
+                    claims_to_evaluate,
+                    use_react,
+                    use_gpt4o,
+                    use_o3mini,
+                    concurrency,
+                    run_id,
+                    resume,
                 )
 
                 # Save the results to history
@@ -1263,6 +1407,10 @@ def run_fever_evaluation():
                         "gpt4o": use_gpt4o,
                         "o3mini": use_o3mini,
                     },
+                    "concurrency": concurrency,
+                    "run_id": run_id,
+                    "resumed_items": result.get("resumed_items", 0),
+                    "telemetry": result.get("telemetry", {}).get("total"),
                 }
                 history_manager.save_evaluation("fever", result, metadata)
 
@@ -1489,6 +1637,43 @@ def run_alfworld_evaluation():
                 help="Path to the ALFWorld dataset directory",
                 key="alfworld_dataset_path",
             )
+            # Split to sample tasks from
+            split = st.selectbox(
+                "Split",
+                ["train", "valid_seen", "valid_unseen"],
+                help="Dataset split to sample tasks from",
+                key="alfworld_split",
+            )
+            # Where the environment description shown to the agents comes from;
+            # the simulator by default, the world the actions are answered in
+            describer = st.selectbox(
+                "Environment Description",
+                ["simulator", "llm"],
+                help="List the objects of the trial's traj_data.json, or have "
+                "gpt-4o describe the environment (stored across runs)",
+                key="alfworld_describer",
+            )
+            # How ReAct actions are answered
+            observer = st.selectbox(
+                "Observer",
+                ["simulator", "llm"],
+                help="Answer ReAct actions with the rule-based simulator built from "
+                "traj_data.json, or ask gpt-4o to imagine the observation",
+                key="alfworld_observer",
+            )
+            # How the actions of each agent are judged
+            grader = st.selectbox(
+                "Grader",
+                ["symbolic", "llm"],
+                help="Replay the actions against the task's PDDL goal, or ask gpt-4o "
+                "whether they complete the task",
+                key="alfworld_grader",
+            )
+            if describer == "llm" and (observer == "simulator" or grader == "symbolic"):
+                st.warning(
+                    "The agents will plan against a gpt-4o description but act in "
+                    "the simulator, whose objects may differ."
+                )
 
         with col2:
             # Input for number of tasks
@@ -1499,6 +1684,27 @@ def run_alfworld_evaluation():
                 help="Choose how many tasks to sample from the dataset (0 for all)",
                 key="alfworld_num_tasks",
             )
+            # Input for the number of items evaluated in parallel
+            concurrency = st.number_input(
+                "Concurrent Tasks",
+                min_value=1,
+                value=1,
+                help="How many tasks to evaluate in parallel",
+                key="alfworld_concurrency",
+            )
+            # Completed tasks are journaled under the run ID as they finish
+            run_id = st.text_input(
+                "Run ID",
+                value="",
+                help="Name the run to resume it after a crash (empty for a new run)",
+                key="alfworld_run_id",
+            )
+            resume = st.checkbox(
+                "Resume run",
+                value=False,
+                help="Skip the tasks this run ID has already completed",
+                key="alfworld_resume",
+            )
 
         with col3:
             # Run evaluation button
@@ -1506,6 +1712,13 @@ def run_alfworld_evaluation():
             run_button = st.button(
                 "Run Evaluation", use_container_width=True, key="run_alfworld"
             )
+            # Describe every task of the catalog once so runs skip that call
+            pregenerate_button = st.button(
+                "Pre-generate Environments",
+                use_container_width=True,
+                key="pregenerate_alfworld",
+                help="Generate and store environment descriptions for all tasks",
+            )
 
         with col4:
             # Agent selection options
@@ -1551,6 +1764,31 @@ def run_alfworld_evaluation():
         st.subheader("Evaluation Logs")
         logs_area = st.empty()
 
+    if pregenerate_button:
+        try:
+            orig_stdout = sys.stdout
+            sys.stdout = StreamlitPrintCapture(logs_area)
+
+            with st.spinner("Generating environment descriptions..."):
+                alfworld_eval = ALFWorldEval(
+                    dataset_path,
+                    split=split,
+                    observer=observer,
+                    grader=grader,
+                    describer=describer,
+                )
+                alfworld_eval.load_alfworld_dataset()
+                counts = alfworld_eval.pregenerate_environment_descriptions()
+
+            sys.stdout = orig_stdout
+            st.success(
+                f"Generated {counts['generated']} environment descriptions "
+                f"({counts['stored']} already stored, {counts['failed']} failed)"
+            )
+        except Exception as e:
+            sys.stdout = orig_stdout
+            st.error(f"An error occurred: {e}")
+
     # Run evaluation when button is clicked
     if run_button:
         try:
@@ -1561,9 +1799,21 @@ def run_alfworld_evaluation():
 
             # Run the evaluation
             with st.spinner("Evaluation in progress..."):
-                alfworld_eval = ALFWorldEval(dataset_path)
+                alfworld_eval = ALFWorldEval(
+                    dataset_path,
+                    split=split,
+                    observer=observer,
+                    grader=grader,
+                    describer=describer,
+                )
                 alfworld_eval.load_alfworld_dataset()
-                tasks_to_evaluate = alfworld_eval.get_tasks(num_tasks)
+                run_id = run_id.strip() or str(uuid.uuid4())
+                # A resumed run evaluates the tasks it was started with
+                previous_tasks = journal_items("alfworld", run_id) if resume else None
+                if previous_tasks is not None:
+                    tasks_to_evaluate = previous_tasks
+                else:
+                    tasks_to_evaluate = alfworld_eval.get_tasks(num_tasks)
 
                 # Display initial progress
                 status_template = """
@@ -1605,7 +1855,13 @@ def run_alfworld_evaluation():
                 original_eval_tasks = alfworld_eval.eval_tasks
 
                 def eval_tasks_with_progress(
-                    tasks, use_react=True, use_gpt4o=True, use_o3mini=True
+                    tasks,
+                    use_react=True,
+                    use_gpt4o=True,
+                    use_o3mini=True,
+                    concurrency=1,
+                    run_id=None,
+                    resume=False,
                 ):
                     # Return the evaluation results but update progress during execution
                     for i, task in enumerate(tasks):
@@ -1633,7 +1889,13 @@ def run_alfworld_evaluation():
                         )
 
                     result = original_eval_tasks(
-                        tasks, use_react, use_gpt4o, use_o3mini
+                        tasks,
+                        use_react,
+                        use_gpt4o,
+                        use_o3mini,
+                        concurrency,
+                        run_id,
+                        resume,
                     )
                     return result
 
@@ -1642,18 +1904,32 @@ def run_alfworld_evaluation():
 
                 # Run the evaluation with selected agents
                 result = alfworld_eval.eval_tasks(
-                    tasks_to_evaluate, use_react, use_gpt4o, use_o3mini
+                    tasks_to_evaluate,
+                    use_react,
+                    use_gpt4o,
+                    use_o3mini,
+                    concurrency,
+                    run_id,
+                    resume,
                 )
 
                 # Save the results to history
                 metadata = {
                     "num_items": len(tasks_to_evaluate),
                     "dataset_path": dataset_path,
+                    "split": split,
+                    "describer": describer,
+                    "observer": observer,
+                    "grader": grader,
                     "agents": {
                         "react": use_react,
                         "gpt4o": use_gpt4o,
                         "o3mini": use_o3mini,
                     },
+                    "concurrency": concurrency,
+                    "run_id": run_id,
+                    "resumed_items": result.get("resumed_items", 0),
+                    "telemetry": result.get("telemetry", {}).get("total"),
                 }
                 history_manager.save_evaluation("alfworld", result, metadata)
 
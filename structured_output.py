@@ -0,0 +1,151 @@
+import re
+import json
+from typing import Dict, Any, List, Optional
+
+# Free-form JSON mode, used where the reply is one of several shapes
+# (ReAct steps are either a thought/action pair or a final answer)
+JSON_OBJECT_FORMAT = {"type": "json_object"}
+
+
+def json_schema_format(
+    name: str, properties: Dict[str, Any], required: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Build a strict JSON-schema response_format for chat.completions.create.
+
+    Args:
+        name: Name of the schema
+        properties: JSON-schema properties of the reply object
+        required: Required properties (defaults to all of them, as strict mode demands)
+
+    Returns:
+        The response_format parameter
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": properties,
+                "required": required if required is not None else list(properties),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+HOTPOTQA_DIRECT_FORMAT = json_schema_format(
+    "hotpotqa_answer", {"answer": {"type": "string"}}
+)
+
+FEVER_DIRECT_FORMAT = json_schema_format(
+    "fever_verification",
+    {
+        "verification": {
+            "type": "string",
+            "enum": ["SUPPORTS", "REFUTES", "NOT ENOUGH INFO"],
+        },
+        "evidence": {"type": "string"},
+    },
+)
+
+ALFWORLD_DIRECT_FORMAT = json_schema_format(
+    "alfworld_plan",
+    {
+        "actions": {"type": "array", "items": {"type": "string"}},
+        "reasoning": {"type": "string"},
+    },
+)
+
+BATCH_EVALUATION_FORMAT = json_schema_format(
+    "batch_evaluation",
+    {
+        "verdicts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "valid": {"type": "integer", "enum": [0, 1]},
+                },
+                "required": ["id", "valid"],
+                "additionalProperties": False,
+            },
+        }
+    },
+)
+
+ACTION_EVALUATION_FORMAT = json_schema_format(
+    "action_evaluation",
+    {"success": {"type": "boolean"}, "explanation": {"type": "string"}},
+)
+
+
+def parse_json_from_response(response_text: str) -> Dict[str, Any]:
+    """
+    Extract JSON content from a string that might contain markdown code blocks or other text.
+
+    Args:
+        response_text (str): The response text that contains JSON data
+
+    Returns:
+        Dict[str, Any]: Parsed JSON data
+    """
+    # Structured outputs are plain JSON, so try that before any regex
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError:
+        pass
+
+    # Check if the response is wrapped in ```json ``` tags
+    json_pattern = r"```json\s*(.*?)\s*```"
+    match = re.search(json_pattern, response_text, re.DOTALL)
+
+    if match:
+        # Extract the content inside the json code block
+        json_content = match.group(1)
+        print(json_content)
+        return json.loads(json_content)
+
+    # If there is no code block, check if there's any JSON-like structure in the text
+    potential_json = re.search(r"(\{.*\})", response_text, re.DOTALL)
+    if potential_json:
+        return json.loads(potential_json.group(1))
+
+    raise ValueError(
+        f"Could not extract valid JSON from the response: {response_text[:100]}..."
+    )
+
+
+def response_json(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the JSON object of a completion requested with a response_format.
+
+    Structured replies are decoded directly; free-text replies (e.g. cached or
+    recorded before structured outputs were enabled) fall back to
+    parse_json_from_response.
+
+    Args:
+        response: The completion response as a dictionary
+
+    Returns:
+        The decoded reply object
+
+    Raises:
+        ValueError: If the model refused or the reply holds no JSON object
+    """
+    message = response["choices"][0]["message"]
+    if message.get("refusal"):
+        raise ValueError(f"The model refused to answer: {message['refusal']}")
+
+    content = message["content"] or ""
+    try:
+        reply = json.loads(content)
+    except json.JSONDecodeError:
+        reply = parse_json_from_response(content)
+
+    if not isinstance(reply, dict):
+        raise ValueError(f"Expected a JSON object, got: {content[:100]}...")
+    return reply
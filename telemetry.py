@@ -0,0 +1,222 @@
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, Awaitable, Optional, Tuple
+
+# USD per million tokens; override with e.g. LLM_PRICE_GPT_4O="2.5,1.25,10"
+# (input, cached input, output)
+PRICING = {
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "o3-mini": {"input": 1.10, "cached_input": 0.55, "output": 4.40},
+}
+
+# Trackers currently collecting calls, innermost last. Context variables are
+# copied into every asyncio task, so concurrent items never mix their totals.
+_active_trackers: contextvars.ContextVar[Tuple["UsageTracker", ...]] = (
+    contextvars.ContextVar("active_trackers", default=())
+)
+_current_call: contextvars.ContextVar[Optional["CallTelemetry"]] = (
+    contextvars.ContextVar("current_call", default=None)
+)
+
+
+def pricing(deployment: str) -> Optional[Dict[str, float]]:
+    """Return the per-million-token prices of a deployment, if known."""
+    configured = os.getenv(f"LLM_PRICE_{deployment.upper().replace('-', '_')}")
+    if configured:
+        prices = [float(price) for price in configured.split(",")]
+        return {"input": prices[0], "cached_input": prices[1], "output": prices[2]}
+    return PRICING.get(deployment)
+
+
+class CallTelemetry:
+    """Measurements of a single chat completion call."""
+
+    def __init__(self, deployment: str):
+        self.deployment = deployment
+        self.source = "network"
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.retries = 0
+        self.queue_seconds = 0.0
+        self.wall_seconds = 0.0
+        # Until the response headers arrived; the completions are not
+        # streamed, so this includes generating the whole reply
+        self.header_seconds: Optional[float] = None
+        self.error = False
+        self.started = time.perf_counter()
+        self.attempt_started = self.started
+
+    def start_attempt(self):
+        self.attempt_started = time.perf_counter()
+
+    def mark_headers(self):
+        """Record when the response headers of the current attempt arrived."""
+        self.header_seconds = time.perf_counter() - self.attempt_started
+
+    def set_response(self, response: Dict[str, Any]):
+        usage = response.get("usage") or {}
+        prompt_details = usage.get("prompt_tokens_details") or {}
+        self.prompt_tokens = usage.get("prompt_tokens") or 0
+        self.cached_tokens = prompt_details.get("cached_tokens") or 0
+        self.completion_tokens = usage.get("completion_tokens") or 0
+
+    def cost_usd(self) -> float:
+        """Cost of the call; responses served from the local cache are free."""
+        prices = pricing(self.deployment)
+        if prices is None or self.source == "cache":
+            return 0.0
+        uncached = self.prompt_tokens - self.cached_tokens
+        return (
+            uncached * prices["input"]
+            + self.cached_tokens * prices["cached_input"]
+            + self.completion_tokens * prices["output"]
+        ) / 1_000_000
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "network_calls": 0,
+        "cache_hits": 0,
+        "errors": 0,
+        "retries": 0,
+        "prompt_tokens": 0,
+        "cached_tokens": 0,
+        "completion_tokens": 0,
+        "wall_seconds": 0.0,
+        "queue_seconds": 0.0,
+        "header_seconds": 0.0,
+        "cost_usd": 0.0,
+    }
+
+
+def _add_call(totals: Dict[str, Any], call: CallTelemetry):
+    totals["calls"] += 1
+    totals["network_calls"] += call.source == "network"
+    totals["cache_hits"] += call.source == "cache"
+    totals["errors"] += call.error
+    totals["retries"] += call.retries
+    totals["prompt_tokens"] += call.prompt_tokens
+    totals["cached_tokens"] += call.cached_tokens
+    totals["completion_tokens"] += call.completion_tokens
+    totals["wall_seconds"] += call.wall_seconds
+    totals["queue_seconds"] += call.queue_seconds
+    totals["header_seconds"] += call.header_seconds or 0.0
+    totals["cost_usd"] += call.cost_usd()
+
+
+def _rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+    rounded = dict(totals)
+    for name in ("wall_seconds", "queue_seconds", "header_seconds"):
+        rounded[name] = round(rounded[name], 3)
+    rounded["cost_usd"] = round(rounded["cost_usd"], 6)
+    return rounded
+
+
+class UsageTracker:
+    """Accumulates call telemetry in total and per deployment."""
+
+    def __init__(self):
+        self.total = _empty_totals()
+        self.by_deployment: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, call: CallTelemetry):
+        with self._lock:
+            _add_call(self.total, call)
+            if call.deployment not in self.by_deployment:
+                self.by_deployment[call.deployment] = _empty_totals()
+            _add_call(self.by_deployment[call.deployment], call)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Return the collected totals.
+
+        Returns:
+            Dictionary with the overall totals and one entry per deployment
+        """
+        with self._lock:
+            return {
+                "total": _rounded(self.total),
+                "by_deployment": {
+                    deployment: _rounded(totals)
+                    for deployment, totals in self.by_deployment.items()
+                },
+            }
+
+
+@contextmanager
+def track_usage():
+    """
+    Collect the telemetry of every call made inside the block.
+
+    Blocks can be nested (e.g. a run containing items); each call is added to
+    every enclosing tracker of the current task or thread.
+
+    Yields:
+        The UsageTracker collecting the calls
+    """
+    tracker = UsageTracker()
+    token = _active_trackers.set(_active_trackers.get() + (tracker,))
+    try:
+        yield tracker
+    finally:
+        _active_trackers.reset(token)
+
+
+@contextmanager
+def record_call(deployment: str):
+    """
+    Measure one chat completion call and report it to the active trackers.
+
+    Yields:
+        The CallTelemetry to fill in with the response, source and retries
+    """
+    call = CallTelemetry(deployment)
+    token = _current_call.set(call)
+    try:
+        yield call
+    except BaseException:
+        call.error = True
+        raise
+    finally:
+        _current_call.reset(token)
+        call.wall_seconds = time.perf_counter() - call.started
+        for tracker in _active_trackers.get():
+            tracker.add(call)
+
+
+async def tracked_result(result: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Await an agent strategy's result and attach the telemetry of its calls.
+
+    Each strategy collects into its own tracker, so strategies running
+    concurrently for the same item still report separate totals.
+
+    Args:
+        result: Coroutine producing the strategy's result dictionary
+
+    Returns:
+        The result dictionary with a "telemetry" entry
+    """
+    with track_usage() as usage:
+        item_result = await result
+    item_result["telemetry"] = usage.summary()
+    return item_result
+
+
+def current_call() -> Optional[CallTelemetry]:
+    """The call being measured in the current task or thread, if any."""
+    return _current_call.get()
+
+
+def mark_headers():
+    """HTTP response hook: note that the response headers have arrived."""
+    call = _current_call.get()
+    if call is not None:
+        call.mark_headers()
+
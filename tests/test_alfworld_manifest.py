@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from alfworld.alfworld_manifest import load_manifest, parse_task_name
+
+TASKS = [
+    "pick_and_place_simple-Mug-None-Shelf-301",
+    "pick_and_place_with_movable_recep-Pen-Mug-Desk-310",
+]
+
+
+@pytest.fixture
+def json_dir(tmp_path):
+    for task in TASKS:
+        for trial in ("trial_T2019_0", "trial_T2019_1"):
+            os.makedirs(tmp_path / "train" / task / trial)
+    # Stray files are not tasks
+    (tmp_path / "train" / "README.txt").write_text("")
+    return str(tmp_path)
+
+
+def test_parse_task_name():
+    assert parse_task_name(TASKS[1]) == {
+        "task_type": "pick_and_place_with_movable_recep",
+        "object": "Pen",
+        "receptacle": "Mug",
+        "target": "Desk",
+        "scene": "310",
+    }
+
+
+def test_manifest_catalogs_tasks_and_trials(json_dir):
+    catalog = load_manifest(json_dir)
+
+    assert list(catalog) == ["train"]
+    assert [task["task_name"] for task in catalog["train"]] == TASKS
+    assert [os.path.basename(t) for t in catalog["train"][0]["trials"]] == [
+        "trial_T2019_0",
+        "trial_T2019_1",
+    ]
+
+
+def test_only_changed_splits_are_rescanned(json_dir, capsys):
+    load_manifest(json_dir)
+    assert "SCANNING ALFWORLD SPLIT train" in capsys.readouterr().out
+
+    assert len(load_manifest(json_dir)["train"]) == 2
+    assert "SCANNING" not in capsys.readouterr().out
+
+    task = "look_at_obj_in_light-Mug-None-DeskLamp-301"
+    os.makedirs(os.path.join(json_dir, "train", task))
+    os.makedirs(os.path.join(json_dir, "valid_seen"))
+    catalog = load_manifest(json_dir)
+    out = capsys.readouterr().out
+    assert "SCANNING ALFWORLD SPLIT train" in out
+    assert "SCANNING ALFWORLD SPLIT valid_seen" in out
+    assert len(catalog["train"]) == 3
+    assert catalog["valid_seen"] == []
@@ -0,0 +1,283 @@
+import asyncio
+import copy
+import json
+import os
+
+import pytest
+
+from alfworld.alfworld_goal_checker import check_actions
+from alfworld.alfworld_simulator import ALFWorldSimulator, load_simulator
+
+TRIAL = os.path.join(
+    os.path.dirname(__file__),
+    "fixtures",
+    "alfworld",
+    "pick_heat_then_place_in_recep-Apple-None-DiningTable-7",
+    "trial_T20190909_004738_419381",
+)
+
+# The expert plan of the trial, in the engine's own commands
+EXPERT_PLAN = [
+    "go to countertop 1",
+    "take apple 1 from countertop 1",
+    "go to microwave 1",
+    "heat apple 1 with microwave 1",
+    "go to diningtable 1",
+    "put apple 1 in/on diningtable 1",
+]
+
+# The same plan in the vocabulary the agent prompts teach
+PROMPT_PLAN = [
+    "move to kitchen",
+    "take apple",
+    "use microwave",
+    "place apple in dining table",
+]
+
+
+@pytest.fixture
+def world():
+    return ALFWorldSimulator.from_trial(TRIAL)
+
+
+def test_description_matches_the_world(world):
+    description = world.describe()
+
+    assert "You are in the middle of a kitchen." in description
+    assert "On the countertop 1, you see a apple 1." in description
+    assert "The fridge 1 is closed." in description
+
+
+@pytest.mark.parametrize("plan", [EXPERT_PLAN, PROMPT_PLAN])
+def test_correct_plan_reaches_the_goal(world, plan):
+    result = check_actions(world, plan)
+
+    assert result["success"], result["explanation"]
+
+
+def test_prompt_actions_are_understood(world):
+    world.step("move to kitchen")
+    assert world.location is None
+
+    assert "You pick up the apple 1" in world.step("take apple")
+    assert not world.last_action_failed
+    assert world.step("heat apple").endswith("using the microwave 1.")
+    assert world.location == "microwave 1"
+
+
+def test_unheated_apple_does_not_reach_the_goal(world):
+    result = check_actions(world, ["take apple", "place apple on table"])
+
+    assert not result["success"]
+    assert result["failed_step"] is None
+    assert "heated apple" in result["explanation"]
+
+
+def test_first_rejected_action_is_reported(world):
+    result = check_actions(world, ["take bread from toaster", "take apple"])
+
+    assert not result["success"]
+    assert result["failed_step"] == 0
+
+
+def place_task(object_target, parent_target, extra_poses=0):
+    """The fixture trial turned into a pick-and-place task."""
+    with open(os.path.join(TRIAL, "traj_data.json"), "r", encoding="utf-8") as f:
+        traj_data = json.load(f)
+    traj_data["task_type"] = "pick_and_place_simple"
+    traj_data["pddl_params"]["object_target"] = object_target
+    traj_data["pddl_params"]["parent_target"] = parent_target
+    traj_data["scene"]["object_poses"] += [
+        {"objectName": f"{object_target}_extra{index}"} for index in range(extra_poses)
+    ]
+    return ALFWorldSimulator(traj_data)
+
+
+def test_extra_task_objects_do_not_start_in_the_goal():
+    world = place_task("Mug", "CounterTop", extra_poses=3)
+
+    assert not [
+        name
+        for name in world.contents["countertop 1"]
+        if world.object_types[name] == "mug"
+    ]
+
+
+@pytest.mark.parametrize(
+    "object_target, parent_target",
+    [
+        ("Mug", "CounterTop"),
+        ("Apple", "CounterTop"),
+        ("Mug", "Fridge"),
+        ("Egg", "Drawer"),
+    ],
+)
+def test_look_only_plan_fails(object_target, parent_target):
+    result = check_actions(place_task(object_target, parent_target), ["look"])
+
+    assert not result["success"]
+    assert result["failed_step"] is None
+
+
+def test_objects_already_in_the_goal_do_not_count():
+    world = place_task("Mug", "CounterTop")
+    world.object_types["mug 9"] = "mug"
+    world.contents["countertop 1"].append("mug 9")
+
+    assert not check_actions(copy.deepcopy(world), ["look"])["success"]
+    plan = [
+        f"open {world._where('mug 1')}",
+        "take mug 1",
+        "put mug 1 in/on countertop 1",
+    ]
+    result = check_actions(world, plan)
+    assert result["success"], result["explanation"]
+
+
+def test_goal_holding_before_any_action_is_an_error():
+    world = place_task("Apple", "CounterTop")
+    world.task_type = "pick_and_place_with_movable_recep"
+    world.params["mrecep_target"] = "Mug"
+    mug = next(name for name, kind in world.object_types.items() if kind == "mug")
+    world.contents["countertop 1"].remove("apple 1")
+    world.contents[mug].append("apple 1")
+    world.contents[world._where(mug)].remove(mug)
+    world.contents["countertop 1"].append(mug)
+
+    with pytest.raises(ValueError, match="holds before any action"):
+        check_actions(world, ["look"])
+
+
+def test_grader_replays_in_the_world_the_agent_was_shown(monkeypatch):
+    pytest.importorskip("openai")
+    monkeypatch.setenv("ALFWORLD_ENVIRONMENT_STORE", "")
+    from alfworld.alfworld_eval import ALFWorldEval
+
+    evaluation = ALFWorldEval("unused", grader="symbolic")
+    task = {"trials": [TRIAL], "task_type": "pick_heat_then_place_in_recep"}
+    world = load_simulator(task)
+
+    result = asyncio.run(
+        evaluation.grade_actions_async(
+            task,
+            "Put a heated apple on the dining table.",
+            world.describe(),
+            PROMPT_PLAN,
+            None,
+            world,
+        )
+    )
+
+    assert result["grader"] == "symbolic"
+    assert result["success"], result["explanation"]
+    # Grading replays a copy, the shared world is untouched
+    assert world.holding is None and world.location is None
+
+
+class PlanningAgent:
+    """Direct agent that answers every task with the prompt plan."""
+
+    def __init__(self):
+        self.tasks = []
+
+    async def alfworld_chat_direct(self, task):
+        self.tasks.append(task)
+        content = json.dumps({"actions": PROMPT_PLAN, "reasoning": "Heat it first."})
+        return {"choices": [{"message": {"content": content}}]}
+
+
+@pytest.mark.parametrize("describer", ["llm", "simulator"])
+def test_description_source_is_chosen_and_recorded(monkeypatch, describer):
+    pytest.importorskip("openai")
+    monkeypatch.setenv("ALFWORLD_ENVIRONMENT_STORE", "")
+    from alfworld.alfworld_eval import ALFWorldEval
+
+    evaluation = ALFWorldEval("unused", grader="symbolic", describer=describer)
+
+    async def generate(task, agent):
+        return "A kitchen imagined by gpt-4o."
+
+    monkeypatch.setattr(evaluation, "generate_environment_description_async", generate)
+    task = {
+        "trials": [TRIAL],
+        "task_type": "pick_heat_then_place_in_recep",
+        "task_name": "pick_heat_then_place_in_recep-Apple-None-DiningTable-7",
+    }
+    agent = PlanningAgent()
+
+    results = asyncio.run(
+        evaluation._eval_task(0, task, agent, agent, {}, False, True, False)
+    )
+
+    result = results["direct_results"]
+    assert result["describer"] == describer
+    assert result["environment"] in agent.tasks[0]
+    if describer == "llm":
+        assert result["environment"] == "A kitchen imagined by gpt-4o."
+    else:
+        assert "On the countertop 1, you see a apple 1." in result["environment"]
+    assert result["success"], result["evaluation_explanation"]
+
+
+def test_default_config_uses_one_world(monkeypatch):
+    pytest.importorskip("openai")
+    monkeypatch.setenv("ALFWORLD_ENVIRONMENT_STORE", "")
+    for name in ("ALFWORLD_DESCRIBER", "ALFWORLD_OBSERVER", "ALFWORLD_GRADER"):
+        monkeypatch.delenv(name, raising=False)
+    from alfworld.alfworld_eval import ALFWorldEval
+
+    evaluation = ALFWorldEval("unused")
+    assert (evaluation.describer, evaluation.observer, evaluation.grader) == (
+        "simulator",
+        "simulator",
+        "symbolic",
+    )
+
+    async def generate(task, agent):
+        raise AssertionError("the default config must not invent a room")
+
+    monkeypatch.setattr(evaluation, "generate_environment_description_async", generate)
+    task = {
+        "trials": [TRIAL],
+        "task_type": "pick_heat_then_place_in_recep",
+        "task_name": "pick_heat_then_place_in_recep-Apple-None-DiningTable-7",
+    }
+    agent = PlanningAgent()
+
+    results = asyncio.run(
+        evaluation._eval_task(0, task, agent, agent, {}, False, True, False)
+    )
+
+    result = results["direct_results"]
+    assert result["describer"] == "simulator"
+    assert result["environment"] == ALFWorldSimulator.from_trial(TRIAL).describe()
+    assert result["grader"] == "symbolic"
+    assert result["success"], result["evaluation_explanation"]
+
+
+def test_failed_agents_report_every_result_field(monkeypatch):
+    pytest.importorskip("openai")
+    monkeypatch.setenv("ALFWORLD_ENVIRONMENT_STORE", "")
+    from alfworld.alfworld_eval import ALFWorldEval
+
+    evaluation = ALFWorldEval("unused", grader="symbolic", describer="simulator")
+    task = {
+        "trials": [TRIAL],
+        "task_type": "pick_heat_then_place_in_recep",
+        "task_name": "pick_heat_then_place_in_recep-Apple-None-DiningTable-7",
+    }
+
+    class BrokenAgent:
+        async def alfworld_chat_direct(self, task):
+            raise ValueError("The model refused to answer")
+
+    planned = asyncio.run(
+        evaluation._eval_task(0, task, PlanningAgent(), None, {}, False, True, False)
+    )["direct_results"]
+    failed = asyncio.run(
+        evaluation._eval_task(0, task, BrokenAgent(), None, {}, False, True, False)
+    )["direct_results"]
+
+    assert not failed["success"]
+    assert failed.keys() == planned.keys()
+    assert (failed["failed_step"], failed["grader"]) == (None, None)
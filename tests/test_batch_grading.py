@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("openai")
+
+import mock_server
+from Agent import AsyncAgent
+from hotpotqa.hotpotqa_eval import HotpotQAEval
+
+PAIRS = [(f"Which country is city {index} in?", "France") for index in range(3)]
+
+
+def test_mock_batch_judge_returns_a_verdict_per_pair(mock_state):
+    agent = AsyncAgent()
+    params = agent._batch_evaluation_params(PAIRS)
+
+    reply = mock_server.templated_response(params["messages"], 2, 1.0)
+
+    assert json.loads(reply) == {
+        "verdicts": [{"id": index, "valid": 1} for index in range(len(PAIRS))]
+    }
+
+
+def test_batch_verdicts_are_used(mock_state, capsys):
+    verdicts = asyncio.run(AsyncAgent().evaluation_agent_batch(PAIRS))
+
+    assert verdicts == [1, 1, 1]
+    assert mock_state.counters["requests"] == 1
+    assert "NO BATCH VERDICT" not in capsys.readouterr().out
+
+
+def test_failures_only_leave_the_affected_answers_ungraded(mock_state, monkeypatch):
+    agent = AsyncAgent()
+    create_completion = agent.create_completion
+    evaluation_agent = agent.evaluation_agent
+
+    async def failing_completion(params):
+        content = json.dumps(params["messages"])
+        if "city 2" in content and "city 3" in content:
+            raise RuntimeError("batch request failed")
+        return await create_completion(params)
+
+    async def failing_evaluation(question, answer):
+        if "city 2" in question:
+            raise RuntimeError("judge request failed")
+        return await evaluation_agent(question, answer)
+
+    monkeypatch.setattr(agent, "create_completion", failing_completion)
+    monkeypatch.setattr(agent, "evaluation_agent", failing_evaluation)
+
+    # Two pairs per batch: [0, 1] succeeds, [2, 3] fails and falls back to
+    # individual grading, where only pair 2 fails
+    pairs = PAIRS + [("Which country is city 3 in?", "France")]
+    item_results = [
+        {"direct_results": {"question": q, "answer": a, "graded_by": "pending"}}
+        for q, a in pairs
+    ]
+
+    original = AsyncAgent.evaluation_agent_batch
+
+    async def two_per_batch(self, batch_pairs):
+        return await original(self, batch_pairs, max_batch_size=2)
+
+    monkeypatch.setattr(AsyncAgent, "evaluation_agent_batch", two_per_batch)
+
+    evaluation = HotpotQAEval("unused")
+    graded = asyncio.run(evaluation._grade_pending(item_results, agent))
+
+    assert graded == [0, 1, 2, 3]
+    assert [item["direct_results"]["graded_by"] for item in item_results] == [
+        "llm_judge",
+        "llm_judge",
+        "error",
+        "llm_judge",
+    ]
@@ -0,0 +1,100 @@
+import re
+
+import pytest
+
+from checkpoint import RunJournal, journal_items, journal_path
+
+CONFIG = {"use_react": True}
+QUESTIONS = ["What is the capital of France?", "Who wrote Hamlet?"]
+GOLD_ANSWERS = {"What is the capital of France?": "Paris"}
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("EVAL_JOURNAL_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_resume_reuses_completed_items_and_metadata():
+    journal = RunJournal(
+        "hotpotqa", "run", CONFIG, QUESTIONS, metadata={"gold_answers": GOLD_ANSWERS}
+    )
+    journal.record(QUESTIONS[0], {"direct_results": {"valid": True}})
+    journal.close()
+
+    assert journal_items("hotpotqa", "run") == QUESTIONS
+    resumed = RunJournal("hotpotqa", "run", CONFIG, QUESTIONS, resume=True)
+    assert resumed.completed(QUESTIONS[0]) == {"direct_results": {"valid": True}}
+    assert resumed.completed(QUESTIONS[1]) is None
+    assert resumed.metadata == {"gold_answers": GOLD_ANSWERS}
+    resumed.close()
+
+
+def test_other_configuration_is_not_reused():
+    journal = RunJournal("hotpotqa", "run", CONFIG, QUESTIONS)
+    journal.record(QUESTIONS[0], {"direct_results": {"valid": True}})
+    journal.close()
+
+    resumed = RunJournal("hotpotqa", "run", {"use_react": False}, QUESTIONS, True)
+    assert resumed.completed(QUESTIONS[0]) is None
+    resumed.close()
+
+
+@pytest.mark.parametrize(
+    "torn",
+    [
+        b'{"type": "item", "key": ',
+        # Cut inside the two bytes of "ü"
+        '{"type": "item", "results": {"answer": "Zürich é"}}'.encode("utf-8")[:42],
+    ],
+)
+def test_torn_last_line_is_redone(torn):
+    journal = RunJournal("hotpotqa", "run", CONFIG, QUESTIONS)
+    journal.record(QUESTIONS[0], {"direct_results": {"valid": True}})
+    journal.close()
+    with open(journal_path("hotpotqa", "run"), "ab") as f:
+        f.write(torn)
+
+    resumed = RunJournal("hotpotqa", "run", CONFIG, QUESTIONS, resume=True)
+    resumed.record(QUESTIONS[1], {"direct_results": {"valid": False}})
+    resumed.close()
+
+    final = RunJournal("hotpotqa", "run", CONFIG, QUESTIONS, resume=True)
+    assert final.completed(QUESTIONS[0]) is not None
+    assert final.completed(QUESTIONS[1]) == {"direct_results": {"valid": False}}
+    final.close()
+
+
+def test_resumed_hotpotqa_run_grades_with_journaled_gold_answers(mock_state):
+    pytest.importorskip("openai")
+    from hotpotqa.hotpotqa_eval import HotpotQAEval
+
+    mock_state.script = [
+        (re.compile("capital of France"), '{"answer": "The capital is Paris."}')
+    ]
+    # The first run sampled the questions and crashed before finishing any
+    first = HotpotQAEval("unused")
+    first.gold_answers = dict(GOLD_ANSWERS)
+    RunJournal(
+        "hotpotqa",
+        "run",
+        CONFIG,
+        QUESTIONS,
+        metadata={"gold_answers": first.gold_answers},
+    ).close()
+
+    # A new process only knows the run ID
+    resumed = HotpotQAEval("unused")
+    results = resumed.eval_questions(
+        journal_items("hotpotqa", "run"),
+        use_react=False,
+        use_o3mini=False,
+        run_id="run",
+        resume=True,
+    )
+
+    pairs = results["direct_results"]["question_answer_pairs"]
+    assert pairs[0]["gold_answer"] == "Paris"
+    assert pairs[0]["graded_by"] == "containment"
+    # Questions without a gold answer still go to the judge
+    assert pairs[1]["graded_by"] == "llm_judge"
@@ -0,0 +1,73 @@
+import asyncio
+import contextvars
+
+import pytest
+
+from client_registry import ClientRegistry
+
+ENDPOINT = "https://example.openai.azure.com"
+VERSION = "2024-08-01-preview"
+
+
+@pytest.fixture
+def registry():
+    registry = ClientRegistry()
+    yield registry
+    registry.close()
+
+
+def test_agents_for_one_resource_share_a_client(registry):
+    client = registry.get_client(ENDPOINT, "key", VERSION)
+
+    assert registry.get_client(ENDPOINT, "key", VERSION) is client
+    assert registry.get_client(ENDPOINT, "other-key", VERSION) is not client
+
+    stats = registry.pool_stats()
+    assert (stats["lookups"], stats["reuses"]) == (3, 1)
+    assert [c["kind"] for c in stats["clients"]] == ["sync", "sync"]
+    assert stats["clients"][0]["endpoint"] == ENDPOINT
+    assert stats["clients"][0]["api_version"] == VERSION
+    assert stats["clients"][0]["requests"] == 0
+    assert stats["clients"][0]["open_connections"] == 0
+    # The raw API key never shows up in the statistics
+    assert "key" not in str(stats)
+
+
+def test_async_clients_survive_evaluation_runs(registry):
+    async def lookup():
+        return registry.get_async_client(ENDPOINT, "key", VERSION)
+
+    first = registry.run(lookup())
+    second = registry.run(lookup())
+
+    assert second is first
+    assert not first.is_closed()
+    stats = registry.pool_stats()
+    assert (stats["lookups"], stats["reuses"]) == (2, 1)
+    assert [c["kind"] for c in stats["clients"]] == ["async"]
+
+
+def test_clients_of_other_loops_are_closed_with_the_loop(registry):
+    async def lookup():
+        return registry.get_async_client(ENDPOINT, "key", VERSION)
+
+    client = asyncio.run(lookup())
+
+    assert client.is_closed()
+    assert registry.pool_stats()["clients"] == []
+
+
+def test_run_carries_context_and_refuses_a_running_loop(registry):
+    variable = contextvars.ContextVar("variable", default=None)
+    variable.set("caller")
+
+    async def read():
+        return variable.get()
+
+    assert registry.run(read()) == "caller"
+
+    async def nested():
+        registry.run(read())
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(nested())
@@ -0,0 +1,83 @@
+from conversation import ContextPolicy, Conversation, extractive_summary
+
+TASK = "Which river flows through the capital of France?"
+
+# A long observation in which only one sentence answers the task
+ARTICLE = (
+    "Paris has been a major centre of finance, diplomacy and commerce for "
+    "centuries. The Seine river flows through the capital of France. "
+    + "Its museums attract millions of visitors every single year. " * 20
+)
+
+
+def conversation(policy, observations):
+    transcript = Conversation("You are a helpful agent.", TASK, policy)
+    for n, observation in enumerate(observations):
+        transcript.add_step({"thinking": f"Round {n}", "action": "look"}, observation)
+    return transcript
+
+
+def observations(messages):
+    # System prompt and task first, then assistant/observation pairs
+    return [message["content"] for message in messages[3::2]]
+
+
+def test_summary_keeps_the_sentences_relevant_to_the_query():
+    summary = extractive_summary(ARTICLE, TASK, max_tokens=20)
+
+    assert summary == "The Seine river flows through the capital of France."
+    assert extractive_summary("Short.", TASK, max_tokens=20) == "Short."
+
+
+def test_recent_observations_stay_verbatim_and_older_ones_are_condensed():
+    steps = [f"Step {n}. {ARTICLE}" for n in range(4)]
+    policy = ContextPolicy(keep_last=2, summary_tokens=20, max_observation_tokens=None)
+
+    sent = observations(conversation(policy, steps).to_messages())
+
+    assert sent[2:] == steps[2:]
+    for observation in sent[:2]:
+        assert observation.startswith("[Earlier observation, condensed] ")
+        assert "The Seine river flows" in observation
+        assert "museums" not in observation
+
+
+def test_condensed_prefix_stays_stable_across_rounds():
+    policy = ContextPolicy(keep_last=1, summary_tokens=20)
+    ongoing = conversation(policy, [ARTICLE, ARTICLE, ARTICLE])
+
+    before = ongoing.to_messages()
+    ongoing.add_step({"thinking": "Round 3", "action": "answer"}, "Done.")
+    after = ongoing.to_messages()
+
+    # Everything up to the previously verbatim observation is sent unchanged
+    assert after[: len(before) - 1] == before[:-1]
+    assert after[len(before) - 1]["content"] != before[-1]["content"]
+    assert len(ongoing._summaries) == 3
+
+
+def test_verbatim_observations_are_capped():
+    policy = ContextPolicy(keep_last=2, max_observation_tokens=10)
+
+    sent = observations(conversation(policy, [ARTICLE]).to_messages())
+
+    assert sent[0] == ARTICLE[:40].rstrip() + " [...]"
+
+
+def test_oldest_observations_are_dropped_to_fit_the_prompt_budget():
+    steps = [f"Step {n}. {ARTICLE}" for n in range(4)]
+    policy = ContextPolicy(
+        keep_last=4, max_observation_tokens=None, max_prompt_tokens=800
+    )
+
+    sent = observations(conversation(policy, steps).to_messages())
+
+    assert sent[:2] == ["[Earlier observation omitted]"] * 2
+    assert sent[2:] == steps[2:]
+
+    # The most recent observation is kept even when it alone is over budget
+    policy.max_prompt_tokens = 10
+    sent = observations(conversation(policy, steps).to_messages())
+
+    assert sent[:3] == ["[Earlier observation omitted]"] * 3
+    assert sent[3] == steps[3]
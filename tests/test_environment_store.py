@@ -0,0 +1,30 @@
+from alfworld.environment_store import EnvironmentStore, get_default_environment_store
+
+
+TASK = "pick_and_place_simple-Mug-None-Shelf-301"
+
+
+def test_descriptions_are_kept_per_prompt_version(tmp_path):
+    path = str(tmp_path / "store" / "environments.sqlite")
+    store = EnvironmentStore(path)
+    store.set(TASK, "v1", "A kitchen.")
+
+    # A new process finds the description of the same prompt version only
+    reopened = EnvironmentStore(path)
+    assert reopened.get(TASK, "v1") == "A kitchen."
+    assert reopened.get(TASK, "v2") is None
+    assert reopened.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+    reopened.clear()
+    assert reopened.stats()["entries"] == 0
+
+
+def test_default_store_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv("ALFWORLD_ENVIRONMENT_STORE", "")
+    assert get_default_environment_store() is None
+
+    path = str(tmp_path / "environments.sqlite")
+    monkeypatch.setenv("ALFWORLD_ENVIRONMENT_STORE", path)
+    store = get_default_environment_store()
+    assert store.path == path
+    assert get_default_environment_store() is store
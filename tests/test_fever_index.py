@@ -0,0 +1,48 @@
+import json
+from collections import Counter
+
+import pytest
+
+from fever.fever_index import FeverIndex
+
+LABELS = ["SUPPORTS"] * 10 + ["REFUTES"] * 6 + ["NOT ENOUGH INFO"] * 2
+CLAIMS = [(f"Claim {n} mentions Zürich.", label) for n, label in enumerate(LABELS)]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "train.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for n, (claim, label) in enumerate(CLAIMS):
+            record = {"id": n, "claim": claim, "label": label}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if n == 4:
+                f.write("\n")
+    return str(path)
+
+
+def test_index_reads_every_claim(dataset):
+    index = FeverIndex(dataset)
+
+    assert len(index) == len(CLAIMS)
+    assert list(index) == CLAIMS
+    assert sorted(index.read(range(len(index)))) == sorted(CLAIMS)
+
+
+def test_reloaded_index_is_memory_mapped(dataset, capsys):
+    FeverIndex(dataset)
+    assert "INDEXING" in capsys.readouterr().out
+
+    index = FeverIndex(dataset)
+    assert "INDEXING" not in capsys.readouterr().out
+    assert isinstance(index.offsets, memoryview)
+    assert sorted(index.sample(len(CLAIMS))) == sorted(CLAIMS)
+
+
+def test_stratified_sample_spreads_claims_over_labels(dataset):
+    index = FeverIndex(dataset)
+
+    counts = Counter(label for _, label in index.sample_stratified(9))
+    # NOT ENOUGH INFO runs out, the other two share the remainder
+    assert counts["NOT ENOUGH INFO"] == 2
+    assert sorted([counts["SUPPORTS"], counts["REFUTES"]]) == [3, 4]
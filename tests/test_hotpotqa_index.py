@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from hotpotqa import hotpotqa_index
+from hotpotqa.hotpotqa_index import HotpotQAIndex
+
+RECORDS = [
+    {"_id": f"q{n}", "question": f"Question {n} about Zürich?", "answer": f"é{n}"}
+    for n in range(20)
+]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "hotpot_dev.json"
+    path.write_text(json.dumps(RECORDS, ensure_ascii=False, indent=1), "utf-8")
+    return str(path)
+
+
+def test_records_span_chunk_boundaries(dataset, monkeypatch):
+    # Tiny chunks split records and multi-byte characters between reads
+    monkeypatch.setattr(hotpotqa_index, "CHUNK_SIZE", 7)
+    index = HotpotQAIndex(dataset)
+
+    assert len(index) == len(RECORDS)
+    assert list(index) == RECORDS
+    assert index.read([13, 2]) == [RECORDS[13], RECORDS[2]]
+    assert index.get("q7") == RECORDS[7]
+
+
+def test_index_is_reused_until_the_dataset_changes(dataset, capsys):
+    HotpotQAIndex(dataset)
+    assert "INDEXING" in capsys.readouterr().out
+
+    HotpotQAIndex(dataset)
+    assert "INDEXING" not in capsys.readouterr().out
+
+    with open(dataset, "w", encoding="utf-8") as f:
+        json.dump(RECORDS[:3], f)
+    index = HotpotQAIndex(dataset)
+    assert "INDEXING" in capsys.readouterr().out
+    assert len(index) == 3
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from hotpotqa.hotpotqa_metrics import AMBIGUOUS, INVALID, VALID, grade_answer
+
+
+@pytest.mark.parametrize(
+    "prediction, gold, verdict, rule",
+    [
+        ("Paris", "Paris", VALID, "exact_match"),
+        ("The capital is Paris.", "Paris", VALID, "containment"),
+        ("Yes, both are American.", "yes", VALID, "yes_no"),
+        ("No, they are not.", "yes", INVALID, "yes_no"),
+        ("It was founded in 1985.", "1990", INVALID, "numeric"),
+        ("There were three of them.", "3", AMBIGUOUS, "numeric"),
+        ("The USA", "United States", AMBIGUOUS, "no_overlap"),
+        ("JFK", "John F. Kennedy", AMBIGUOUS, "no_overlap"),
+        ("New York State", "New York City", AMBIGUOUS, "partial_overlap"),
+    ],
+)
+def test_grade_answer(prediction, gold, verdict, rule):
+    grade = grade_answer(prediction, gold)
+    assert (grade["verdict"], grade["rule"]) == (verdict, rule)
+
+
+class FailingAgent:
+    async def hotpotqa_chat_direct(self, question):
+        raise RuntimeError("deployment unavailable")
+
+    def hotpotqa_conversation(self, question):
+        return None
+
+    async def hotpotqa_chat_react(self, conversation):
+        raise RuntimeError("deployment unavailable")
+
+
+def test_failed_answers_carry_the_grading_fields():
+    pytest.importorskip("openai")
+    from hotpotqa.hotpotqa_eval import HotpotQAEval
+
+    evaluation = HotpotQAEval("unused")
+    question = "What is the capital of France?"
+    evaluation.gold_answers[question] = "Paris"
+    agent = FailingAgent()
+
+    results = [
+        asyncio.run(evaluation._eval_direct(question, agent, agent, "GPT-4O")),
+        asyncio.run(evaluation._eval_react(0, question, agent, {})),
+    ]
+
+    for result in results:
+        assert result["valid"] is False
+        assert result["gold_answer"] == "Paris"
+        assert result["graded_by"] == "error"
@@ -0,0 +1,71 @@
+import itertools
+import json
+
+import pytest
+
+import llm_cache
+from llm_cache import ResponseCache
+
+PARAMS = {
+    "model": "gpt-4o",
+    "messages": [{"role": "user", "content": "What is the capital of France?"}],
+    "temperature": 0,
+}
+
+
+def response(content):
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Strictly increasing access times, however fast the test runs
+    ticks = itertools.count(1)
+    monkeypatch.setattr(llm_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_key_ignores_delivery_parameters_and_ordering():
+    key = ResponseCache.make_key(PARAMS)
+
+    assert ResponseCache.make_key({**PARAMS, "stream": False}) == key
+    assert ResponseCache.make_key({**PARAMS, "stream": True}) == key
+    assert ResponseCache.make_key(dict(reversed(list(PARAMS.items())))) == key
+    assert ResponseCache.make_key({**PARAMS, "temperature": 0.7}) != key
+    assert ResponseCache.make_key({**PARAMS, "messages": []}) != key
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    entry_size = len(json.dumps(response("Paris")).encode("utf-8"))
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"), max_bytes=2 * entry_size)
+
+    cache.set("a", response("Paris"))
+    cache.set("b", response("Lyon!"))
+    assert cache.get("a") == response("Paris")
+    cache.set("c", response("Nice!"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") == response("Paris")
+    assert cache.get("c") == response("Nice!")
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"]) == (2, 2 * entry_size)
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+
+    # A response larger than the whole budget is never stored
+    cache.set("d", response("Paris" * 100))
+    assert cache.get("d") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_sampled_requests_are_only_cached_on_request(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+
+    assert cache.is_cacheable(PARAMS)
+    # The agents sample with temperature 0.7, o3-mini with the API default
+    assert not cache.is_cacheable({**PARAMS, "temperature": 0.7})
+    assert not cache.is_cacheable({"model": "o3-mini", "messages": []})
+
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path / "sampled"))
+    monkeypatch.setenv("LLM_CACHE_SAMPLED", "1")
+    sampled = llm_cache.get_default_cache()
+    assert sampled.is_cacheable({**PARAMS, "temperature": 0.7})
+    assert sampled is llm_cache.get_default_cache()
@@ -0,0 +1,62 @@
+import gzip
+import json
+import zlib
+
+from llm_transport import CassetteTransport, read_cassette
+
+PARAMS = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]}
+
+
+def interaction(index):
+    return {"key": f"k{index}", "model": "gpt-4o", "elapsed": 0.1, "response": {}}
+
+
+def test_record_and_replay(tmp_path):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    recorder = CassetteTransport("record", path)
+    recorder.record(PARAMS, {"id": "first"}, 0.5)
+    recorder.record(PARAMS, {"id": "second"}, 0.5)
+
+    player = CassetteTransport("replay", path)
+    assert player.replay(PARAMS)[0] == {"id": "first"}
+    assert player.replay(PARAMS)[0] == {"id": "second"}
+    # Used-up recordings repeat the last one
+    assert player.replay(PARAMS)[0] == {"id": "second"}
+
+
+def test_truncated_member_is_skipped_on_load(tmp_path):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    recorder = CassetteTransport("record", path)
+    recorder.record(PARAMS, {"id": "kept"}, 0.1)
+    recorder.record({**PARAMS, "model": "o3-mini"}, {"id": "torn"}, 0.1)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:-12])
+
+    interactions, complete = read_cassette(path)
+    assert not complete
+    assert [i["response"] for i in interactions] == [{"id": "kept"}]
+    assert CassetteTransport("replay", path).replay(PARAMS)[0] == {"id": "kept"}
+
+
+def test_unterminated_stream_is_repaired_before_appending(tmp_path):
+    # A cassette whose only member was never finished, as left by a killed run
+    path = str(tmp_path / "cassette.jsonl.gz")
+    lines = "".join(json.dumps(interaction(index)) + "\n" for index in range(3))
+    compressor = zlib.compressobj(wbits=31)
+    with open(path, "wb") as f:
+        # Sync-flushed but never finished, like the old streaming writer
+        f.write(compressor.compress(lines.encode()))
+        f.write(compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    recorder = CassetteTransport("record", path)
+    recorder.record(PARAMS, {"id": "new"}, 0.1)
+
+    interactions, complete = read_cassette(path)
+    assert complete
+    assert len(interactions) == 4
+    assert interactions[-1]["response"] == {"id": "new"}
+    # The repaired file is plain gzip again
+    with gzip.open(path, "rt", encoding="utf-8") as g:
+        assert len(g.readlines()) == 4
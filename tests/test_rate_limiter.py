@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+import pytest
+
+from rate_limiter import (
+    DeploymentRateLimiter,
+    TokenBucket,
+    estimate_tokens,
+    parse_retry_after,
+)
+
+
+def o3mini_params(prompt="x" * 400):
+    return {
+        "model": "o3-mini",
+        "messages": [{"role": "user", "content": prompt}],
+        "max_completion_tokens": 100000,
+    }
+
+
+def test_estimate_reserves_expected_output_not_the_budget(monkeypatch):
+    monkeypatch.delenv("LLM_EXPECTED_OUTPUT_TOKENS", raising=False)
+    assert estimate_tokens(o3mini_params()) == 100 + 1000
+
+    monkeypatch.setenv("LLM_EXPECTED_OUTPUT_TOKENS", "300")
+    assert estimate_tokens(o3mini_params()) == 100 + 300
+    # A smaller max_tokens still caps the estimate
+    params = {"messages": [{"role": "user", "content": ""}], "max_tokens": 50}
+    assert estimate_tokens(params) == 50
+
+
+def test_concurrent_o3mini_calls_do_not_drain_the_bucket(monkeypatch):
+    monkeypatch.delenv("LLM_EXPECTED_OUTPUT_TOKENS", raising=False)
+    limiter = DeploymentRateLimiter("o3-mini", rpm=1000, tpm=100000)
+    delays = [limiter._reserve(estimate_tokens(o3mini_params())) for _ in range(8)]
+    assert max(delays) == 0.0
+
+
+def test_settle_charges_and_refunds_the_difference():
+    bucket = TokenBucket(6000)
+    bucket.reserve(1000, time.monotonic())
+    bucket.settle(reserved=1000, used=200)
+    assert bucket.tokens == pytest.approx(5800, abs=1)
+
+    bucket.settle(reserved=100, used=7000)
+    assert bucket.tokens < 0
+    # The debt delays the next caller
+    assert bucket.reserve(1, time.monotonic()) > 0
+
+
+def test_record_response_settles_against_usage():
+    limiter = DeploymentRateLimiter("gpt-4o", rpm=600, tpm=60000)
+    limiter._reserve(5000)
+    before = limiter.tokens.tokens
+    limiter.record_response({}, estimated_tokens=5000, used_tokens=9000)
+    assert limiter.tokens.tokens == pytest.approx(before - 4000, abs=5)
+
+
+def test_429_honours_retry_after_and_slows_down():
+    limiter = DeploymentRateLimiter("gpt-4o", rpm=600, tpm=60000)
+    rate = limiter.tokens.rate_per_minute
+
+    wait = limiter.record_rate_limited({"retry-after": "3"})
+    assert wait == 3.0
+    assert limiter.tokens.rate_per_minute == pytest.approx(rate * 0.7)
+    delay = limiter._reserve(10)
+    assert 2.5 < delay <= 3.0
+    assert limiter.stats()["rate_limited"] == 1
+
+
+def test_429_without_hint_backs_off_exponentially_with_jitter():
+    limiter = DeploymentRateLimiter("gpt-4o", rpm=600, tpm=60000)
+    waits = [limiter.record_rate_limited({}) for _ in range(3)]
+    for attempt, wait in enumerate(waits, start=1):
+        assert 0.5 * 2**attempt <= wait <= 2**attempt
+
+
+def test_parse_retry_after_variants():
+    assert parse_retry_after({"retry-after-ms": "1500"}) == 1.5
+    assert parse_retry_after({"retry-after": "2"}) == 2.0
+    assert parse_retry_after({}) is None
+
+
+def test_malformed_retry_after_is_ignored():
+    assert parse_retry_after({"retry-after": "soon"}) is None
+    assert parse_retry_after({"retry-after-ms": "x", "retry-after": "soon"}) is None
+
+    limiter = DeploymentRateLimiter("gpt-4o", rpm=600, tpm=60000)
+    wait = limiter.record_rate_limited({"retry-after": "soon"})
+    assert 1.0 <= wait <= 2.0
+
+
+def test_backoff_restarts_after_a_successful_call():
+    limiter = DeploymentRateLimiter("gpt-4o", rpm=600, tpm=60000)
+    for _ in range(6):
+        limiter.record_rate_limited({})
+    limiter.record_response({}, estimated_tokens=0)
+
+    wait = limiter.record_rate_limited({})
+    assert 1.0 <= wait <= 2.0
+    # The lifetime count is still reported
+    assert limiter.stats()["rate_limited"] == 7
+
+
+def test_release_refunds_a_failed_reservation():
+    limiter = DeploymentRateLimiter("gpt-4o", rpm=600, tpm=60000)
+    before = limiter.tokens.tokens
+    limiter._reserve(5000)
+    limiter.release(5000)
+    assert limiter.tokens.tokens == pytest.approx(before, abs=5)
+
+
+@pytest.mark.parametrize("failure", ["rate_limit_error_rate", "server_error_rate"])
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_failed_attempts_do_not_keep_their_reservation(
+    mock_state, monkeypatch, failure, asynchronous
+):
+    pytest.importorskip("openai")
+    from Agent import Agent, AsyncAgent
+
+    setattr(mock_state, failure, 1.0)
+    mock_state.retry_after = 0.0
+    agent = (AsyncAgent if asynchronous else Agent)(max_retries=2)
+    agent.rate_limiter = DeploymentRateLimiter("gpt-4o", rpm=600, tpm=60000)
+    monkeypatch.setattr(agent, "_retry_delay", lambda error, attempt: 0.0)
+    before = agent.rate_limiter.tokens.tokens
+
+    params = {"model": "gpt-4o", "messages": [{"role": "user", "content": "x" * 400}]}
+    with pytest.raises(Exception):
+        if asynchronous:
+            asyncio.run(agent._send(params))
+        else:
+            agent._send(params)
+
+    assert mock_state.counters["requests"] == 3
+    assert agent.rate_limiter.tokens.tokens == pytest.approx(before, abs=5)
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from structured_output import (
+    FEVER_DIRECT_FORMAT,
+    JSON_OBJECT_FORMAT,
+    json_schema_format,
+    parse_json_from_response,
+    response_json,
+)
+
+
+def completion(content, refusal=None):
+    return {"choices": [{"message": {"content": content, "refusal": refusal}}]}
+
+
+def test_fenced_reply_is_parsed():
+    reply = 'Here you go:\n```json\n{"answer": "Paris"}\n```\nAnything else?'
+
+    assert parse_json_from_response(reply) == {"answer": "Paris"}
+    assert response_json(completion(reply)) == {"answer": "Paris"}
+
+
+def test_bare_reply_is_parsed():
+    assert parse_json_from_response('{"answer": "Paris"}') == {"answer": "Paris"}
+    # JSON embedded in prose without a code block
+    reply = 'The result is {"verification": "SUPPORTS"} as shown.'
+    assert response_json(completion(reply)) == {"verification": "SUPPORTS"}
+
+
+@pytest.mark.parametrize(
+    "reply", ["I cannot answer that.", '```json\n{"answer": \n```', "[1, 2]", ""]
+)
+def test_malformed_reply_is_an_error(reply):
+    with pytest.raises(ValueError):
+        response_json(completion(reply))
+
+
+def test_refusal_is_an_error():
+    with pytest.raises(ValueError, match="refused"):
+        response_json(completion(None, refusal="I can't help with that."))
+
+
+def test_schema_mode_reply_is_decoded_directly():
+    schema = FEVER_DIRECT_FORMAT["json_schema"]
+    assert FEVER_DIRECT_FORMAT["type"] == "json_schema"
+    assert schema["strict"] and not schema["schema"]["additionalProperties"]
+    assert schema["schema"]["required"] == ["verification", "evidence"]
+    assert JSON_OBJECT_FORMAT == {"type": "json_object"}
+
+    reply = json.dumps({"verification": "REFUTES", "evidence": "```not a fence```"})
+    assert response_json(completion(reply)) == {
+        "verification": "REFUTES",
+        "evidence": "```not a fence```",
+    }
+
+
+def test_optional_properties_can_be_left_out_of_required():
+    response_format = json_schema_format(
+        "reply", {"a": {"type": "string"}, "b": {"type": "string"}}, required=["a"]
+    )
+
+    assert response_format["json_schema"]["schema"]["required"] == ["a"]
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from telemetry import (
+    CallTelemetry,
+    current_call,
+    record_call,
+    track_usage,
+    tracked_result,
+)
+
+
+def usage(prompt, completion, cached=0):
+    return {
+        "usage": {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+    }
+
+
+def test_calls_roll_up_per_item_and_per_deployment():
+    with track_usage() as run:
+        for deployment in ("gpt-4o", "o3-mini"):
+            with track_usage() as item:
+                with record_call(deployment) as call:
+                    call.set_response(usage(100, 20))
+                with record_call("gpt-4o") as call:
+                    call.set_response(usage(50, 10))
+            assert item.summary()["total"]["calls"] == 2
+
+    summary = run.summary()
+    assert summary["total"]["calls"] == 4
+    assert summary["total"]["prompt_tokens"] == 300
+    assert summary["total"]["completion_tokens"] == 60
+    assert summary["by_deployment"]["gpt-4o"]["calls"] == 3
+    assert summary["by_deployment"]["o3-mini"]["prompt_tokens"] == 100
+
+
+def test_concurrent_strategies_report_separate_totals():
+    async def strategy(deployment, calls):
+        for _ in range(calls):
+            with record_call(deployment):
+                await asyncio.sleep(0)
+        return {}
+
+    async def item():
+        return await asyncio.gather(
+            tracked_result(strategy("gpt-4o", 1)),
+            tracked_result(strategy("o3-mini", 3)),
+        )
+
+    direct, react = asyncio.run(item())
+    assert direct["telemetry"]["total"]["calls"] == 1
+    assert react["telemetry"]["total"]["calls"] == 3
+    assert list(react["telemetry"]["by_deployment"]) == ["o3-mini"]
+
+
+def test_retries_cache_hits_and_errors_are_counted():
+    with track_usage() as tracker:
+        with record_call("gpt-4o") as call:
+            assert current_call() is call
+            call.retries = 2
+        with record_call("gpt-4o") as call:
+            call.source = "cache"
+        with pytest.raises(RuntimeError):
+            with record_call("gpt-4o"):
+                raise RuntimeError("request failed")
+    assert current_call() is None
+
+    total = tracker.summary()["total"]
+    assert total["calls"] == 3
+    assert total["network_calls"] == 2
+    assert total["cache_hits"] == 1
+    assert total["retries"] == 2
+    assert total["errors"] == 1
+
+
+def test_cost_charges_cached_prompt_tokens_at_their_price(monkeypatch):
+    monkeypatch.delenv("LLM_PRICE_GPT_4O", raising=False)
+    call = CallTelemetry("gpt-4o")
+    call.set_response(usage(1_000_000, 1_000_000, cached=400_000))
+    assert call.cost_usd() == pytest.approx(0.6 * 2.50 + 0.4 * 1.25 + 10.00)
+
+    monkeypatch.setenv("LLM_PRICE_GPT_4O", "1,0.5,2")
+    assert call.cost_usd() == pytest.approx(0.6 + 0.2 + 2)
+
+    call.source = "cache"
+    assert call.cost_usd() == 0.0
+    assert CallTelemetry("unknown-model").cost_usd() == 0.0
@@ -0,0 +1,140 @@
+import time
+
+import pytest
+
+from wikipedia_cache import WikipediaCache
+
+PAGE = """<html><head>
+<link rel="canonical" href="{url}/wiki/Paris">
+</head><body><div id="mw-content-text">
+<p>Paris is the capital of France.[1]</p>
+</div></body></html>"""
+
+
+def page_entry(url, content="Paris is the capital and largest city of France."):
+    return {
+        "title": "Paris",
+        "url": f"{url}/wiki/Paris",
+        "content": content,
+        "etag": '"rev-1"',
+        "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+        "missing": False,
+    }
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return WikipediaCache(str(tmp_path / "wikipedia.sqlite"), memory_entries=2)
+
+
+def test_aliases_share_one_entry(cache):
+    cache.set("paris france", page_entry("https://en.wikipedia.org"))
+
+    assert cache.get("Paris")["content"].startswith("Paris is")
+    assert cache.get("paris_france")["title"] == "Paris"
+    # The SQLite tier serves a new process
+    reopened = WikipediaCache(cache.path)
+    assert reopened.get("paris france")["etag"] == '"rev-1"'
+    assert reopened.get("London") is None
+    assert reopened.stats()["hits"] == 1
+    assert reopened.stats()["misses"] == 1
+
+
+def test_missing_pages_expire_sooner(cache):
+    cache.set("Nowhere", {**page_entry(""), "title": "Nowhere", "missing": True})
+    cache.set("Paris", page_entry(""))
+    an_hour_later = time.time() - 3600 - 1
+    missing = {**cache.get("Nowhere"), "fetched": an_hour_later}
+    page = {**cache.get("Paris"), "fetched": an_hour_later}
+
+    cache.negative_ttl = 3600
+    assert not cache.is_fresh(missing)
+    assert cache.is_fresh(page)
+
+
+def test_memory_tier_is_bounded(cache):
+    for title in ("Paris", "London", "Berlin"):
+        cache.set(title, {**page_entry(""), "title": title})
+
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.stats()["pages"] == 3
+
+
+@pytest.fixture
+def stale_page(http_server, tmp_path, monkeypatch):
+    pytest.importorskip("bs4")
+    path = str(tmp_path / "revalidated.sqlite")
+    monkeypatch.setenv("WIKIPEDIA_CACHE", path)
+    monkeypatch.delenv("WIKIPEDIA_BACKEND", raising=False)
+    from wikipedia_cache import get_default_wikipedia_cache
+
+    cache = get_default_wikipedia_cache()
+    cache.set("Paris", {**page_entry(http_server.url), "fetched": 0})
+    return cache
+
+
+def test_unchanged_page_is_revalidated_not_refetched(http_server, stale_page):
+    from wikipedia_tool import get_wikipedia_content
+
+    http_server.replies = [(304, {}, "")]
+
+    content = get_wikipedia_content("Paris")
+
+    assert content == "Paris is the capital and largest city of France."
+    _, headers = http_server.requests[0]
+    assert headers["If-None-Match"] == '"rev-1"'
+    assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert stale_page.is_fresh(stale_page.get("Paris"))
+    assert stale_page.stats()["revalidations"] == 1
+
+
+def test_changed_page_replaces_the_cached_text(http_server, stale_page):
+    from wikipedia_tool import get_wikipedia_content
+
+    html = PAGE.format(url=http_server.url)
+    http_server.replies = [(200, {"ETag": '"rev-2"'}, html)]
+
+    assert get_wikipedia_content("Paris") == "Paris is the capital of France."
+    entry = stale_page.get("Paris")
+    assert entry["etag"] == '"rev-2"'
+    assert stale_page.is_fresh(entry)
+
+
+def test_every_paragraph_of_the_lead_is_kept():
+    bs4 = pytest.importorskip("bs4")
+    from wikipedia_offline import MAX_CONTENT_CHARS
+    from wikipedia_tool import extract_text
+
+    paragraphs = [
+        "Paris is the capital of France.[1]",
+        "It is on the\n    Seine.[2]",
+    ] + ["x" * 900] * 3
+    html = '<div id="mw-content-text">{}</div>'.format(
+        "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+    )
+
+    text = extract_text(bs4.BeautifulSoup(html, "html.parser"))
+
+    assert text.startswith("Paris is the capital of France. It is on the Seine. x")
+    # The lead stops at the last whole paragraph that fits
+    assert text.count("x") == 1800
+    assert len(text) <= MAX_CONTENT_CHARS
+
+
+def test_page_without_paragraphs_is_not_cached(http_server, stale_page):
+    bs4 = pytest.importorskip("bs4")
+    from wikipedia_tool import extract_text, get_wikipedia_content
+
+    html = '<div id="mw-content-text"><table><tr><td>1</td></tr></table></div>'
+    assert extract_text(bs4.BeautifulSoup(html, "html.parser")) == ""
+
+    http_server.replies = [
+        (200, {"ETag": '"rev-2"'}, f"<html><body>{html}</body></html>")
+    ]
+
+    # The cached text is served rather than the empty page
+    assert (
+        get_wikipedia_content("Paris")
+        == "Paris is the capital and largest city of France."
+    )
+    assert stale_page.get("Paris")["etag"] == '"rev-1"'
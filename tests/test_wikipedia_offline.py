@@ -0,0 +1,125 @@
+import gzip
+import io
+import json
+import sqlite3
+
+import pytest
+
+import wikipedia_offline
+from wikipedia_offline import OfflineWikipedia, iter_abstracts
+
+ABSTRACTS = """<feed>
+<doc>
+<title>Wikipedia: Barack Obama</title>
+<url>https://en.wikipedia.org/wiki/Barack_Obama</url>
+<abstract>Barack Hussein Obama II is an American politician who served as the 44th president of the United States.</abstract>
+<links><sublink linktype="nav"><anchor>Early life</anchor></sublink></links>
+</doc>
+<doc>
+<title>Wikipedia: Eiffel Tower</title>
+<url>https://en.wikipedia.org/wiki/Eiffel_Tower</url>
+<abstract>The Eiffel Tower is a wrought-iron lattice tower on the Champ de Mars in Paris, France.</abstract>
+</doc>
+<doc>
+<title>Wikipedia: Empty Page</title>
+<abstract></abstract>
+</doc>
+</feed>
+"""
+
+PLAINTEXT = [
+    {"title": "Ada Lovelace", "text": "Ada Lovelace was an English mathematician."},
+    {"title": "Eiffel Tower", "text": "A duplicate that must be skipped."},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    dump = tmp_path / "enwiki-latest-abstract.xml.gz"
+    with gzip.open(dump, "wt", encoding="utf-8") as f:
+        f.write(ABSTRACTS)
+    plaintext = tmp_path / "extracted.jsonl"
+    plaintext.write_text("\n".join(json.dumps(record) for record in PLAINTEXT))
+
+    builder = OfflineWikipedia(str(tmp_path / "wikipedia.sqlite"), create=True)
+    assert builder.import_dump(str(dump)) == 2
+    assert builder.import_dump(str(plaintext)) == 1
+    # Lookups go through a read-only connection
+    return OfflineWikipedia(builder.path)
+
+
+def test_iter_abstracts_streams_documents_and_clears_them():
+    f = io.BytesIO(ABSTRACTS.encode("utf-8"))
+    pairs = list(iter_abstracts(f))
+
+    titles = [title for title, _ in pairs]
+    assert titles == ["Barack Obama", "Eiffel Tower", "Empty Page"]
+    assert pairs[1][1].startswith("The Eiffel Tower is")
+    assert pairs[2][1] == ""
+
+
+def test_iter_abstracts_does_not_keep_parsed_documents(monkeypatch):
+    seen = []
+    iterparse = wikipedia_offline.ET.iterparse
+
+    def recording_iterparse(source, events):
+        for event, element in iterparse(source, events):
+            seen.append(element)
+            yield event, element
+
+    monkeypatch.setattr(wikipedia_offline.ET, "iterparse", recording_iterparse)
+    documents = "".join(
+        f"<doc><title>Page {n}</title><abstract>Text {n}</abstract></doc>"
+        for n in range(100)
+    )
+    f = io.BytesIO(f"<feed>{documents}</feed>".encode("utf-8"))
+
+    assert len(list(iter_abstracts(f))) == 100
+    # Clearing each <doc> alone would leave 100 empty elements on the root
+    root = next(element for element in seen if element.tag == "feed")
+    assert len(root) == 0
+
+
+def test_exact_lookup_ignores_case_and_underscores(index):
+    assert index.lookup("barack_obama")["title"] == "Barack Obama"
+    assert len(index) == 3
+
+
+def test_misspelled_title_is_matched(index):
+    assert index.lookup("Eifel Tower") is None
+    assert index.match_title("Eifel Tower") == "Eiffel Tower"
+    assert index.get_content("Eifel Tower").startswith("The Eiffel Tower is")
+
+
+def test_free_text_query_falls_back_to_bm25(index):
+    assert index.match_title("44th president") is None
+    assert index.search("44th president")[0]["title"] == "Barack Obama"
+    assert index.get_content("44th president").startswith("Barack Hussein Obama")
+
+
+def test_unknown_query_finds_nothing(index):
+    assert index.get_content("Quantum chromodynamics") is None
+
+
+def test_missing_index_is_an_error_not_an_empty_wikipedia(tmp_path, monkeypatch):
+    path = tmp_path / "datasets" / "wikipedia.sqlite"
+    monkeypatch.setenv("WIKIPEDIA_BACKEND", "offline")
+    monkeypatch.setenv("WIKIPEDIA_OFFLINE_INDEX", str(path))
+    from wikipedia_tool import get_wikipedia_content
+
+    with pytest.raises(FileNotFoundError):
+        get_wikipedia_content("Barack Obama")
+    assert not path.parent.exists()
+
+    OfflineWikipedia(str(path), create=True)
+    with pytest.raises(ValueError):
+        get_wikipedia_content("Barack Obama")
+
+
+def test_lookups_cannot_write_to_the_index(index, tmp_path):
+    dump = tmp_path / "more.jsonl"
+    dump.write_text(json.dumps({"title": "Zürich", "text": "A Swiss city."}))
+
+    with pytest.raises(sqlite3.OperationalError):
+        index.import_dump(str(dump))
+    assert index.lookup("Zürich") is None
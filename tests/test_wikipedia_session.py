@@ -0,0 +1,96 @@
+import socket
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+import wikipedia_session
+from wikipedia_session import WikipediaSession
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waits = []
+    monkeypatch.setattr(wikipedia_session.time, "sleep", waits.append)
+    return waits
+
+
+def test_429_waits_as_long_as_the_server_asks(http_server, sleeps):
+    http_server.replies = [
+        (429, {"Retry-After": "3"}, "slow down"),
+        (200, {}, "page"),
+    ]
+    session = WikipediaSession(max_retries=3)
+
+    response = session.get(f"{http_server.url}/wiki/Paris")
+
+    assert response.status_code == 200
+    assert response.text == "page"
+    assert sleeps == [3.0]
+    stats = session.stats()
+    assert (stats["requests"], stats["retries"], stats["failures"]) == (2, 1, 0)
+
+
+def test_errors_without_a_hint_back_off_exponentially_with_jitter(
+    http_server, sleeps
+):
+    http_server.replies = [(503, {}, "")] * 3 + [(200, {}, "page")]
+    session = WikipediaSession(max_retries=3)
+
+    assert session.get(f"{http_server.url}/wiki/Paris").status_code == 200
+
+    assert len(sleeps) == 3
+    for attempt, wait in enumerate(sleeps, 1):
+        ceiling = 0.5 * 2 ** (attempt - 1)
+        assert ceiling / 2 <= wait <= ceiling
+
+
+def test_malformed_retry_after_falls_back_to_backoff(http_server, sleeps):
+    http_server.replies = [
+        (429, {"Retry-After": "soon"}, ""),
+        (200, {}, "page"),
+    ]
+    session = WikipediaSession(max_retries=3)
+
+    assert session.get(f"{http_server.url}/wiki/Paris").status_code == 200
+    assert len(sleeps) == 1
+    assert 0.25 <= sleeps[0] <= 0.5
+
+
+def test_last_error_is_returned_once_retries_are_exhausted(http_server, sleeps):
+    http_server.replies = [(429, {"Retry-After": "1"}, "")] * 3
+    session = WikipediaSession(max_retries=2)
+
+    assert session.get(f"{http_server.url}/wiki/Paris").status_code == 429
+    assert session.stats()["failures"] == 1
+    assert len(sleeps) == 2
+
+
+def test_connection_errors_are_raised_after_retries(sleeps):
+    # A port nothing listens on
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    session = WikipediaSession(max_retries=1)
+
+    with pytest.raises(requests.ConnectionError):
+        session.get(f"http://127.0.0.1:{port}/wiki/Paris")
+    assert session.stats()["failures"] == 1
+    assert len(sleeps) == 1
+
+
+def test_connections_are_reused(http_server):
+    http_server.replies = [(200, {}, "page")] * 3
+    session = WikipediaSession()
+
+    for _ in range(3):
+        session.get(f"{http_server.url}/wiki/Paris")
+
+    stats = session.stats()
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 2
+    # Every request identifies the client
+    assert all(
+        headers["User-Agent"] == wikipedia_session.DEFAULT_USER_AGENT
+        for _, headers in http_server.requests
+    )
@@ -0,0 +1,248 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+DEFAULT_CACHE_PATH = os.path.join("llm_cache", "wikipedia.sqlite")
+
+# Columns of a cached page, in the order they are stored
+ENTRY_FIELDS = (
+    "title",
+    "url",
+    "content",
+    "etag",
+    "last_modified",
+    "missing",
+    "fetched",
+)
+
+
+def normalize_title(query: str) -> str:
+    """Title under which a query is looked up, e.g. "barack obama" -> "Barack_obama"."""
+    return query.replace(" ", "_").capitalize()
+
+
+class WikipediaCache:
+    """
+    Two-tier cache of the text extracted from Wikipedia pages.
+
+    Recently used pages are kept in an in-memory LRU in front of a SQLite
+    store shared by every run. Pages are stored under their resolved title
+    (after redirects and search), and every title that led to them is
+    recorded as an alias, so "Obama" and "Barack_obama" share one entry.
+
+    Each page keeps the ETag and Last-Modified validators of the response it
+    came from. Once an entry is older than the TTL it is stale: the caller
+    revalidates it with a conditional request and only re-extracts the text
+    if the page changed. Queries without any page are cached as missing for
+    a shorter TTL.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        memory_entries: int = 256,
+        ttl: float = 7 * 24 * 3600,
+        negative_ttl: float = 24 * 3600,
+    ):
+        """
+        Open (or create) the cache.
+
+        Args:
+            path: Location of the SQLite file
+            memory_entries: Number of pages kept in memory
+            ttl: Seconds a page is served without revalidation
+            negative_ttl: Seconds a missing page is remembered
+        """
+        self.path = path
+        self.memory_entries = memory_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                title TEXT PRIMARY KEY,
+                url TEXT,
+                content TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                missing INTEGER NOT NULL,
+                fetched REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS aliases (
+                alias TEXT PRIMARY KEY,
+                title TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Whether an entry may be served without revalidation."""
+        ttl = self.negative_ttl if entry["missing"] else self.ttl
+        return time.time() - entry["fetched"] < ttl
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the page a query leads to, fresh or stale.
+
+        Args:
+            query: The query or page title
+
+        Returns:
+            The entry (title, url, content, etag, last_modified, missing,
+            fetched) or None if the query was never resolved
+        """
+        alias = normalize_title(query)
+        with self._lock:
+            entry = self._memory.get(alias)
+            if entry is not None:
+                self._memory.move_to_end(alias)
+            else:
+                row = self._conn.execute(
+                    "SELECT "
+                    + ", ".join(f"pages.{field}" for field in ENTRY_FIELDS)
+                    + " FROM aliases JOIN pages ON pages.title = aliases.title "
+                    "WHERE alias = ?",
+                    (alias,),
+                ).fetchone()
+                if row is not None:
+                    entry = dict(zip(ENTRY_FIELDS, row))
+                    entry["missing"] = bool(entry["missing"])
+                    self._remember(alias, entry)
+
+            if entry is None:
+                self.misses += 1
+            elif self.is_fresh(entry):
+                self.hits += 1
+        return entry
+
+    def set(self, query: str, entry: Dict[str, Any]):
+        """
+        Store the page a query resolved to.
+
+        Args:
+            query: The query or page title that was looked up
+            entry: Dict with title, url, content, etag, last_modified and
+                missing; fetched defaults to now
+        """
+        entry = {**entry, "fetched": entry.get("fetched", time.time())}
+        entry["missing"] = bool(entry["missing"])
+        aliases = {normalize_title(query), entry["title"]}
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO pages ({', '.join(ENTRY_FIELDS)}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                tuple(entry[field] for field in ENTRY_FIELDS),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO aliases (alias, title) VALUES (?, ?)",
+                [(alias, entry["title"]) for alias in aliases],
+            )
+            self._conn.commit()
+            # Other aliases of the page may hold the previous version
+            for alias, cached in list(self._memory.items()):
+                if cached["title"] == entry["title"]:
+                    del self._memory[alias]
+            for alias in aliases:
+                self._remember(alias, entry)
+
+    def touch(self, entry: Dict[str, Any]):
+        """
+        Mark a stale entry as fresh again after the server confirmed it.
+
+        Args:
+            entry: The entry returned by get
+        """
+        entry["fetched"] = time.time()
+        with self._lock:
+            self.revalidations += 1
+            self._conn.execute(
+                "UPDATE pages SET fetched = ? WHERE title = ?",
+                (entry["fetched"], entry["title"]),
+            )
+            self._conn.commit()
+
+    def _remember(self, alias: str, entry: Dict[str, Any]):
+        """Put an entry in the in-memory LRU, evicting the oldest if full."""
+        self._memory[alias] = entry
+        self._memory.move_to_end(alias)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Remove every cached page."""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM aliases")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return page counts and hit/miss/revalidation counters."""
+        with self._lock:
+            pages, missing = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(missing), 0) FROM pages"
+            ).fetchone()
+
+        return {
+            "pages": pages - missing,
+            "missing_pages": missing,
+            "memory_entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+        }
+
+
+_default_caches: Dict[str, WikipediaCache] = {}
+_default_caches_lock = threading.Lock()
+
+
+def get_default_wikipedia_cache() -> Optional[WikipediaCache]:
+    """
+    Return the process-wide page cache configured through the environment.
+
+    The cache lives at llm_cache/wikipedia.sqlite unless WIKIPEDIA_CACHE
+    names another file; setting it to an empty string disables caching.
+    WIKIPEDIA_CACHE_TTL_HOURS (default 168) sets how long pages are served
+    before revalidation, WIKIPEDIA_CACHE_NEGATIVE_TTL_HOURS (default 24) how
+    long missing pages are remembered, and WIKIPEDIA_CACHE_MEMORY_ENTRIES
+    (default 256) the size of the in-memory tier.
+
+    Returns:
+        The shared WikipediaCache, or None if caching is disabled
+    """
+    path = os.getenv("WIKIPEDIA_CACHE", DEFAULT_CACHE_PATH)
+    if not path:
+        return None
+
+    with _default_caches_lock:
+        if path not in _default_caches:
+            _default_caches[path] = WikipediaCache(
+                path,
+                memory_entries=int(os.getenv("WIKIPEDIA_CACHE_MEMORY_ENTRIES", "256")),
+                ttl=float(os.getenv("WIKIPEDIA_CACHE_TTL_HOURS", "168")) * 3600,
+                negative_ttl=float(
+                    os.getenv("WIKIPEDIA_CACHE_NEGATIVE_TTL_HOURS", "24")
+                )
+                * 3600,
+            )
+        return _default_caches[path]
@@ -0,0 +1,348 @@
+import os
+import re
+import bz2
+import gzip
+import json
+import sqlite3
+import sys
+import threading
+import difflib
+import pathlib
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, IO, Iterator, List, Optional, Tuple
+
+DEFAULT_INDEX_PATH = os.path.join("datasets", "wikipedia.sqlite")
+
+# Rows inserted per transaction while importing
+IMPORT_BATCH = 10000
+
+# Characters of an article returned to the agents, like the single paragraph
+# the online lookup returns
+MAX_CONTENT_CHARS = 2000
+
+# Similarity a title needs to count as a fuzzy match
+FUZZY_CUTOFF = 0.75
+
+TOKEN = re.compile(r"\w+")
+
+
+def normalize_key(title: str) -> str:
+    """Case-insensitive lookup key of a title, e.g. "Barack_Obama" -> "barack obama"."""
+    return " ".join(title.replace("_", " ").split()).casefold()
+
+
+def _match_expression(text: str, operator: str = "OR") -> Optional[str]:
+    """FTS5 query matching any (OR) or every (AND) word of a free-text query."""
+    tokens = TOKEN.findall(text)
+    if not tokens:
+        return None
+    return f" {operator} ".join(f'"{token}"' for token in tokens)
+
+
+def _open_dump(path: str) -> IO[bytes]:
+    """Open a dump, decompressing .gz and .bz2 files on the fly."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def iter_abstracts(f: IO[bytes]) -> Iterator[Tuple[str, str]]:
+    """
+    Stream (title, abstract) pairs from an enwiki-*-abstract.xml dump.
+
+    The root element is cleared after every <doc>, which drops the parsed
+    documents themselves and not just their children, so memory use does not
+    grow with the size of the dump.
+    """
+    root = None
+    for event, element in ET.iterparse(f, events=("start", "end")):
+        if root is None:
+            root = element
+        if event != "end" or element.tag != "doc":
+            continue
+        title = element.findtext("title") or ""
+        if title.startswith("Wikipedia: "):
+            title = title[len("Wikipedia: ") :]
+        yield title, element.findtext("abstract") or ""
+        root.clear()
+
+
+def iter_plaintext(f: IO[bytes]) -> Iterator[Tuple[str, str]]:
+    """
+    Stream (title, text) pairs from a JSON-lines plaintext dump.
+
+    Each line is an object with "title" and "text", as written by
+    WikiExtractor's --json output.
+    """
+    for line in f:
+        if line.strip():
+            record = json.loads(line)
+            yield record["title"], record.get("text", "")
+
+
+class OfflineWikipedia:
+    """
+    Local Wikipedia served from a SQLite FTS5 index.
+
+    Articles are looked up by exact title first, then by the closest title,
+    and finally by BM25 full-text search over titles and text, so every
+    lookup is a few index probes instead of several HTTP round trips.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, create: bool = False):
+        """
+        Open the index.
+
+        Lookups open an existing index read-only, so a missing or empty index
+        fails loudly instead of answering every query with "no page found".
+
+        Args:
+            path: Location of the SQLite file
+            create: Whether to create the index for import_dump if it is missing
+
+        Raises:
+            FileNotFoundError: If the index does not exist and create is False
+            ValueError: If the index holds no articles and create is False
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        if not create:
+            if not os.path.exists(path):
+                raise FileNotFoundError(
+                    f"Offline Wikipedia index not found at {path}, build it with "
+                    "python wikipedia_offline.py DUMP [INDEX]"
+                )
+            uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            try:
+                articles = len(self)
+            except sqlite3.DatabaseError:
+                articles = 0
+            if not articles:
+                self._conn.close()
+                raise ValueError(f"Offline Wikipedia index {path} holds no articles")
+            return
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                key TEXT NOT NULL UNIQUE,
+                text TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, text, content='articles', content_rowid='id'
+            )
+            """
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def import_dump(self, dump_path: str) -> int:
+        """
+        Add the articles of a dump to the index, streaming it.
+
+        Abstract dumps (.xml) and JSON-lines plaintext dumps (.json/.jsonl)
+        are supported, optionally compressed with gzip or bzip2. Articles
+        whose title is already indexed are skipped. The index must have been
+        opened with create=True.
+
+        Args:
+            dump_path: Path of the dump
+
+        Returns:
+            Number of articles added
+        """
+        name = re.sub(r"\.(gz|bz2)$", "", dump_path)
+        reader = iter_abstracts if name.endswith(".xml") else iter_plaintext
+
+        added = 0
+        with _open_dump(dump_path) as f, self._lock:
+            for title, text in reader(f):
+                if not title or not text:
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO articles (title, key, text) "
+                    "VALUES (?, ?, ?)",
+                    (title, normalize_key(title), text),
+                )
+                if cursor.rowcount:
+                    self._conn.execute(
+                        "INSERT INTO articles_fts (rowid, title, text) "
+                        "VALUES (?, ?, ?)",
+                        (cursor.lastrowid, title, text),
+                    )
+                    added += 1
+                    if added % IMPORT_BATCH == 0:
+                        self._conn.commit()
+                        print(f"IMPORTED {added} ARTICLES")
+
+            self._conn.execute(
+                "INSERT INTO articles_fts (articles_fts) VALUES ('optimize')"
+            )
+            self._conn.commit()
+        print(f"IMPORTED {added} ARTICLES FROM {dump_path}")
+        return added
+
+    def lookup(self, title: str) -> Optional[Dict[str, str]]:
+        """
+        Fetch the article with exactly this title (ignoring case).
+
+        Returns:
+            Dict with title and text, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, text FROM articles WHERE key = ?",
+                (normalize_key(title),),
+            ).fetchone()
+        return None if row is None else {"title": row[0], "text": row[1]}
+
+    def match_title(self, query: str, candidates: int = 20) -> Optional[str]:
+        """
+        Find the indexed title closest to a misspelled or partial title.
+
+        Titles sharing a word with the query are ranked by BM25 and the
+        most similar one is kept if it is close enough.
+
+        Args:
+            query: The title to match
+            candidates: Number of titles compared with the query
+
+        Returns:
+            The matching title or None
+        """
+        expression = _match_expression(query)
+        if expression is None:
+            return None
+        with self._lock:
+            titles = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT title FROM articles_fts WHERE articles_fts MATCH ? "
+                    "ORDER BY bm25(articles_fts, 1.0, 0.0) LIMIT ?",
+                    (f"title : ({expression})", candidates),
+                )
+            ]
+
+        best, best_ratio = None, 0.0
+        key = normalize_key(query)
+        for title in titles:
+            ratio = difflib.SequenceMatcher(None, key, normalize_key(title)).ratio()
+            if ratio > best_ratio:
+                best, best_ratio = title, ratio
+        return best if best_ratio >= FUZZY_CUTOFF else None
+
+    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Rank articles by BM25 over their title and text.
+
+        Title matches weigh ten times as much as text matches. Articles
+        containing every word of the query are preferred; only if there are
+        none are articles containing any of them ranked, which is much slower
+        for common words.
+
+        Args:
+            query: Free-text query
+            k: Number of results
+
+        Returns:
+            List of dicts with title and score (lower is better), best first
+        """
+        rows = []
+        for operator in ("AND", "OR"):
+            expression = _match_expression(query, operator)
+            if expression is None:
+                return []
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT title, bm25(articles_fts, 10.0, 1.0) AS score "
+                    "FROM articles_fts WHERE articles_fts MATCH ? "
+                    "ORDER BY score LIMIT ?",
+                    (expression, k),
+                ).fetchall()
+            if rows:
+                break
+        return [{"title": title, "score": score} for title, score in rows]
+
+    def get_content(self, query: str) -> Optional[str]:
+        """
+        Resolve a query to an article and return its leading text.
+
+        Args:
+            query: The query or page title
+
+        Returns:
+            Up to MAX_CONTENT_CHARS of the article, or None if nothing matches
+        """
+        article = self.lookup(query)
+        if article is None:
+            title = self.match_title(query)
+            if title is None:
+                results = self.search(query, k=1)
+                title = results[0]["title"] if results else None
+            if title is None:
+                return None
+            print(f"OFFLINE WIKIPEDIA RESOLVED '{query}' TO '{title}'")
+            article = self.lookup(title)
+
+        return lead_text(article["text"])
+
+
+def lead_text(text: str) -> str:
+    """The first paragraphs of an article, up to MAX_CONTENT_CHARS."""
+    lead = ""
+    for paragraph in text.split("\n"):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if lead and len(lead) + len(paragraph) + 1 > MAX_CONTENT_CHARS:
+            break
+        lead = f"{lead} {paragraph}" if lead else paragraph
+    return lead[:MAX_CONTENT_CHARS]
+
+
+_default_indexes: Dict[str, OfflineWikipedia] = {}
+_default_indexes_lock = threading.Lock()
+
+
+def get_default_offline_wikipedia() -> OfflineWikipedia:
+    """
+    Return the process-wide offline index configured through the environment.
+
+    The index lives at datasets/wikipedia.sqlite unless WIKIPEDIA_OFFLINE_INDEX
+    names another file. It is opened read-only and must have been built with
+    python wikipedia_offline.py beforehand.
+    """
+    path = os.getenv("WIKIPEDIA_OFFLINE_INDEX", DEFAULT_INDEX_PATH)
+    with _default_indexes_lock:
+        if path not in _default_indexes:
+            _default_indexes[path] = OfflineWikipedia(path)
+        return _default_indexes[path]
+
+
+if __name__ == "__main__":
+    # Build the index: python wikipedia_offline.py DUMP [INDEX]
+    if len(sys.argv) < 2:
+        print("USAGE: python wikipedia_offline.py DUMP [INDEX]")
+        sys.exit(1)
+    index_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_INDEX_PATH
+    index = OfflineWikipedia(index_path, create=True)
+    index.import_dump(sys.argv[1])
+    print(f"INDEX {index_path} HOLDS {len(index)} ARTICLES")
@@ -0,0 +1,177 @@
+import os
+import time
+import random
+import threading
+from typing import Dict, Any, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from rate_limiter import parse_retry_after
+
+DEFAULT_USER_AGENT = "react-agent-eval/1.0 (Wikipedia retrieval; python-requests)"
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class WikipediaSession:
+    """
+    Shared, pooled HTTP session for every Wikipedia request.
+
+    One requests.Session keeps keep-alive connections to en.wikipedia.org
+    open across lookups, so only the first request to a host pays for the
+    TCP and TLS handshakes. Every request has a connect and read timeout,
+    and connection errors, timeouts, 429s and 5xx responses are retried a
+    bounded number of times with jittered exponential backoff (or the wait
+    the server asks for).
+    """
+
+    def __init__(
+        self,
+        user_agent: str = DEFAULT_USER_AGENT,
+        timeout: Tuple[float, float] = (5.0, 20.0),
+        max_retries: int = 3,
+        pool_size: int = 10,
+    ):
+        """
+        Initialize the session.
+
+        Args:
+            user_agent: User-Agent sent with every request
+            timeout: (connect, read) timeout in seconds
+            max_retries: Retries after the first attempt of a request
+            pool_size: Keep-alive connections kept per host
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = user_agent
+        # Retries are handled here so they can be counted and jittered
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._adapter = adapter
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Seconds to wait before retry number `attempt` (starting at 1)."""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers)
+            if retry_after is not None:
+                return min(30.0, retry_after)
+        # No hint from the server: exponential backoff with jitter
+        return min(30.0, 0.5 * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Send a GET request through the pool, retrying transient failures.
+
+        Args:
+            url: URL to fetch
+            **kwargs: Passed on to requests (e.g. headers)
+
+        Returns:
+            The response; after the last retry this may still be an error
+
+        Raises:
+            requests.RequestException: If the last attempt failed to connect
+                or timed out
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            with self._lock:
+                self.requests += 1
+            response = None
+            try:
+                response = self._session.get(url, **kwargs)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                error = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                error = str(e)
+
+            if attempt >= self.max_retries:
+                with self._lock:
+                    self.failures += 1
+                return response
+
+            attempt += 1
+            wait = self._backoff(attempt, response)
+            with self._lock:
+                self.retries += 1
+            print(f"RETRYING WIKIPEDIA REQUEST ({error}) IN {wait:.1f}s: {url}")
+            time.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report request counters and how often connections were reused.
+
+        Returns:
+            Dictionary with request/retry/failure counters, the number of
+            connections opened and the requests served over an already open
+            connection
+        """
+        opened = 0
+        sent = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "connections_opened": opened,
+                "connections_reused": max(0, sent - opened),
+            }
+
+    def close(self):
+        """Close every pooled connection."""
+        self._session.close()
+
+
+_default_session: Optional[WikipediaSession] = None
+_default_session_lock = threading.Lock()
+
+
+def get_wikipedia_session() -> WikipediaSession:
+    """
+    Return the process-wide Wikipedia session configured through the environment.
+
+    WIKIPEDIA_USER_AGENT sets the User-Agent, WIKIPEDIA_CONNECT_TIMEOUT and
+    WIKIPEDIA_READ_TIMEOUT (default 5 and 20 seconds) the timeouts,
+    WIKIPEDIA_MAX_RETRIES (default 3) the retries per request and
+    WIKIPEDIA_POOL_SIZE (default 10) the keep-alive connections per host.
+    """
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = WikipediaSession(
+                user_agent=os.getenv("WIKIPEDIA_USER_AGENT", DEFAULT_USER_AGENT),
+                timeout=(
+                    float(os.getenv("WIKIPEDIA_CONNECT_TIMEOUT", "5")),
+                    float(os.getenv("WIKIPEDIA_READ_TIMEOUT", "20")),
+                ),
+                max_retries=int(os.getenv("WIKIPEDIA_MAX_RETRIES", "3")),
+                pool_size=int(os.getenv("WIKIPEDIA_POOL_SIZE", "10")),
+            )
+        return _default_session
+
+
+def session_stats() -> Dict[str, Any]:
+    """Return the statistics of the process-wide Wikipedia session."""
+    return get_wikipedia_session().stats()
@@ -1,34 +1,97 @@
+import os
 import requests
 from bs4 import BeautifulSoup
 import re
+from typing import Dict, Any, Optional, Union
+from urllib.parse import unquote
+from wikipedia_cache import get_default_wikipedia_cache, normalize_title
+from wikipedia_offline import get_default_offline_wikipedia, lead_text
+from wikipedia_session import get_wikipedia_session
 
 
-def get_wikipedia_content(query):
+def extract_text(soup: BeautifulSoup) -> str:
     """
-    Retrieve content from a Wikipedia page based on a search query.
+    Extract the article text from a parsed Wikipedia page.
+
+    Like the offline backend, only the lead of the article is kept.
 
     Args:
-        query (str): The search query or page title to retrieve
+        soup: The parsed page HTML
 
     Returns:
-        str: The extracted content from the Wikipedia page
+        str: The cleaned paragraph text, up to MAX_CONTENT_CHARS; empty if the
+        page has no paragraphs
     """
-    # Clean the query and prepare it for URL
-    search_term = query.replace(" ", "_")
-    search_term = search_term.capitalize()
-    print("SEARCHING WIKIPEDIA FOR: ", search_term)
+    # Find the main content div
+    content = soup.find("div", {"id": "mw-content-text"})
+    if not content:
+        return "Error: Could not find content section"
+
+    paragraphs = []
+    for para in content.find_all("p"):
+        # Remove reference numbers like [1], [2], etc.
+        text = re.sub(r"\[\d+\]", "", para.get_text())
+        paragraphs.append(text)
+
+    return lead_text("\n".join(paragraphs))
+
+
+def _cacheable(entry: Dict[str, Any]) -> bool:
+    """Whether an entry is worth keeping; pages without text are fetched again."""
+    content = entry["content"]
+    return entry["missing"] or bool(content) and not content.startswith("Error:")
+
+
+def _page_entry(response: requests.Response) -> Dict[str, Any]:
+    """
+    Build the cache entry of a fetched page.
+
+    The page is stored under its canonical title, which resolves redirects
+    (e.g. "Obama" is served as "Barack_Obama"), and keeps the validators
+    needed to revalidate it later.
+    """
+    # Parse HTML content
+    soup = BeautifulSoup(response.text, "html.parser")
+
+    url = response.url
+    canonical = soup.find("link", {"rel": "canonical"})
+    if canonical and canonical.get("href"):
+        url = canonical["href"]
+
+    return {
+        "title": unquote(url.rsplit("/wiki/", 1)[-1]),
+        "url": url,
+        "content": extract_text(soup),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "missing": False,
+    }
+
+
+def _fetch_page(query: str, search_term: str) -> Union[Dict[str, Any], str]:
+    """
+    Fetch the page a query leads to, searching if there is no page by that name.
+
+    Returns:
+        The cache entry of the page (marked missing if the search found
+        nothing), or an error message if Wikipedia returned an error
+
+    Raises:
+        requests.RequestException: If Wikipedia did not answer after retries
+    """
+    session = get_wikipedia_session()
 
     # Try to directly access the page first
     url = f"https://en.wikipedia.org/wiki/{search_term}"
 
     # Send GET request
-    response = requests.get(url)
+    response = session.get(url)
 
     # If direct access fails, try search
     if response.status_code != 200:
         # Search Wikipedia API
         search_url = f"https://en.wikipedia.org/w/api.php?action=opensearch&search={search_term}&limit=1&namespace=0&format=json"
-        search_response = requests.get(search_url)
+        search_response = session.get(search_url)
 
         if search_response.status_code != 200:
             return "Error: Could not search Wikipedia"
@@ -37,45 +100,109 @@ def get_wikipedia_content(query):
 
         # Check if results found
         if len(search_data[1]) == 0:
-            return f"No Wikipedia page found for '{query}'"
+            return {
+                "title": search_term,
+                "url": None,
+                "content": None,
+                "etag": None,
+                "last_modified": None,
+                "missing": True,
+            }
 
         # Get the first result's URL
         page_title = search_data[1][0]
         url = f"https://en.wikipedia.org/wiki/{page_title.replace(' ', '_')}"
 
         # Try again with the search result
-        response = requests.get(url)
+        response = session.get(url)
 
         if response.status_code != 200:
             return f"Error: Could not retrieve Wikipedia page for '{query}'"
 
-    # Parse HTML content
-    soup = BeautifulSoup(response.text, "html.parser")
+    return _page_entry(response)
 
-    # Get the page title
-    # page_title = soup.find("h1", {"id": "firstHeading"}).text
 
-    # Find the main content div
-    content = soup.find("div", {"id": "mw-content-text"})
-    if not content:
-        return "Error: Could not find content section"
+def _revalidate(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Ask Wikipedia whether a stale page changed since it was cached.
 
-    # Get all paragraphs
-    paragraphs = content.find_all("p")
+    Without validators this is a plain fetch of the page.
 
-    # Clean and combine text
-    # clean_text = f"Wikipedia article: {page_title}\n\n"
+    Returns:
+        The entry itself if the page is unchanged, a new entry if it changed,
+        or None if the request failed
+    """
+    headers = {}
+    if entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = get_wikipedia_session().get(entry["url"], headers=headers)
+    except requests.RequestException as e:
+        print(f"Could not revalidate {entry['url']}: {e}")
+        return None
+    if response.status_code == 304:
+        return entry
+    if response.status_code == 200:
+        return _page_entry(response)
+    return None
 
-    for para in paragraphs:
-        # Convert to text
-        text = para.get_text()
 
-        # Remove reference numbers like [1], [2], etc.
-        text = re.sub(r"\[\d+\]", "", text)
+def get_wikipedia_content(query):
+    """
+    Retrieve content from a Wikipedia page based on a search query.
 
-        # Remove extra whitespace
-        text = " ".join(text.split())
+    WIKIPEDIA_BACKEND selects where articles come from. "online" (the
+    default) fetches en.wikipedia.org: pages are served from the Wikipedia
+    cache while fresh and revalidated with a conditional request once stale,
+    so a page is only downloaded and parsed again when it changed. "offline"
+    serves them from the local index built by wikipedia_offline.py.
 
-        # print(text[:2000])
+    Args:
+        query (str): The search query or page title to retrieve
 
-    return text.strip()
+    Returns:
+        str: The extracted content from the Wikipedia page
+    """
+    # Clean the query and prepare it for URL
+    search_term = normalize_title(query)
+    print("SEARCHING WIKIPEDIA FOR: ", search_term)
+
+    if os.getenv("WIKIPEDIA_BACKEND", "online") == "offline":
+        content = get_default_offline_wikipedia().get_content(query)
+        if content is None:
+            return f"No Wikipedia page found for '{query}'"
+        return content
+
+    cache = get_default_wikipedia_cache()
+    entry = cache.get(query) if cache is not None else None
+
+    if entry is not None and cache.is_fresh(entry):
+        print("WIKIPEDIA CACHE HIT FOR: ", search_term)
+    elif entry is not None and not entry["missing"]:
+        print("REVALIDATING WIKIPEDIA PAGE: ", entry["title"])
+        revalidated = _revalidate(entry)
+        if revalidated is entry:
+            cache.touch(entry)
+        elif revalidated is not None and _cacheable(revalidated):
+            entry = revalidated
+            cache.set(query, entry)
+        # Otherwise the stale text is still better than an error
+    else:
+        try:
+            entry = _fetch_page(query, search_term)
+        except requests.RequestException as e:
+            print(f"Could not reach Wikipedia for '{query}': {e}")
+            return f"Error: Could not reach Wikipedia for '{query}'"
+        if isinstance(entry, str):
+            return entry
+        if cache is not None and _cacheable(entry):
+            cache.set(query, entry)
+
+    if entry["missing"]:
+        return f"No Wikipedia page found for '{query}'"
+    if not entry["content"]:
+        return f"Error: No article text on the Wikipedia page for '{query}'"
+    return entry["content"]